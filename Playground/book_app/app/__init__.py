@@ -1,64 +1,43 @@
-import json
-import logging
-from contextlib import asynccontextmanager
-from datetime import datetime, timezone
-from logging.handlers import TimedRotatingFileHandler
+import asyncio
+from contextlib import asynccontextmanager, suppress
 from pathlib import Path
 from typing import AsyncGenerator
 
 from fastapi import FastAPI
+from app.admission import (
+    ADMISSION_CONTROL_ENV,
+    ADMISSION_LIMITS_ENV,
+    ADMISSION_QUEUE_TIMEOUT_ENV,
+    ADMISSION_RETRY_AFTER_ENV,
+    AdmissionMiddleware,
+    parse_limits,
+)
+from app.capture import (
+    CAPTURE_FILE_ENV,
+    CAPTURE_MAX_BODY_ENV,
+    CaptureMiddleware,
+    TrafficRecorder,
+)
+from app.changefeed import disconnect_on_exit_signals, feed
+from app.coalescing import REQUEST_COALESCING_ENV, CoalescingMiddleware
+from app.config import env_flag, env_float, env_int, env_str
+from app.db import compact_change_log_every
+from app.db.executor import configure_thread_pool
+from app.logger import setup_logging
+from app.metrics.middleware import MetricsMiddleware, monitor_event_loop_lag
+from app.profiling import (
+    PROFILING_DIR_ENV,
+    PROFILING_TOKEN_ENV,
+    ProfilingMiddleware,
+    RequestProfiler,
+)
 from app.routes import router as book_router
-from app.routes.ui import router as ui_router
-
-
-def setup_logging() -> logging.Logger:
-    """Configure JSON file logging with daily rotation."""
-    log_dir = Path("logs")
-    log_dir.mkdir(exist_ok=True)
-
-    log_file = log_dir / f"app_{datetime.now(timezone.utc).strftime('%Y-%m-%d')}.log"
-
-    logger = logging.getLogger("app")
-    logger.setLevel(logging.INFO)
-
-    if logger.handlers:
-        return logger
-
-    class JSONFormatter(logging.Formatter):
-        """Format log records as JSON lines."""
-
-        def format(self, record: logging.LogRecord) -> str:
-            log_data = {
-                "timestamp": datetime.now(timezone.utc)
-                .isoformat()
-                .replace("+00:00", "Z"),
-                "level": record.levelname,
-                "logger": record.name,
-                "message": record.getMessage(),
-            }
-            if record.exc_info:
-                log_data["exception"] = self.formatException(record.exc_info)
-            return json.dumps(log_data)
-
-    file_handler = TimedRotatingFileHandler(
-        filename=str(log_file),
-        when="midnight",
-        interval=1,
-        utc=True,
-    )
-    file_handler.setLevel(logging.INFO)
-    file_handler.setFormatter(JSONFormatter())
-
-    console_handler = logging.StreamHandler()
-    console_handler.setLevel(logging.INFO)
-    console_handler.setFormatter(
-        logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
-    )
+from app.routes.ops import router as ops_router
+from app.routes.profiling import router as profiling_router
+from app.warmup import WARMUP_MODE_ENV, WARMUP_MODES, warm_up
 
-    logger.addHandler(file_handler)
-    logger.addHandler(console_handler)
-
-    return logger
+METRICS_ENABLED_ENV = "METRICS_ENABLED"
+CHANGE_LOG_COMPACT_INTERVAL_ENV = "CHANGE_LOG_COMPACT_INTERVAL"
 
 
 logger = setup_logging()
@@ -66,14 +45,69 @@ logger = setup_logging()
 
 @asynccontextmanager
 async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
-    """Application lifespan handler for startup and shutdown events."""
+    """Application lifespan handler for startup and shutdown events.
+
+    ``WARMUP_MODE`` selects how the warm-up runs: ``background`` (default)
+    serves requests right away while ``/ready`` answers 503 until warm-up is
+    done, ``blocking`` finishes warm-up before the server accepts traffic, and
+    ``off`` skips it.
+    """
     logger.info("Starting Book API application")
+    logger.info("Worker thread pool capacity: %d", configure_thread_pool())
+    lag_monitor = None
+    if app.state.metrics_enabled:
+        lag_monitor = asyncio.create_task(monitor_event_loop_lag())
+    compactor = None
+    compact_interval = env_float(CHANGE_LOG_COMPACT_INTERVAL_ENV, 300.0)
+    if compact_interval > 0:
+        compactor = asyncio.create_task(compact_change_log_every(compact_interval))
+
+    warmup_mode = env_str(WARMUP_MODE_ENV, "background").lower()
+    if warmup_mode not in WARMUP_MODES:
+        raise ValueError(
+            f"{WARMUP_MODE_ENV} must be one of {', '.join(WARMUP_MODES)}, "
+            f"got {warmup_mode!r}"
+        )
+    warmup_task = None
+    app.state.ready = False
+    if warmup_mode == "blocking":
+        await warm_up(app)
+    elif warmup_mode == "background":
+        warmup_task = asyncio.create_task(warm_up(app))
+    else:
+        app.state.ready = True
+    restore_signals = disconnect_on_exit_signals(feed)
     yield
+    restore_signals()
+    feed.disconnect_all()
+    if warmup_task is not None and not warmup_task.done():
+        warmup_task.cancel()
+        with suppress(asyncio.CancelledError):
+            await warmup_task
+    if app.state.recorder is not None:
+        app.state.recorder.close()
+    for task in (lag_monitor, compactor):
+        if task is not None:
+            task.cancel()
+            with suppress(asyncio.CancelledError):
+                await task
     logger.info("Shutting down Book API application")
 
 
-def create_app() -> FastAPI:
-    """Create and configure the FastAPI application."""
+def create_app(include_ui: bool = True) -> FastAPI:
+    """Create and configure the FastAPI application.
+
+    With ``include_ui=False`` the HTML pages are left out and their module
+    (and Jinja2) is never imported; see ``create_api_app``.
+
+    Request metrics are recorded unless ``METRICS_ENABLED`` is false, and are
+    served at ``/metrics``. Admission control limits concurrent requests per
+    route class unless ``ADMISSION_CONTROL`` is false, and identical concurrent
+    reads share one response unless ``REQUEST_COALESCING`` is false. Setting
+    ``PROFILING_TOKEN`` installs the on-demand request profiler and its
+    ``/debug/profile`` routes; otherwise neither exists. Setting
+    ``CAPTURE_FILE`` records every request there for later replay.
+    """
     app = FastAPI(
         title="Book API",
         description="A RESTful API for managing books with CRUD operations",
@@ -81,10 +115,60 @@ def create_app() -> FastAPI:
         lifespan=lifespan,
     )
 
+    app.state.include_ui = include_ui
+    app.state.ready = False
+    if env_flag(ADMISSION_CONTROL_ENV, True):
+        # Added before the metrics middleware so shed requests and queueing
+        # time show up in the request metrics, under the route they were for.
+        app.add_middleware(
+            AdmissionMiddleware,
+            limits=parse_limits(env_str(ADMISSION_LIMITS_ENV, "")),
+            queue_timeout=env_float(ADMISSION_QUEUE_TIMEOUT_ENV, 5.0),
+            retry_after=env_int(ADMISSION_RETRY_AFTER_ENV, 1),
+            routes=app.router.routes,
+        )
+
+    if env_flag(REQUEST_COALESCING_ENV, True):
+        # Outside admission control, so waiting duplicates hold no slots.
+        app.add_middleware(CoalescingMiddleware)
+
+    app.state.metrics_enabled = env_flag(METRICS_ENABLED_ENV, True)
+    if app.state.metrics_enabled:
+        app.add_middleware(MetricsMiddleware)
+
     app.include_router(book_router)
-    app.include_router(ui_router)
+    if include_ui:
+        from app.routes.ui import router as ui_router
+
+        app.include_router(ui_router)
+    app.include_router(ops_router)
+
+    capture_file = env_str(CAPTURE_FILE_ENV, "")
+    app.state.recorder = None
+    if capture_file:
+        app.state.recorder = TrafficRecorder(
+            Path(capture_file), max_body=env_int(CAPTURE_MAX_BODY_ENV, 65536)
+        )
+        app.add_middleware(CaptureMiddleware, recorder=app.state.recorder)
+
+    profiling_token = env_str(PROFILING_TOKEN_ENV, "")
+    app.state.profiler = None
+    if profiling_token:
+        app.state.profiler = RequestProfiler(
+            profiling_token, Path(env_str(PROFILING_DIR_ENV, "profiles"))
+        )
+        app.add_middleware(ProfilingMiddleware, profiler=app.state.profiler)
+        app.include_router(profiling_router)
 
     return app
 
 
+def create_api_app() -> FastAPI:
+    """Create the JSON API without the HTML pages, for API-only workers.
+
+    Run with ``uvicorn --factory app:create_api_app``.
+    """
+    return create_app(include_ui=False)
+
+
 app = create_app()
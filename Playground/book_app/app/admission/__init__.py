@@ -0,0 +1,230 @@
+import asyncio
+import json
+from collections import deque
+from typing import Deque, Dict, List, Optional, Sequence, Tuple
+
+from starlette.routing import BaseRoute, Match
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.metrics import REGISTRY, Gauge, Metric, MetricsRegistry
+
+ADMISSION_CONTROL_ENV = "ADMISSION_CONTROL"
+ADMISSION_LIMITS_ENV = "ADMISSION_LIMITS"
+ADMISSION_QUEUE_TIMEOUT_ENV = "ADMISSION_QUEUE_TIMEOUT"
+ADMISSION_RETRY_AFTER_ENV = "ADMISSION_RETRY_AFTER"
+
+# Route class -> (concurrent requests, waiting requests).
+DEFAULT_LIMITS: Dict[str, Tuple[int, int]] = {
+    "read": (200, 1000),
+    "search": (50, 200),
+    "write": (20, 200),
+    "ui": (50, 200),
+}
+
+# Paths that are never limited, so probes and scrapes work under overload.
+# The change feed is exempt because its streams would hold slots for good; it
+# has its own subscriber limit.
+EXEMPT_PREFIXES = (
+    "/metrics",
+    "/ready",
+    "/debug",
+    "/docs",
+    "/redoc",
+    "/openapi.json",
+    "/api/books/events",
+)
+
+
+def parse_limits(spec: str) -> Dict[str, Tuple[int, int]]:
+    """Parse ``class=limit:queue,...`` on top of ``DEFAULT_LIMITS``.
+
+    The queue size may be omitted (``search=20``) to keep the default.
+    """
+    limits = dict(DEFAULT_LIMITS)
+    for part in spec.split(","):
+        if not part.strip():
+            continue
+        name, _, value = part.partition("=")
+        name = name.strip()
+        if name not in limits:
+            raise ValueError(
+                f"Unknown route class: {name} (use {', '.join(DEFAULT_LIMITS)})"
+            )
+        limit, _, queue = value.partition(":")
+        limits[name] = (int(limit), int(queue) if queue else limits[name][1])
+    return limits
+
+
+def classify(scope: Scope) -> Optional[str]:
+    """Return the route class of a request, or None if it is not limited.
+
+    Runs before routing, so it only looks at the method, path and query.
+    """
+    path = scope["path"]
+    if path.startswith(EXEMPT_PREFIXES):
+        return None
+    if scope["method"] not in ("GET", "HEAD"):
+        return "write"
+    if path.endswith(("/search", "/duplicates")) or _has_search(scope):
+        return "search"
+    if path.startswith("/api/"):
+        return "read"
+    return "ui"
+
+
+def _has_search(scope: Scope) -> bool:
+    """Whether the query has a ``search`` parameter; ``research=`` is not one."""
+    query = scope.get("query_string", b"")
+    return b"search" in query and any(
+        part.partition(b"=")[0] == b"search" for part in query.split(b"&")
+    )
+
+
+class AdmissionGate:
+    """Concurrency limit with a bounded FIFO wait queue for one route class.
+
+    ``acquire`` admits a request at once while fewer than ``limit`` are in
+    flight, queues it while fewer than ``queue_size`` are waiting, and refuses
+    it otherwise. A released slot is handed straight to the oldest waiter.
+    Meant to be used from a single event loop.
+    """
+
+    def __init__(self, limit: int, queue_size: int) -> None:
+        self.limit = limit
+        self.queue_size = queue_size
+        self.active = 0
+        self._waiters: Deque["asyncio.Future[None]"] = deque()
+
+    @property
+    def waiting(self) -> int:
+        """Number of requests waiting for a slot."""
+        return len(self._waiters)
+
+    async def acquire(self, timeout: Optional[float] = None) -> Optional[str]:
+        """Take a slot; return None on success or the reason it was refused."""
+        if self.active < self.limit and not self._waiters:
+            self.active += 1
+            return None
+        if len(self._waiters) >= self.queue_size:
+            return "queue_full"
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(waiter, timeout)
+        except BaseException as exc:
+            if waiter.done() and not waiter.cancelled():
+                # The slot was handed over just as we gave up; pass it on.
+                self.release()
+            elif waiter in self._waiters:
+                self._waiters.remove(waiter)
+            if isinstance(exc, asyncio.TimeoutError):
+                return "timeout"
+            raise
+        return None
+
+    def release(self) -> None:
+        """Free a slot, handing it to the oldest live waiter if there is one."""
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.active -= 1
+
+
+class AdmissionMiddleware:
+    """ASGI middleware that sheds load per route class once it is saturated.
+
+    Requests over a class's concurrency limit wait in a bounded queue; when
+    the queue is full, or a request waited ``queue_timeout`` seconds, it is
+    answered at once with 503 and ``Retry-After`` instead of adding latency
+    for everyone. Probes, metrics and debug routes are never limited.
+
+    Shedding happens before routing; a refused request is matched against
+    ``routes`` (the app's routes) so request metrics and captures label the
+    503 with its route template rather than as unmatched.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        limits: Optional[Dict[str, Tuple[int, int]]] = None,
+        queue_timeout: float = 5.0,
+        retry_after: int = 1,
+        registry: MetricsRegistry = REGISTRY,
+        routes: Sequence[BaseRoute] = (),
+    ) -> None:
+        self.app = app
+        self.routes = routes
+        self.gates = {
+            name: AdmissionGate(limit, queue)
+            for name, (limit, queue) in (limits or DEFAULT_LIMITS).items()
+        }
+        self.queue_timeout = queue_timeout if queue_timeout > 0 else None
+        self.retry_after = retry_after
+        self.shed = registry.counter(
+            "http_requests_shed_total",
+            "Requests refused by admission control, by route class and reason.",
+            ("class", "reason"),
+        )
+        registry.register_collector("admission", self._collect)
+
+    def _collect(self) -> List[Metric]:
+        """Report in-flight and queued requests per route class."""
+        in_flight = Gauge(
+            "admission_in_flight", "Admitted requests per route class.", ("class",)
+        )
+        queued = Gauge(
+            "admission_queued",
+            "Requests waiting for admission per route class.",
+            ("class",),
+        )
+        for name, gate in self.gates.items():
+            in_flight.set(name, value=gate.active)
+            queued.set(name, value=gate.waiting)
+        return [in_flight, queued]
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        route_class = classify(scope)
+        gate = self.gates.get(route_class) if route_class else None
+        if gate is None:
+            await self.app(scope, receive, send)
+            return
+
+        refused = await gate.acquire(self.queue_timeout)
+        if refused is not None:
+            self.shed.inc(route_class, refused)
+            self._route(scope)
+            await self._reject(send)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            gate.release()
+
+    def _route(self, scope: Scope) -> None:
+        """Store the route a refused request would have reached in its scope."""
+        for route in self.routes:
+            match, child_scope = route.matches(scope)
+            if match == Match.FULL:
+                scope["route"] = child_scope.get("route", route)
+                return
+
+    async def _reject(self, send: Send) -> None:
+        body = json.dumps({"detail": "Server is overloaded, retry later"}).encode()
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 503,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode()),
+                    (b"retry-after", str(self.retry_after).encode()),
+                ],
+            }
+        )
+        await send({"type": "http.response.body", "body": body})
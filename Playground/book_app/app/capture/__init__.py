@@ -0,0 +1,160 @@
+import base64
+import gzip
+import json
+import logging
+import time
+from pathlib import Path
+from typing import IO, Any, Dict, Iterator, List, Optional
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.warmup import WARMUP_SCOPE_KEY
+
+CAPTURE_FILE_ENV = "CAPTURE_FILE"
+CAPTURE_MAX_BODY_ENV = "CAPTURE_MAX_BODY"
+
+logger = logging.getLogger(__name__)
+
+# Request headers that change the response and are kept for replay, besides
+# the content type; anything that may carry credentials is left out.
+CAPTURED_HEADERS = (b"x-fragment", b"if-match")
+
+
+class TrafficRecorder:
+    """Append captured requests to a JSON Lines file (gzip if it ends in .gz).
+
+    Each line holds the offset from the start of the capture (``t``), the
+    method, raw path, query string, route template, content type, the
+    ``CAPTURED_HEADERS`` that were sent (``h``), body (base64, truncated to
+    ``max_body`` bytes), status and duration in seconds (``d``). Appending to
+    an existing capture continues its offsets after its last record. Lines are
+    flushed every ``flush_every`` records and on ``close()``.
+    """
+
+    def __init__(self, path: Path, max_body: int = 65536, flush_every: int = 100):
+        self.path = path
+        self.max_body = max_body
+        self.flush_every = flush_every
+        self.started = time.perf_counter() - _last_offset(path)
+        self.count = 0
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._file: IO[str] = (
+            gzip.open(path, "at", encoding="utf-8")
+            if path.suffix == ".gz"
+            else open(path, "a", encoding="utf-8")
+        )
+
+    def write(self, record: Dict[str, Any]) -> None:
+        """Append one request record."""
+        self._file.write(json.dumps(record, separators=(",", ":")) + "\n")
+        self.count += 1
+        if self.count % self.flush_every == 0:
+            self._file.flush()
+
+    def close(self) -> None:
+        """Flush and close the capture file."""
+        if not self._file.closed:
+            self._file.close()
+            logger.info("Captured %d request(s) to %s", self.count, self.path)
+
+
+def _last_offset(path: Path) -> float:
+    """Return the ``t`` of the last complete record in ``path``, 0 if none."""
+    if not path.exists():
+        return 0.0
+    last = 0.0
+    try:
+        for record in read_capture(path):
+            last = record["t"]
+    except (OSError, EOFError, ValueError, KeyError):
+        # A capture cut short (e.g. by a crash) ends in a partial line.
+        pass
+    return last
+
+
+def read_capture(path: Path) -> Iterator[Dict[str, Any]]:
+    """Yield the records of a capture file written by ``TrafficRecorder``."""
+    opener = gzip.open if path.suffix == ".gz" else open
+    with opener(path, "rt", encoding="utf-8") as f:  # type: ignore[operator]
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def decode_body(record: Dict[str, Any]) -> bytes:
+    """Return the captured request body of ``record``."""
+    return base64.b64decode(record["b"]) if record.get("b") else b""
+
+
+class CaptureMiddleware:
+    """ASGI middleware that records every HTTP request to a ``TrafficRecorder``.
+
+    Request bodies are collected as the app reads them, so nothing is buffered
+    twice. Only the content type and ``CAPTURED_HEADERS`` are kept, so
+    credentials never reach disk. Warm-up requests are not recorded.
+    """
+
+    def __init__(self, app: ASGIApp, recorder: TrafficRecorder) -> None:
+        self.app = app
+        self.recorder = recorder
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope.get(WARMUP_SCOPE_KEY):
+            await self.app(scope, receive, send)
+            return
+
+        body: List[bytes] = []
+        size = 0
+        status = 500
+        max_body = self.recorder.max_body
+
+        async def receive_wrapper() -> Message:
+            nonlocal size
+            message = await receive()
+            if message["type"] == "http.request" and size < max_body:
+                chunk = message.get("body", b"")[: max_body - size]
+                body.append(chunk)
+                size += len(chunk)
+            return message
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive_wrapper, send_wrapper)
+        finally:
+            end = time.perf_counter()
+            route = scope.get("route")
+            record: Dict[str, Any] = {
+                "t": round(start - self.recorder.started, 6),
+                "m": scope["method"],
+                "p": scope["path"],
+                "q": scope.get("query_string", b"").decode("latin-1"),
+                "r": route.path if route is not None else None,
+                "s": status,
+                "d": round(end - start, 6),
+            }
+            content_type = _header(scope, b"content-type")
+            if content_type:
+                record["ct"] = content_type
+            headers = {
+                key.decode("latin-1"): value.decode("latin-1")
+                for key, value in scope.get("headers", [])
+                if key in CAPTURED_HEADERS
+            }
+            if headers:
+                record["h"] = headers
+            if body:
+                record["b"] = base64.b64encode(b"".join(body)).decode("ascii")
+            self.recorder.write(record)
+
+
+def _header(scope: Scope, name: bytes) -> Optional[str]:
+    for key, value in scope.get("headers", []):
+        if key == name:
+            return value.decode("latin-1")
+    return None
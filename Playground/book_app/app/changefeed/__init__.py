@@ -0,0 +1,264 @@
+import asyncio
+import json
+import signal
+import threading
+from collections import deque
+from contextlib import suppress
+from types import FrameType
+from typing import (
+    Any,
+    AsyncIterator,
+    Callable,
+    Deque,
+    Dict,
+    List,
+    Optional,
+    Set,
+    Tuple,
+)
+
+from app.config import env_float, env_int
+from app.db import register_listener
+from app.metrics import REGISTRY, Gauge, Metric, MetricsRegistry
+from app.models import Book
+
+CHANGE_FEED_HISTORY_ENV = "CHANGE_FEED_HISTORY"
+CHANGE_FEED_BUFFER_ENV = "CHANGE_FEED_BUFFER"
+CHANGE_FEED_MAX_SUBSCRIBERS_ENV = "CHANGE_FEED_MAX_SUBSCRIBERS"
+CHANGE_FEED_HEARTBEAT_ENV = "CHANGE_FEED_HEARTBEAT"
+
+# Reconnect delay suggested to EventSource clients, in milliseconds.
+RETRY_MS = 1000
+
+
+class FeedFull(Exception):
+    """Raised when the change feed already has its maximum of subscribers."""
+
+
+def encode_event(version: int, operation: str, data: Dict[str, Any]) -> bytes:
+    """Encode one server-sent event whose id is the feed ``version``."""
+    payload = json.dumps({"version": version, **data}, separators=(",", ":"))
+    return f"id: {version}\nevent: {operation}\ndata: {payload}\n\n".encode()
+
+
+class Subscriber:
+    """One streaming client: a bounded buffer of encoded events.
+
+    Events are pushed from the client's event loop. A push to a full buffer
+    closes the subscriber instead of growing the buffer or blocking writers.
+    """
+
+    def __init__(self, buffer_size: int) -> None:
+        self.loop = asyncio.get_running_loop()
+        self.buffer_size = buffer_size
+        self.frames: Deque[bytes] = deque()
+        self.closed = False
+        self.overflowed = False
+        self._wake = asyncio.Event()
+
+    def push(self, frame: bytes) -> None:
+        """Buffer ``frame``, closing the subscriber if it has fallen behind."""
+        if self.closed:
+            return
+        if len(self.frames) >= self.buffer_size:
+            self.overflowed = True
+            self.close()
+            return
+        self.frames.append(frame)
+        self._wake.set()
+
+    def close(self) -> None:
+        """End the subscription; buffered events are discarded."""
+        self.closed = True
+        self.frames.clear()
+        self._wake.set()
+
+    async def next_frames(self, timeout: float) -> Optional[List[bytes]]:
+        """Wait up to ``timeout`` seconds for events.
+
+        Returns the buffered events (empty on timeout), or None once closed.
+        """
+        if not self.frames and not self.closed:
+            with suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(self._wake.wait(), timeout)
+        self._wake.clear()
+        if self.closed:
+            return None
+        frames = list(self.frames)
+        self.frames.clear()
+        return frames
+
+
+class ChangeFeed:
+    """Fan-out of store changes to streaming clients, with a replay history.
+
+    Each change is encoded once as a server-sent event, numbered by the feed's
+    own ``version``, kept in a bounded history and pushed to every subscriber. A
+    subscriber more than ``buffer_size`` events behind is disconnected; it can
+    reconnect and resume after the last version it saw while that version is
+    still in the history, and gets a single ``reset`` event otherwise.
+    """
+
+    def __init__(
+        self,
+        history_size: int = 1000,
+        buffer_size: int = 256,
+        max_subscribers: int = 1000,
+        heartbeat: float = 15.0,
+        registry: MetricsRegistry = REGISTRY,
+    ) -> None:
+        self.buffer_size = buffer_size
+        self.max_subscribers = max_subscribers
+        self.heartbeat = heartbeat
+        self.history: Deque[Tuple[int, bytes]] = deque(maxlen=history_size)
+        self.version = 0
+        self.subscribers: Set[Subscriber] = set()
+        self._lock = threading.Lock()
+        self.published = registry.counter(
+            "change_feed_events_total", "Store changes published to the change feed."
+        )
+        self.dropped = registry.counter(
+            "change_feed_dropped_total",
+            "Change feed subscribers disconnected for falling behind.",
+        )
+        registry.register_collector("change_feed", self._collect)
+
+    def _collect(self) -> List[Metric]:
+        """Report the number of connected subscribers."""
+        subscribers = Gauge(
+            "change_feed_subscribers", "Clients connected to the change feed."
+        )
+        subscribers.set(value=len(self.subscribers))
+        return [subscribers]
+
+    def publish(self, operation: str, book: Optional[Book]) -> None:
+        """Store change listener: record the change and send it to subscribers.
+
+        May be called from a worker thread; delivery is scheduled on each
+        subscriber's event loop.
+        """
+        data: Dict[str, Any] = {}
+        if operation == "delete" and book is not None:
+            data["id"] = book.id
+        elif book is not None:
+            data["book"] = book.model_dump(mode="json")
+        with self._lock:
+            self.version += 1
+            frame = encode_event(self.version, operation, data)
+            self.history.append((self.version, frame))
+            subscribers = list(self.subscribers)
+        self.published.inc()
+        for subscriber in subscribers:
+            with suppress(RuntimeError):  # the subscriber's loop has closed
+                subscriber.loop.call_soon_threadsafe(subscriber.push, frame)
+
+    def subscribe(self, since: Optional[int] = None) -> Tuple[Subscriber, List[bytes]]:
+        """Add a subscriber and return it with the events it missed.
+
+        ``since`` is the last version the client saw; None means it only
+        wants changes from now on. Raises ``FeedFull`` at the subscriber limit.
+        """
+        with self._lock:
+            if len(self.subscribers) >= self.max_subscribers:
+                raise FeedFull()
+            backlog: List[bytes] = []
+            if since is not None and since != self.version:
+                oldest = self.history[0][0] if self.history else self.version + 1
+                if since < self.version and oldest <= since + 1:
+                    backlog = [
+                        frame for version, frame in self.history if version > since
+                    ]
+                else:
+                    backlog = [encode_event(self.version, "reset", {})]
+            subscriber = Subscriber(self.buffer_size)
+            self.subscribers.add(subscriber)
+        return subscriber, backlog
+
+    def unsubscribe(self, subscriber: Subscriber) -> None:
+        """Remove ``subscriber``; safe to call more than once."""
+        with self._lock:
+            if subscriber not in self.subscribers:
+                return
+            self.subscribers.discard(subscriber)
+        subscriber.close()
+        if subscriber.overflowed:
+            self.dropped.inc()
+
+    async def stream(
+        self, subscriber: Subscriber, backlog: List[bytes]
+    ) -> AsyncIterator[bytes]:
+        """Yield the event stream of ``subscriber``, starting with ``backlog``.
+
+        A comment line is sent every ``heartbeat`` seconds without events so
+        proxies keep the connection open. The subscriber is removed when the
+        stream ends or the client goes away.
+        """
+        try:
+            yield f"retry: {RETRY_MS}\n\n".encode()
+            for frame in backlog:
+                yield frame
+            while True:
+                frames = await subscriber.next_frames(self.heartbeat)
+                if frames is None:
+                    return
+                if not frames:
+                    yield b": keep-alive\n\n"
+                for frame in frames:
+                    yield frame
+        finally:
+            self.unsubscribe(subscriber)
+
+    def disconnect_all(self) -> None:
+        """End every open stream, e.g. on shutdown; clients may reconnect."""
+        with self._lock:
+            subscribers = list(self.subscribers)
+        for subscriber in subscribers:
+            with suppress(RuntimeError):
+                subscriber.loop.call_soon_threadsafe(subscriber.close)
+
+
+def disconnect_on_exit_signals(feed: "ChangeFeed") -> Callable[[], None]:
+    """End ``feed``'s streams as soon as SIGINT or SIGTERM arrives.
+
+    Servers such as uvicorn wait for open connections to close before running
+    the lifespan shutdown, so streams must end when the signal arrives rather
+    than there. The current handlers still run afterwards; the returned
+    function restores them. Must be called from the running event loop, and
+    does nothing outside the main thread.
+
+    The handler interrupts the main thread between any two bytecodes, possibly
+    while it holds the feed's lock, so it only schedules ``disconnect_all`` on
+    the event loop instead of calling it.
+    """
+    if threading.current_thread() is not threading.main_thread():
+        return lambda: None
+    loop = asyncio.get_running_loop()
+    previous: Dict[int, Any] = {}
+
+    def handler(signum: int, frame: Optional[FrameType]) -> None:
+        with suppress(RuntimeError):  # the loop is already closed
+            loop.call_soon_threadsafe(feed.disconnect_all)
+        original = previous[signum]
+        if callable(original):
+            original(signum, frame)
+        else:
+            signal.signal(signum, original)
+            signal.raise_signal(signum)
+
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        previous[signum] = signal.signal(signum, handler)
+
+    def restore() -> None:
+        for signum, original in previous.items():
+            signal.signal(signum, original)
+
+    return restore
+
+
+feed = ChangeFeed(
+    history_size=env_int(CHANGE_FEED_HISTORY_ENV, 1000),
+    buffer_size=env_int(CHANGE_FEED_BUFFER_ENV, 256),
+    max_subscribers=env_int(CHANGE_FEED_MAX_SUBSCRIBERS_ENV, 1000),
+    heartbeat=env_float(CHANGE_FEED_HEARTBEAT_ENV, 15.0),
+)
+register_listener("change_feed", feed.publish)
@@ -0,0 +1,117 @@
+import asyncio
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.db import get_store_version
+from app.metrics import REGISTRY, MetricsRegistry
+
+REQUEST_COALESCING_ENV = "REQUEST_COALESCING"
+
+# Read endpoints whose responses depend only on the URL and the store contents.
+COALESCED_PREFIXES = ("/api/books", "/books", "/admin")
+
+# Streaming endpoints under those prefixes; their responses never complete.
+UNCOALESCED_PATHS = ("/api/books/events",)
+
+# Request headers that can change a response; they are part of the key.
+VARY_HEADERS = (b"accept", b"accept-encoding", b"x-fragment")
+
+# What routing adds to a request's scope; copied from the leader onto its
+# followers, which never reach the router, so that metrics and captures
+# label them with the route template too.
+ROUTING_SCOPE_KEYS = ("route", "endpoint", "path_params")
+
+
+def coalescing_key(scope: Scope) -> Optional[Hashable]:
+    """Return the key identical requests share, or None if not coalesced.
+
+    The key is the path, query string, the request headers in
+    ``VARY_HEADERS`` and the store version, so a request that arrives after a
+    write never receives a response computed before it.
+    """
+    if scope["method"] != "GET":
+        return None
+    path = scope["path"]
+    if path != "/" and not path.startswith(COALESCED_PREFIXES):
+        return None
+    if path in UNCOALESCED_PATHS:
+        return None
+    headers = tuple(
+        (name, value) for name, value in scope["headers"] if name in VARY_HEADERS
+    )
+    return (path, scope["query_string"], headers, get_store_version())
+
+
+class _Flight:
+    """The in-progress computation that identical requests wait for."""
+
+    def __init__(self) -> None:
+        self.loop = asyncio.get_running_loop()
+        self.done = self.loop.create_future()
+        self.messages: List[Message] = []
+        self.routing: Dict[str, Any] = {}
+
+
+class CoalescingMiddleware:
+    """ASGI middleware that shares one computation among identical reads.
+
+    The first request for a key (the leader) runs normally while its response
+    messages are recorded. Identical requests arriving before it finishes
+    wait and are answered with a copy of that response instead of repeating
+    the scan, serialization and rendering. If the leader fails, each waiting
+    request runs on its own.
+    """
+
+    def __init__(self, app: ASGIApp, registry: MetricsRegistry = REGISTRY) -> None:
+        self.app = app
+        self.flights: Dict[Hashable, _Flight] = {}
+        self.coalesced = registry.counter(
+            "http_requests_coalesced_total",
+            "Read requests answered with the response of an identical request.",
+        )
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        key = coalescing_key(scope)
+        if key is None:
+            await self.app(scope, receive, send)
+            return
+
+        flight = self.flights.get(key)
+        if flight is not None and flight.loop is asyncio.get_running_loop():
+            messages = await asyncio.shield(flight.done)
+            if messages is not None:
+                self.coalesced.inc()
+                scope.update(flight.routing)
+                for message in messages:
+                    await send(message)
+                return
+            await self.app(scope, receive, send)
+            return
+
+        await self._lead(key, scope, receive, send)
+
+    async def _lead(
+        self, key: Hashable, scope: Scope, receive: Receive, send: Send
+    ) -> None:
+        flight = _Flight()
+        self.flights[key] = flight
+        result: Optional[Tuple[Message, ...]] = None
+
+        async def send_wrapper(message: Message) -> None:
+            flight.messages.append(message)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+            result = tuple(flight.messages)
+            flight.routing = {
+                name: scope[name] for name in ROUTING_SCOPE_KEYS if name in scope
+            }
+        finally:
+            if self.flights.get(key) is flight:
+                del self.flights[key]
+            flight.done.set_result(result)
@@ -0,0 +1,26 @@
+import os
+
+
+def env_flag(name: str, default: bool) -> bool:
+    """Read a boolean flag such as ``METRICS_ENABLED=0`` from the environment."""
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    return value.strip().lower() not in ("0", "false", "no", "off", "")
+
+
+def env_int(name: str, default: int) -> int:
+    """Read an integer setting from the environment."""
+    value = os.environ.get(name)
+    return default if value is None or not value.strip() else int(value)
+
+
+def env_float(name: str, default: float) -> float:
+    """Read a float setting from the environment."""
+    value = os.environ.get(name)
+    return default if value is None or not value.strip() else float(value)
+
+
+def env_str(name: str, default: str) -> str:
+    """Read a string setting from the environment, stripped of whitespace."""
+    return os.environ.get(name, default).strip()
@@ -1,8 +1,32 @@
 import asyncio
 import copy
-from typing import List, Optional
+import threading
+from time import perf_counter
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Union
 
-from app.models import Book
+from app.config import env_float, env_int, env_str
+from app.db.cache import LRUCache
+from app.db.duplicates import DuplicateIndex
+from app.db.changelog import ChangeLog
+from app.db.instrumentation import db_stats, instrumented, instrumented_counted
+from app.db.prefix_index import PrefixIndex
+from app.db.search_index import SearchIndex
+from app.db.shards import ShardedBooks
+from app.db.snapshot import Snapshot, SnapshotBooks, write_snapshot
+from app.db.stats import CatalogCounters
+from app.db.sort_index import SortIndex, SortSpec, parse_sort, sort_books
+from app.metrics import REGISTRY, Metric
+from app.models import Book, BookChanges, BookStats, DuplicateCluster
+
+SEARCH_CACHE_SIZE_ENV = "SEARCH_CACHE_SIZE"
+SEARCH_CACHE_TTL_ENV = "SEARCH_CACHE_TTL"
+SEARCH_CACHE_ROWS_ENV = "SEARCH_CACHE_ROWS"
+CHANGE_LOG_RETENTION_ENV = "CHANGE_LOG_RETENTION"
+SORT_INDEXES_ENV = "SORT_INDEXES"
+DUPLICATE_THRESHOLD_ENV = "DUPLICATE_THRESHOLD"
+BOOK_SNAPSHOT_ENV = "BOOK_SNAPSHOT"
+BOOK_SNAPSHOT_CACHE_ENV = "BOOK_SNAPSHOT_CACHE"
+STORE_SHARDS_ENV = "STORE_SHARDS"
 
 
 def _create_default_books() -> List[Book]:
@@ -214,84 +238,773 @@ def _create_default_books() -> List[Book]:
     ]
 
 
-BOOKS: List[Book] = _create_default_books()
+# The default catalog is built on first use rather than at import, so workers
+# and tools that never touch the store do not pay for it. With a snapshot
+# (``BOOK_SNAPSHOT`` or ``load_snapshot``) BOOKS is a SnapshotBooks, and with
+# ``STORE_SHARDS`` a ShardedBooks, instead of this list.
+BookStore = Union[List[Book], SnapshotBooks, ShardedBooks]
+_book_list: List[Book] = []
+BOOKS: BookStore = _book_list
 book_id_iterator: int = 100
 lock = asyncio.Lock()
+_seeded = False
+
+# Bumped by every write; readers use it to tell whether derived data is stale.
+store_version: int = 0
+# Held to bump store_version and log the change, so that writers under
+# different book locks log changes in version order.
+_version_lock = threading.Lock()
+
+# Called after each write with the operation ("create", "update", "delete" or
+# "reset") and the book involved (None for "reset").
+ChangeListener = Callable[[str, Optional[Book]], None]
+_listeners: Dict[str, ChangeListener] = {}
+
+
+def register_listener(name: str, listener: ChangeListener) -> None:
+    """Register (or replace) the change listener called ``name``."""
+    _listeners[name] = listener
+
+
+def get_store_version() -> int:
+    """Return the current store version."""
+    return store_version
+
+
+# Results of search_books by lower-cased query and store version; a write
+# changes the version, so older entries are never served and age out. The
+# cached results hold at most SEARCH_CACHE_ROWS books between them, so a few
+# broad queries on a large catalog cannot pin most of it.
+search_cache: LRUCache[List[Book]] = LRUCache(
+    capacity=env_int(SEARCH_CACHE_SIZE_ENV, 256),
+    ttl=env_float(SEARCH_CACHE_TTL_ENV, 300.0),
+    max_weight=env_int(SEARCH_CACHE_ROWS_ENV, 50_000),
+    weigh=len,
+)
+REGISTRY.register_collector(
+    "search_cache", lambda: search_cache.metrics("search_cache")
+)
+
+
+# Latest change per book id, for delta sync; see get_changes_since.
+change_log = ChangeLog()
+CHANGE_LOG_RETENTION = env_float(CHANGE_LOG_RETENTION_ENV, 86400.0)
+REGISTRY.register_collector("change_log", lambda: change_log.metrics("change_log"))
+
+# Counts behind get_stats and get_categories, adjusted by each write.
+catalog_counters = CatalogCounters()
+REGISTRY.register_collector("catalog", lambda: catalog_counters.metrics("catalog"))
+
+
+def _changed(operation: str, book: Optional[Book]) -> None:
+    global store_version
+    with _version_lock:
+        store_version += 1
+        if book is None:
+            change_log.clear(store_version)
+        else:
+            change_log.record(
+                store_version, book.id, None if operation == "delete" else book
+            )
+    for listener in list(_listeners.values()):
+        listener(operation, book)
+
+
+# Writers to a book hold the lock of its stripe, so updates to different books
+# do not wait for each other. Deletes shift list positions and take them all,
+# but only to re-check and remove a book they found beforehand.
+BOOK_LOCK_STRIPES = 64
+_stripes = [threading.Lock() for _ in range(BOOK_LOCK_STRIPES)]
+
+
+def _stripe(book_id: int) -> threading.Lock:
+    return _stripes[book_id % BOOK_LOCK_STRIPES]
+
+
+class _AllStripes:
+    """Context manager holding every stripe lock, always in the same order.
+
+    With a sharded store the shard locks are taken too, so no book changes.
+    """
+
+    def __enter__(self) -> None:
+        books = BOOKS
+        self._locks = _stripes + (
+            [shard.lock for shard in books.shards]
+            if isinstance(books, ShardedBooks)
+            else []
+        )
+        for held in self._locks:
+            held.acquire()
+
+    def __exit__(self, *exc_info: Any) -> None:
+        for held in reversed(self._locks):
+            held.release()
+
+
+def _write_lock(book_id: int) -> threading.Lock:
+    """The lock held to replace a book: its shard's, or its stripe."""
+    books = BOOKS
+    if isinstance(books, ShardedBooks):
+        return books.lock_for(book_id)
+    return _stripe(book_id)
+
+
+def _ensure_seeded() -> None:
+    """Load the default books (or ``BOOK_SNAPSHOT``) when the store is first used."""
+    global _seeded
+    if not _seeded:
+        path = env_str(BOOK_SNAPSHOT_ENV, "")
+        if path:
+            load_snapshot(path)
+            return
+        _seeded = True
+        _empty_books()
+        BOOKS.extend(_create_default_books())
+        catalog_counters.rebuild(BOOKS)
+
+
+def _close_books() -> None:
+    """Release what BOOKS holds besides books: a mapped file or shard threads."""
+    if not isinstance(BOOKS, list):
+        BOOKS.close()
+
+
+def _empty_books() -> None:
+    """Point BOOKS at an empty store: ``STORE_SHARDS`` shards, or the list."""
+    global BOOKS
+    _close_books()
+    shard_count = env_int(STORE_SHARDS_ENV, 0)
+    if shard_count > 0:
+        BOOKS = ShardedBooks(shard_count, sort_indexes)
+    else:
+        BOOKS = _book_list
+        BOOKS.clear()
 
 
 def reset_books() -> None:
     """Reset the in-memory database to its initial state. Used for testing."""
-    global BOOKS, book_id_iterator
-    BOOKS.clear()
-    BOOKS.extend(copy.deepcopy(_create_default_books()))
-    book_id_iterator = 100
+    global BOOKS, book_id_iterator, _seeded
+    with _AllStripes():
+        _empty_books()
+        BOOKS.extend(copy.deepcopy(_create_default_books()))
+        book_id_iterator = 100
+        _seeded = True
+        catalog_counters.rebuild(BOOKS)
+        _changed("reset", None)
+
+
+def load_books(books: Iterable[Book]) -> None:
+    """Replace the database contents with ``books``. Used for benchmarks.
+
+    The id allocator continues after the highest loaded id (at least 100).
+    """
+    global book_id_iterator, _seeded
+    with _AllStripes():
+        _empty_books()
+        BOOKS.extend(books)
+        _seeded = True
+        book_id_iterator = max(100, max((book.id for book in BOOKS), default=0))
+        catalog_counters.rebuild(BOOKS)
+        _changed("reset", None)
+
+
+def load_snapshot(path: str) -> None:
+    """Serve the books in the snapshot file at ``path``, replacing the contents.
+
+    Only the file header is read: books are decoded when used, the last
+    ``BOOK_SNAPSHOT_CACHE`` of them read by index or id are kept, and the
+    counters behind ``get_stats`` come precomputed from the file. Later
+    writes are kept in memory on top of the snapshot. The id allocator
+    continues after the highest id in the file (at least 100).
+    """
+    global BOOKS, book_id_iterator, _seeded
+    snapshot = Snapshot(path)
+    with _AllStripes():
+        _close_books()
+        _book_list.clear()
+        BOOKS = SnapshotBooks(snapshot, env_int(BOOK_SNAPSHOT_CACHE_ENV, 10_000))
+        _seeded = True
+        book_id_iterator = max(100, snapshot.max_id)
+        catalog_counters.restore(len(snapshot), *snapshot.counts())
+        _changed("reset", None)
+
+
+def snapshot_loaded() -> bool:
+    """Whether the books are served from a snapshot file."""
+    return isinstance(BOOKS, SnapshotBooks)
+
+
+def save_snapshot(path: str) -> int:
+    """Write the current books to a snapshot file at ``path``; return its size.
+
+    Writes are held off while the books are written.
+    """
+    _ensure_seeded()
+    with _AllStripes():
+        books = BOOKS
+        if isinstance(books, ShardedBooks):
+            return write_snapshot(path, books.iter_locked())
+        return write_snapshot(path, books)
+
+
+def _snapshot_metrics() -> List[Metric]:
+    books = BOOKS
+    return books.metrics("book_snapshot") if isinstance(books, SnapshotBooks) else []
+
+
+def _shard_metrics() -> List[Metric]:
+    books = BOOKS
+    return books.metrics("store_shard") if isinstance(books, ShardedBooks) else []
+
+
+REGISTRY.register_collector("book_snapshot", _snapshot_metrics)
+REGISTRY.register_collector("store_shards", _shard_metrics)
 
 
 async def increment_book_id() -> int:
     """Atomically increment and return the next available book ID."""
     global book_id_iterator
+    if not db_stats.enabled:
+        async with lock:
+            book_id_iterator += 1
+            return book_id_iterator
+
+    start = perf_counter()
     async with lock:
+        db_stats.record_lock_wait(perf_counter() - start)
         book_id_iterator += 1
         return book_id_iterator
 
 
-def get_all_books(category: Optional[str] = None) -> List[Book]:
-    """Retrieve all books, optionally filtered by category (case-insensitive)."""
-    if category is None:
-        return BOOKS.copy()
-    return [book for book in BOOKS if book.category.casefold() == category.casefold()]
+# Ranked search index, built on first use (or by the warm-up) and then kept
+# up to date by the listener below.
+search_index = SearchIndex()
+_index_built = False
+
+
+def _update_search_index(operation: str, book: Optional[Book]) -> None:
+    global _index_built
+    if operation == "reset":
+        _index_built = False
+        search_index.rebuild(())
+    elif not _index_built or book is None:
+        return
+    elif operation == "delete":
+        search_index.remove(book.id)
+    else:
+        search_index.add(book)
+
+
+register_listener("search_index", _update_search_index)
+
+
+def build_search_index() -> None:
+    """Build the ranked search index now rather than on the first search."""
+    global _index_built
+    _ensure_seeded()
+    if not _index_built:
+        search_index.rebuild(BOOKS)
+        _index_built = True
+
+
+# Title/author prefix index for suggestions, maintained the same way.
+prefix_index = PrefixIndex()
+_prefix_index_built = False
+
+
+def _update_prefix_index(operation: str, book: Optional[Book]) -> None:
+    global _prefix_index_built
+    if operation == "reset":
+        _prefix_index_built = False
+        prefix_index.rebuild(())
+    elif not _prefix_index_built or book is None:
+        return
+    elif operation == "delete":
+        prefix_index.remove(book.id)
+    else:
+        prefix_index.add(book)
+
+
+register_listener("prefix_index", _update_prefix_index)
+
+
+def build_prefix_index() -> None:
+    """Build the suggestion prefix index now rather than on the first lookup."""
+    global _prefix_index_built
+    _ensure_seeded()
+    if not _prefix_index_built:
+        prefix_index.rebuild(BOOKS)
+        _prefix_index_built = True
+
+
+# Sort orders served from maintained indexes (semicolon-separated); other
+# orders are sorted per request. Built on first use, then kept up to date.
+sort_indexes: Dict[SortSpec, SortIndex] = {
+    spec: SortIndex(spec)
+    for spec in (
+        parse_sort(text)
+        for text in env_str(SORT_INDEXES_ENV, "title;author;-updated_at").split(";")
+        if text.strip()
+    )
+}
+_sort_indexes_built = False
+
+
+def _update_sort_indexes(operation: str, book: Optional[Book]) -> None:
+    global _sort_indexes_built
+    if operation == "reset":
+        _sort_indexes_built = False
+        for index in sort_indexes.values():
+            index.rebuild(())
+    elif not _sort_indexes_built or book is None:
+        return
+    elif operation == "delete":
+        for index in sort_indexes.values():
+            index.remove(book.id)
+    else:
+        for index in sort_indexes.values():
+            index.add(book)
+
 
+register_listener("sort_indexes", _update_sort_indexes)
 
+
+def build_sort_indexes() -> None:
+    """Build the maintained sort indexes now rather than on the first sorted read."""
+    global _sort_indexes_built
+    _ensure_seeded()
+    books = BOOKS
+    if isinstance(books, ShardedBooks):
+        # Each shard keeps its own.
+        books.build_sort_indexes()
+        return
+    if not _sort_indexes_built:
+        for index in sort_indexes.values():
+            index.rebuild(BOOKS)
+        _sort_indexes_built = True
+
+
+# Near-duplicate detector, built on the first duplicate check or scan (not
+# by the warm-up: it is opt-in) and then maintained like the other indexes.
+duplicate_index = DuplicateIndex(threshold=env_float(DUPLICATE_THRESHOLD_ENV, 0.75))
+_duplicate_index_built = False
+
+
+def _update_duplicate_index(operation: str, book: Optional[Book]) -> None:
+    global _duplicate_index_built
+    if operation == "reset":
+        _duplicate_index_built = False
+        duplicate_index.rebuild(())
+    elif not _duplicate_index_built or book is None:
+        return
+    elif operation == "delete":
+        duplicate_index.remove(book.id)
+    else:
+        duplicate_index.add(book)
+
+
+register_listener("duplicate_index", _update_duplicate_index)
+
+
+def build_duplicate_index() -> None:
+    """Build the near-duplicate index now rather than on the first check."""
+    global _duplicate_index_built
+    _ensure_seeded()
+    if not _duplicate_index_built:
+        duplicate_index.rebuild(BOOKS)
+        _duplicate_index_built = True
+
+
+def index_built(name: str) -> bool:
+    """Whether the ``search``, ``prefix``, ``sort`` or ``duplicate`` index is built.
+
+    A read that needs an unbuilt index builds it first, in time linear in the
+    catalog size; routes check this to run such a read off the event loop.
+    """
+    if name == "sort" and isinstance(BOOKS, ShardedBooks):
+        return all(shard.sorted_built for shard in BOOKS.shards)
+    return {
+        "search": _index_built,
+        "prefix": _prefix_index_built,
+        "sort": _sort_indexes_built,
+        "duplicate": _duplicate_index_built,
+    }[name]
+
+
+@instrumented_counted
+def get_all_books(
+    category: Optional[str] = None,
+    sort: Optional[str] = None,
+    offset: int = 0,
+    limit: Optional[int] = None,
+) -> Tuple[List[Book], int]:
+    """Retrieve books, optionally filtered by category (case-insensitive).
+
+    ``sort`` is a comma-separated list of fields, each optionally prefixed
+    with ``-`` for descending order (e.g. ``"-updated_at,title"``); ties go
+    to the lower id and unsorted books keep insertion order. Orders listed in
+    ``SORT_INDEXES`` are read from a maintained index, so a page costs about
+    ``offset + limit`` rather than a sort of the catalog. ``offset`` and
+    ``limit`` select a page of the result; a filtered page in insertion
+    order stops scanning once it is full.
+    """
+    _ensure_seeded()
+    folded = None if category is None else category.casefold()
+    where = (
+        None if folded is None else (lambda book: book.category.casefold() == folded)
+    )
+    spec = None if sort is None else parse_sort(sort)
+    books = BOOKS
+    if isinstance(books, ShardedBooks):
+        return books.page(category, spec, offset, limit)
+    index = None if spec is None else sort_indexes.get(spec)
+    if index is not None:
+        build_sort_indexes()
+        return index.page(offset, limit, where)
+    if spec is None and where is not None and limit is not None:
+        # Insertion order: stop at the end of the page.
+        end = offset + limit
+        scanned = 0
+        matches = []
+        for book in books:
+            scanned += 1
+            if where(book):
+                matches.append(book)
+                if len(matches) == end:
+                    break
+        return matches[offset:], scanned
+    scanned = len(books)
+    if where is not None:
+        books = [book for book in books if where(book)]
+    if spec is not None:
+        books = sort_books(books, spec)
+    return books[offset : None if limit is None else offset + limit], scanned
+
+
+@instrumented()
 def get_categories() -> List[str]:
-    """Get all unique categories from the database."""
-    return sorted(set(book.category for book in BOOKS))
+    """Get all unique categories from the database, from the catalog counters."""
+    _ensure_seeded()
+    return sorted(catalog_counters.category_counts())
+
 
+@instrumented()
+def count_books(category: Optional[str] = None) -> int:
+    """Count books, optionally in one category (case-insensitive).
 
-def search_books(query: str) -> List[Book]:
-    """Search books by title or author (case-insensitive)."""
+    Read from the catalog counters, like ``get_stats``.
+    """
+    _ensure_seeded()
+    if category is None:
+        return catalog_counters.total
+    folded = category.casefold()
+    return sum(
+        count
+        for name, count in catalog_counters.category_counts().items()
+        if name.casefold() == folded
+    )
+
+
+@instrumented()
+def get_stats() -> BookStats:
+    """Return book counts per category and author and the latest change time.
+
+    Read from counters that every write adjusts, so no book is examined.
+    """
+    _ensure_seeded()
+    version = store_version
+    total, categories, authors, last_updated_at = catalog_counters.snapshot()
+    return BookStats(
+        version=version,
+        total=total,
+        categories=categories,
+        authors=authors,
+        last_updated_at=last_updated_at,
+    )
+
+
+@instrumented_counted
+def search_books(query: str) -> Tuple[List[Book], int]:
+    """Search books by title or author (case-insensitive).
+
+    Results are memoized in ``search_cache``, so repeating a query costs a
+    dictionary lookup and a copy of the matches instead of a full scan.
+    """
+    _ensure_seeded()
     query_lower = query.lower()
+    key = (query_lower, store_version)
+    cached = search_cache.get(key)
+    if cached is not None:
+        return cached.copy(), 0
+    books = BOOKS
+    if isinstance(books, ShardedBooks):
+        results = books.search(query_lower)
+    else:
+        results = [
+            book
+            for book in books
+            if query_lower in book.title.lower() or query_lower in book.author.lower()
+        ]
+    search_cache.put(key, results)
+    return results.copy(), len(books)
+
+
+@instrumented_counted
+def search_books_ranked(
+    query: str, limit: Optional[int] = 10, category: Optional[str] = None
+) -> Tuple[List[Tuple[Book, float]], int]:
+    """Rank books against the words of ``query`` with BM25; best ``limit`` first.
+
+    Unlike ``search_books`` this matches whole words (case-insensitive) in the
+    title or author; a hit must contain every query word, and only books
+    containing the rarest of them are examined. ``limit=None`` returns every
+    hit; ``category`` (case-insensitive) keeps only hits in that category.
+    """
+    build_search_index()
+    return search_index.search(query, limit, _in_category(category))
+
+
+@instrumented_counted
+def count_search_hits(query: str, category: Optional[str] = None) -> Tuple[int, int]:
+    """Count the hits ``search_books_ranked`` has for ``query``, unranked.
+
+    Lets a page rank only its first ``offset + limit`` hits with the bounded
+    heap and still report how many there are in all.
+    """
+    build_search_index()
+    return search_index.count(query, _in_category(category))
+
+
+def _in_category(category: Optional[str]) -> Optional[Callable[[Book], bool]]:
+    """A filter keeping books in ``category`` (case-insensitive); None keeps all."""
+    if category is None:
+        return None
+    folded = category.casefold()
+    return lambda book: book.category.casefold() == folded
+
+
+@instrumented(scanned=lambda result, *args: len(result))
+def suggest_books(prefix: str, limit: int = 10) -> List[Tuple[str, str, int]]:
+    """Titles and authors starting with ``prefix``, as ``(text, kind, books)``.
+
+    Matching is case-insensitive like ``get_book_by_title``. The ``limit``
+    suggestions with the most books are returned, most first, and ties in
+    alphabetical order.
+    """
+    build_prefix_index()
+    return prefix_index.suggest(prefix, limit)
+
+
+@instrumented_counted
+def find_duplicates(title: str, author: str) -> Tuple[List[Tuple[Book, float]], int]:
+    """Books that look like duplicates of ``title`` by ``author``, best first.
+
+    Returns ``(book, similarity)`` pairs. Only books sharing a normalized key
+    or a MinHash band with the probe are compared.
+    """
+    build_duplicate_index()
+    return duplicate_index.matches(title, author)
+
+
+@instrumented_counted
+def find_duplicate_clusters() -> Tuple[List[DuplicateCluster], int]:
+    """Group the whole catalog into candidate duplicate clusters, largest first.
+
+    Work grows linearly with the catalog: books are only compared with the
+    first book of each bucket they share.
+    """
+    build_duplicate_index()
+    clusters, compared = duplicate_index.clusters()
     return [
-        book
-        for book in BOOKS
-        if query_lower in book.title.lower() or query_lower in book.author.lower()
-    ]
+        DuplicateCluster(books=books, exact=exact, similarity=round(score, 4))
+        for books, exact, score in clusters
+    ], compared
+
+
+def _changes_scanned(result: BookChanges, since: int) -> int:
+    """Rows examined by ``get_changes_since``: the catalog only on a reset."""
+    return len(result.books) + len(result.deleted)
+
+
+@instrumented(scanned=_changes_scanned)
+def get_changes_since(since: int) -> BookChanges:
+    """Return the books created or updated and ids deleted after ``since``.
+
+    Served from the change log, so the cost depends on the number of changes.
+    When ``since`` is 0, ahead of the store (e.g. from before a restart) or
+    older than the compacted log, the whole catalog is returned with
+    ``reset`` set instead.
+    """
+    _ensure_seeded()
+    with _version_lock:
+        version = store_version
+        delta = change_log.since(since) if 0 < since <= version else None
+    if delta is None:
+        return BookChanges(version=version, reset=True, books=list(BOOKS), deleted=[])
+    books, deleted = delta
+    return BookChanges(version=version, reset=False, books=books, deleted=deleted)
+
+
+def compact_change_log() -> int:
+    """Drop tombstones older than ``CHANGE_LOG_RETENTION``; return how many."""
+    return change_log.compact(CHANGE_LOG_RETENTION)
+
 
+async def compact_change_log_every(interval: float) -> None:
+    """Compact the change log every ``interval`` seconds, until cancelled."""
+    while True:
+        await asyncio.sleep(interval)
+        compact_change_log()
 
-def get_book_by_title(title: str) -> Optional[Book]:
+
+@instrumented_counted
+def get_book_by_title(title: str) -> Tuple[Optional[Book], int]:
     """Find a book by its title (case-insensitive)."""
+    _ensure_seeded()
+    folded = title.casefold()
+    scanned = 0
     for book in BOOKS:
-        if book.title.casefold() == title.casefold():
-            return book
-    return None
+        scanned += 1
+        if book.title.casefold() == folded:
+            return book, scanned
+    return None, scanned
 
 
-def get_book_by_id(book_id: int) -> Optional[Book]:
-    """Find a book by its unique ID."""
-    for book in BOOKS:
+def _find(book_id: int) -> Tuple[Optional[Tuple[int, Book]], int]:
+    """Return the list position and the book with ``book_id`` (or None).
+
+    A snapshot is searched through its id index, a list by scanning. Shards
+    look the id up in its shard, and address books by id rather than position.
+    Also returns how many books were examined.
+    """
+    books = BOOKS
+    if isinstance(books, (SnapshotBooks, ShardedBooks)):
+        return books.find(book_id), 1
+    for i, book in enumerate(books):
         if book.id == book_id:
-            return book
-    return None
+            return (i, book), i + 1
+    return None, len(books)
 
 
+@instrumented_counted
+def get_book_by_id(book_id: int) -> Tuple[Optional[Book], int]:
+    """Find a book by its unique ID."""
+    _ensure_seeded()
+    found, scanned = _find(book_id)
+    return None if found is None else found[1], scanned
+
+
+@instrumented()
 def create_book(book: Book) -> Book:
     """Add a new book to the database."""
-    BOOKS.append(book)
+    _ensure_seeded()
+    books = BOOKS
+    if isinstance(books, ShardedBooks):
+        # Takes the lock of the book's shard.
+        books.append(book)
+    else:
+        # Deletes hold every stripe, so a delete never rewrites a snapshot's
+        # overlay while the book is appended to it.
+        with _stripe(book.id):
+            books.append(book)
+    catalog_counters.add(book)
+    _changed("create", book)
     return book
 
 
-def update_book(book_id: int, book: Book) -> bool:
-    """Update an existing book by ID. Returns True if successful."""
-    for i, existing_book in enumerate(BOOKS):
-        if existing_book.id == book_id:
-            BOOKS[i] = book
-            return True
-    return False
+@instrumented_counted
+def update_book(book_id: int, book: Book) -> Tuple[bool, int]:
+    """Update an existing book by ID. Returns True if successful.
 
+    The stored ``book`` gets the next version of the book it replaces.
+    """
+    _ensure_seeded()
+    with _write_lock(book_id):
+        found, scanned = _find(book_id)
+        if found is None:
+            return False, scanned
+        i, existing_book = found
+        book.version = existing_book.version + 1
+        BOOKS[i] = book
+        catalog_counters.replace(existing_book, book)
+        _changed("update", book)
+        return True, scanned
 
-def delete_book(book_id: int) -> bool:
-    """Delete a book by ID. Returns True if the book was found and deleted."""
-    for i, book in enumerate(BOOKS):
-        if book.id == book_id:
-            BOOKS.pop(i)
-            return True
-    return False
+
+@instrumented_counted
+def compare_and_swap_book(
+    book_id: int, expected_version: int, book: Book
+) -> Tuple[bool, int]:
+    """Replace book ``book_id`` with ``book`` if its version is ``expected_version``.
+
+    ``book`` is stored with version ``expected_version + 1``. Returns False,
+    changing nothing, if the book is missing or was changed in the meantime;
+    the caller then re-reads it and decides whether to retry. Only the lock
+    of the book's stripe (or shard) is held, so swaps of other books proceed
+    in parallel.
+    """
+    _ensure_seeded()
+    with _write_lock(book_id):
+        found, scanned = _find(book_id)
+        if found is None or found[1].version != expected_version:
+            return False, scanned
+        i, existing_book = found
+        book.version = expected_version + 1
+        BOOKS[i] = book
+        catalog_counters.replace(existing_book, book)
+        _changed("update", book)
+        return True, scanned
+
+
+@instrumented_counted
+def delete_book(
+    book_id: int, expected_version: Optional[int] = None
+) -> Tuple[bool, int]:
+    """Delete a book by ID. Returns True if the book was found and deleted.
+
+    With ``expected_version``, the book is only deleted at that version. A
+    sharded store holds the book's shard lock. Other stores hold every stripe
+    lock, as removing a book moves the ones after it, but the scan for the
+    book runs before taking them: under the locks, its position (or, if it
+    was not found, the store version) is re-checked in constant time, and the
+    book is scanned for again only if a delete may have moved it.
+    """
+    _ensure_seeded()
+    books = BOOKS
+    if isinstance(books, ShardedBooks):
+        with books.lock_for(book_id):
+            found, scanned = _find(book_id)
+            return _delete_found(found, expected_version), scanned
+    version = store_version
+    found, scanned = _find(book_id)
+    with _AllStripes():
+        if (store_version != version) if found is None else not _still_at(*found):
+            found, rescanned = _find(book_id)
+            scanned += rescanned
+        return _delete_found(found, expected_version), scanned
+
+
+def _still_at(index: int, book: Book) -> bool:
+    """Whether ``book`` is still stored at list position ``index``."""
+    books = BOOKS
+    return (
+        not isinstance(books, ShardedBooks)
+        and index < len(books)
+        and books[index] is book
+    )
+
+
+def _delete_found(
+    found: Optional[Tuple[int, Book]], expected_version: Optional[int]
+) -> bool:
+    """Remove the book ``_find`` returned; the caller holds the delete locks."""
+    if found is None:
+        return False
+    i, book = found
+    if expected_version is not None and book.version != expected_version:
+        return False
+    del BOOKS[i]
+    catalog_counters.remove(book)
+    _changed("delete", book)
+    return True
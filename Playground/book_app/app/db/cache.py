@@ -0,0 +1,110 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Generic, Hashable, List, Optional, Tuple, TypeVar
+
+from app.metrics import Counter, Gauge, Metric
+
+V = TypeVar("V")
+
+
+class LRUCache(Generic[V]):
+    """Bounded least-recently-used cache with an optional time to live.
+
+    Holds at most ``capacity`` entries (0 disables caching); entries older
+    than ``ttl`` seconds (0 = never) are treated as misses and dropped.
+    With ``max_weight``, the entries' total ``weigh(value)`` (e.g. the rows
+    of a cached result) is kept within it too, and a value weighing more on
+    its own is not cached. Hits, misses, evictions and expirations are
+    counted.
+    """
+
+    def __init__(
+        self,
+        capacity: int,
+        ttl: float = 0.0,
+        clock: Callable[[], float] = time.monotonic,
+        max_weight: int = 0,
+        weigh: Callable[[V], int] = lambda value: 1,
+    ) -> None:
+        self.capacity = capacity
+        self.ttl = ttl
+        self.clock = clock
+        self.max_weight = max_weight
+        self.weigh = weigh
+        self.weight = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self._entries: "OrderedDict[Hashable, Tuple[float, V, int]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Optional[V]:
+        """Return the value cached for ``key``, or None on a miss."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            stored_at, value, weight = entry
+            if self.ttl and self.clock() - stored_at > self.ttl:
+                del self._entries[key]
+                self.weight -= weight
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Hashable, value: V) -> None:
+        """Cache ``value`` for ``key``, evicting the least recently used entries."""
+        if self.capacity <= 0:
+            return
+        weight = self.weigh(value) if self.max_weight else 0
+        if weight > self.max_weight > 0:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.weight -= previous[2]
+            self._entries[key] = (self.clock(), value, weight)
+            self.weight += weight
+            while len(self._entries) > self.capacity or (
+                self.max_weight and self.weight > self.max_weight
+            ):
+                self.weight -= self._entries.popitem(last=False)[1][2]
+                self.evictions += 1
+
+    def clear(self) -> None:
+        """Drop every entry and reset the counters."""
+        with self._lock:
+            self._entries.clear()
+            self.weight = 0
+            self.hits = self.misses = self.evictions = self.expirations = 0
+
+    def metrics(self, name: str) -> List[Metric]:
+        """Build metric objects for this cache, prefixed with ``name``."""
+        counters = [
+            ("hits", "Cache lookups answered from the cache.", self.hits),
+            ("misses", "Cache lookups that had to be computed.", self.misses),
+            ("evictions", "Entries dropped to stay within capacity.", self.evictions),
+            ("expirations", "Entries dropped after their TTL.", self.expirations),
+        ]
+        metrics: List[Metric] = []
+        for suffix, help, value in counters:
+            counter = Counter(f"{name}_{suffix}_total", help)
+            counter.values[()] = value
+            metrics.append(counter)
+        entries = Gauge(f"{name}_entries", "Entries currently cached.")
+        entries.set(value=len(self._entries))
+        metrics.append(entries)
+        if self.max_weight:
+            weight = Gauge(f"{name}_weight", "Total weight of the cached entries.")
+            weight.set(value=self.weight)
+            metrics.append(weight)
+        return metrics
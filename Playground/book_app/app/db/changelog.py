@@ -0,0 +1,109 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, List, Optional, Tuple
+
+from app.metrics import Gauge, Metric
+from app.models import Book
+
+
+class ChangeLog:
+    """Latest change per book id, in version order, for delta sync.
+
+    Each write moves the book's entry to the end with the new version, so the
+    entries after a version are exactly the books changed since then and are
+    found by walking back from the end. Deleted books leave a tombstone until
+    ``compact`` drops tombstones older than the retention; the highest
+    dropped version becomes the ``floor``, below which the log can no longer
+    tell what changed. Versions must be recorded in increasing order, which
+    is what lets ``since`` stop at the first entry it has already seen.
+    """
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic) -> None:
+        self.clock = clock
+        self.floor = 0
+        self.tombstones = 0
+        self.version = 0
+        self._entries: "OrderedDict[int, Tuple[int, Optional[Book], float]]" = (
+            OrderedDict()
+        )
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def record(self, version: int, book_id: int, book: Optional[Book]) -> None:
+        """Log that ``book_id`` changed at ``version``; ``book`` None means deleted.
+
+        Raises ValueError unless ``version`` is above every version logged.
+        """
+        with self._lock:
+            if version <= self.version:
+                raise ValueError(
+                    f"change version {version} is not after {self.version}"
+                )
+            self.version = version
+            previous = self._entries.pop(book_id, None)
+            if previous is not None and previous[1] is None:
+                self.tombstones -= 1
+            if book is None:
+                self.tombstones += 1
+            self._entries[book_id] = (version, book, self.clock())
+
+    def clear(self, version: int) -> None:
+        """Forget every entry; clients older than ``version`` must resync."""
+        with self._lock:
+            self._entries.clear()
+            self.tombstones = 0
+            self.floor = self.version = version
+
+    def since(self, version: int) -> Optional[Tuple[List[Book], List[int]]]:
+        """Return the books changed and ids deleted after ``version``.
+
+        Both lists are in version order. Returns None if ``version`` is below
+        the floor.
+        """
+        with self._lock:
+            if version < self.floor:
+                return None
+            books: List[Book] = []
+            deleted: List[int] = []
+            for book_id, (changed_at, book, _) in reversed(self._entries.items()):
+                if changed_at <= version:
+                    break
+                if book is None:
+                    deleted.append(book_id)
+                else:
+                    books.append(book)
+        books.reverse()
+        deleted.reverse()
+        return books, deleted
+
+    def compact(self, retention: float) -> int:
+        """Drop tombstones older than ``retention`` seconds; return how many."""
+        cutoff = self.clock() - retention
+        with self._lock:
+            expired = [
+                (book_id, version)
+                for book_id, (version, book, logged_at) in self._entries.items()
+                if book is None and logged_at < cutoff
+            ]
+            for book_id, version in expired:
+                del self._entries[book_id]
+                self.floor = max(self.floor, version)
+            self.tombstones -= len(expired)
+        return len(expired)
+
+    def metrics(self, name: str) -> List[Metric]:
+        """Build metric objects for this log, prefixed with ``name``."""
+        gauges = [
+            ("entries", "Books with a logged change, tombstones included.", len(self)),
+            ("tombstones", "Deleted books still remembered.", self.tombstones),
+            ("floor", "Oldest version clients can sync from.", self.floor),
+        ]
+        metrics: List[Metric] = []
+        for suffix, help, value in gauges:
+            gauge = Gauge(f"{name}_{suffix}", help)
+            gauge.set(value=value)
+            metrics.append(gauge)
+        return metrics
@@ -0,0 +1,262 @@
+import re
+import struct
+import threading
+import unicodedata
+from functools import lru_cache
+from hashlib import blake2b
+from itertools import repeat
+from operator import and_
+from typing import Dict, Iterable, List, Set, Tuple, Union
+
+from app.models import Book
+
+# Signature length: trigram hashes are split into this many bins (a power of
+# two) and the minimum of each bin is kept.
+SIGNATURE_HASHES = 16
+_BIN_MASK = SIGNATURE_HASHES - 1
+_LANES = struct.Struct(f"<{SIGNATURE_HASHES}q")
+# Pairs whose estimate is this close to the threshold get an exact check.
+ESTIMATE_SLACK = 0.25
+_NON_WORD = re.compile(r"[\W_]+")
+
+
+def normalize(text: str) -> str:
+    """Fold case, accents, punctuation and spacing out of ``text``.
+
+    ``"Atomic  Habits!"`` and ``"atomic habits"`` normalize alike.
+    """
+    if not text.isascii():
+        text = "".join(
+            char
+            for char in unicodedata.normalize("NFKD", text)
+            if not unicodedata.combining(char)
+        )
+    return _NON_WORD.sub(" ", text.casefold()).strip()
+
+
+@lru_cache(maxsize=1 << 16)
+def _gram_hash(gram: str) -> int:
+    return int.from_bytes(
+        blake2b(gram.encode(), digest_size=8).digest(), "little", signed=True
+    )
+
+
+def trigrams(title: str, author: str) -> Tuple[str, Set[str]]:
+    """Return the normalized ``title|author`` text and its character trigrams."""
+    text = f"{normalize(title)}|{normalize(author)}"
+    return text, {text[i : i + 3] for i in range(len(text) - 2)} or {text}
+
+
+def fingerprint(title: str, author: str) -> Tuple[int, bytes]:
+    """Return the normalized key hash and the MinHash signature of a book.
+
+    The signature is a one-permutation MinHash over the character trigrams
+    of the normalized ``title|author``: each trigram is hashed once, the
+    hash picks a bin and each bin keeps its minimum. Empty bins borrow the
+    next bin's value. Two signatures agree in each position with probability
+    close to the Jaccard similarity of the trigram sets.
+    """
+    text, grams = trigrams(title, author)
+    # High to low, so the dict keeps the lowest hash of each bin.
+    hashes = sorted(map(_gram_hash, grams), reverse=True)
+    bins = dict(zip(map(and_, hashes, repeat(_BIN_MASK)), hashes))
+    if len(bins) == SIGNATURE_HASHES:
+        return hash(text), _LANES.pack(*map(bins.__getitem__, range(SIGNATURE_HASHES)))
+    values = []
+    for position in range(SIGNATURE_HASHES):
+        for distance in range(SIGNATURE_HASHES):
+            value = bins.get((position + distance) & _BIN_MASK)
+            if value is not None:
+                break
+        values.append(value if distance == 0 else _gram_hash(f"{value}+{distance}"))
+    return hash(text), _LANES.pack(*values)
+
+
+def jaccard(first: Book, second: Book) -> float:
+    """Exact Jaccard similarity of two books' trigram sets."""
+    first_grams = trigrams(first.title, first.author)[1]
+    second_grams = trigrams(second.title, second.author)[1]
+    return len(first_grams & second_grams) / len(first_grams | second_grams)
+
+
+def similarity(first: bytes, second: bytes) -> float:
+    """Estimated Jaccard similarity: the fraction of equal signature positions."""
+    equal = sum(a == b for a, b in zip(_LANES.unpack(first), _LANES.unpack(second)))
+    return equal / SIGNATURE_HASHES
+
+
+class DuplicateIndex:
+    """Finds near-duplicate books in about linear time (MinHash with LSH).
+
+    Every book is put in one bucket for its normalized ``(title, author)``
+    key, which catches copies differing only in case, accents, punctuation
+    or spacing, and in one bucket per band of its MinHash signature, which
+    catches books whose trigrams mostly overlap. Only books sharing a bucket
+    are compared, and only with their neighbour when the bucket is sorted by
+    signature (near duplicates agree on most positions, so they sort
+    together), so the work grows with the number of books rather than
+    pairs. Pairs are duplicates if their keys are equal or the Jaccard
+    similarity of their trigrams reaches ``threshold``; it is computed
+    exactly only for pairs whose estimate comes within ``ESTIMATE_SLACK``.
+
+    ``bands`` times ``rows`` must not exceed ``SIGNATURE_HASHES``. More bands
+    of fewer rows find less similar pairs at the cost of more comparisons.
+    """
+
+    def __init__(self, bands: int = 4, rows: int = 4, threshold: float = 0.75) -> None:
+        if bands * rows > SIGNATURE_HASHES:
+            raise ValueError(f"bands * rows must be at most {SIGNATURE_HASHES}")
+        self.bands = bands
+        self.rows = rows
+        self.threshold = threshold
+        # A bucket holds a bare id until a second book joins it.
+        self._buckets: Dict[int, Union[int, List[int]]] = {}
+        self._books: Dict[int, Tuple[Book, int, bytes]] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._books)
+
+    def _bucket_keys(self, key: int, sig: bytes) -> List[int]:
+        width = self.rows * _LANES.size // SIGNATURE_HASHES
+        return [key] + [
+            hash((band, sig[band * width : (band + 1) * width]))
+            for band in range(self.bands)
+        ]
+
+    def rebuild(self, books: Iterable[Book]) -> None:
+        """Replace the index contents with ``books``."""
+        with self._lock:
+            self._buckets = {}
+            self._books = {}
+            for book in books:
+                self._add(book)
+
+    def add(self, book: Book) -> None:
+        """Index ``book``, replacing any earlier version with the same id."""
+        with self._lock:
+            self._remove(book.id)
+            self._add(book)
+
+    def remove(self, book_id: int) -> None:
+        """Drop the book with ``book_id`` from the index if present."""
+        with self._lock:
+            self._remove(book_id)
+
+    def _add(self, book: Book) -> None:
+        key, sig = fingerprint(book.title, book.author)
+        self._books[book.id] = (book, key, sig)
+        buckets = self._buckets
+        for bucket in self._bucket_keys(key, sig):
+            members = buckets.get(bucket)
+            if members is None:
+                buckets[bucket] = book.id
+            elif isinstance(members, int):
+                buckets[bucket] = [members, book.id]
+            else:
+                members.append(book.id)
+
+    def _remove(self, book_id: int) -> None:
+        entry = self._books.pop(book_id, None)
+        if entry is None:
+            return
+        _, key, sig = entry
+        buckets = self._buckets
+        for bucket in self._bucket_keys(key, sig):
+            members = buckets[bucket]
+            if isinstance(members, int):
+                del buckets[bucket]
+            else:
+                members.remove(book_id)
+                if len(members) == 1:
+                    buckets[bucket] = members[0]
+
+    def _similar(self, first: Tuple[Book, int, bytes], second_id: int) -> float:
+        book, key, sig = self._books[second_id]
+        if key == first[1]:
+            return 1.0
+        estimate = similarity(first[2], sig)
+        if estimate < self.threshold - ESTIMATE_SLACK:
+            return estimate
+        return jaccard(first[0], book)
+
+    def matches(self, title: str, author: str) -> Tuple[List[Tuple[Book, float]], int]:
+        """Return indexed books that look like duplicates of ``title`` by ``author``.
+
+        Results are ``(book, similarity)`` pairs, most similar first; equal
+        normalized keys count as similarity 1. Also returns how many books
+        were compared with the probe.
+        """
+        probe = (
+            Book.model_construct(id=0, title=title, author=author, category=""),
+            *fingerprint(title, author),
+        )
+        found: Dict[int, float] = {}
+        seen: Set[int] = set()
+        with self._lock:
+            for bucket in self._bucket_keys(probe[1], probe[2]):
+                members = self._buckets.get(bucket)
+                if members is None:
+                    continue
+                for book_id in [members] if isinstance(members, int) else members:
+                    if book_id in seen:
+                        continue
+                    seen.add(book_id)
+                    score = self._similar(probe, book_id)
+                    if score >= self.threshold:
+                        found[book_id] = score
+            hits = [
+                (self._books[book_id][0], score) for book_id, score in found.items()
+            ]
+        hits.sort(key=lambda hit: (-hit[1], hit[0].id))
+        return hits, len(seen)
+
+    def clusters(self) -> Tuple[List[Tuple[List[Book], bool, float]], int]:
+        """Group indexed books into candidate duplicate clusters.
+
+        Returns ``(books, exact, similarity)`` per cluster of two or more
+        books, largest first: ``exact`` if all share one normalized key, and
+        the lowest similarity of the links that joined the cluster. Also
+        returns how many pairs of books were compared.
+        """
+        parent: Dict[int, int] = {}
+        weakest: Dict[int, float] = {}
+
+        def find(book_id: int) -> int:
+            root = book_id
+            while parent.get(root, root) != root:
+                root = parent[root]
+            while book_id != root:
+                parent[book_id], book_id = root, parent[book_id]
+            return root
+
+        compared = 0
+        with self._lock:
+            for members in self._buckets.values():
+                if isinstance(members, int):
+                    continue
+                ordered = sorted(members, key=lambda book_id: self._books[book_id][2])
+                for previous, book_id in zip(ordered, ordered[1:]):
+                    compared += 1
+                    score = self._similar(self._books[previous], book_id)
+                    if score < self.threshold:
+                        continue
+                    a, b = find(previous), find(book_id)
+                    if a != b:
+                        parent[b] = a
+                        weakest[a] = min(
+                            score, weakest.get(a, 1.0), weakest.get(b, 1.0)
+                        )
+            groups: Dict[int, List[int]] = {}
+            for book_id in parent:
+                groups.setdefault(find(book_id), []).append(book_id)
+            result = []
+            for root, ids in groups.items():
+                if root not in ids:
+                    ids.append(root)
+                ids.sort()
+                entries = [self._books[book_id] for book_id in ids]
+                exact = len({key for _, key, _ in entries}) == 1
+                result.append(([book for book, _, _ in entries], exact, weakest[root]))
+        result.sort(key=lambda cluster: (-len(cluster[0]), cluster[0][0].id))
+        return result, compared
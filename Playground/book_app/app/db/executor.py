@@ -0,0 +1,42 @@
+from typing import Any, Callable, Optional, TypeVar
+
+import anyio.to_thread
+
+from app.config import env_flag, env_int
+
+STORE_OFFLOAD_ENV = "STORE_OFFLOAD"
+THREADPOOL_SIZE_ENV = "THREADPOOL_SIZE"
+
+T = TypeVar("T")
+
+# The in-memory store answers in microseconds, so by default store calls run
+# inline on the event loop. A blocking backend should set STORE_OFFLOAD=1.
+offload = env_flag(STORE_OFFLOAD_ENV, False)
+
+
+async def run_in_store(func: Callable[..., T], *args: Any, heavy: bool = False) -> T:
+    """Call a store function from async code.
+
+    Runs ``func`` inline unless offloading is enabled, in which case it runs
+    in the worker thread pool (sized by ``configure_thread_pool``). Pass
+    ``heavy=True`` for calls that take time linear in the catalog size, such
+    as a duplicate scan or a first-use index build: those always go to the
+    thread pool so the event loop keeps serving other requests meanwhile.
+    """
+    if not offload and not heavy:
+        return func(*args)
+    return await anyio.to_thread.run_sync(func, *args)
+
+
+def configure_thread_pool(size: Optional[int] = None) -> int:
+    """Resize the default worker thread pool; must run inside the event loop.
+
+    ``size`` defaults to ``THREADPOOL_SIZE`` and, when that is unset, the
+    current capacity (40 in anyio) is kept. Returns the resulting capacity.
+    """
+    limiter = anyio.to_thread.current_default_thread_limiter()
+    if size is None:
+        size = env_int(THREADPOOL_SIZE_ENV, 0)
+    if size > 0:
+        limiter.total_tokens = size
+    return int(limiter.total_tokens)
@@ -0,0 +1,168 @@
+import functools
+import threading
+from time import perf_counter
+from typing import Any, Callable, Dict, List, Optional, ParamSpec, Tuple, TypeVar
+
+from app.config import env_flag
+from app.metrics import REGISTRY, Counter, Histogram, Metric
+
+DB_INSTRUMENTATION_ENV = "DB_INSTRUMENTATION"
+
+F = TypeVar("F", bound=Callable[..., Any])
+P = ParamSpec("P")
+R = TypeVar("R")
+ScanCounter = Callable[..., int]
+
+
+def rows_returned(result: Any) -> int:
+    """Count the rows a store call handed back to its caller."""
+    if result is None or result is False:
+        return 0
+    if isinstance(result, (list, tuple, set, dict)):
+        return len(result)
+    return 1
+
+
+class DbStats:
+    """Per-operation statistics for the book store.
+
+    Disabled by default; turn on with ``DB_INSTRUMENTATION=1`` or ``enable()``.
+    When disabled, an instrumented call costs one attribute check.
+    """
+
+    def __init__(self, enabled: bool = False) -> None:
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self.latency = Histogram(
+            "db_operation_duration_seconds",
+            "Book store call latency by operation.",
+            ("operation",),
+        )
+        self.rows_scanned = Counter(
+            "db_rows_scanned_total",
+            "Books examined by store calls, by operation.",
+            ("operation",),
+        )
+        self.rows_returned = Counter(
+            "db_rows_returned_total",
+            "Books returned by store calls, by operation.",
+            ("operation",),
+        )
+        self.lock_wait = Histogram(
+            "db_id_lock_wait_seconds",
+            "Time spent waiting for the book id allocator lock.",
+        )
+
+    def enable(self) -> None:
+        """Start recording store calls."""
+        self.enabled = True
+
+    def disable(self) -> None:
+        """Stop recording store calls; recorded values are kept."""
+        self.enabled = False
+
+    def reset(self) -> None:
+        """Drop all recorded values."""
+        with self._lock:
+            for metric in self.metrics():
+                metric.values.clear()
+
+    def metrics(self) -> List[Metric]:
+        """Return the metric objects exposed through ``/metrics``."""
+        return [self.latency, self.rows_scanned, self.rows_returned, self.lock_wait]
+
+    def record(
+        self, operation: str, elapsed: float, scanned: int, returned: int
+    ) -> None:
+        """Record one store call."""
+        with self._lock:
+            self.latency.observe(elapsed, operation)
+            self.rows_scanned.inc(operation, amount=scanned)
+            self.rows_returned.inc(operation, amount=returned)
+
+    def record_lock_wait(self, elapsed: float) -> None:
+        """Record one acquisition of the id allocator lock."""
+        with self._lock:
+            self.lock_wait.observe(elapsed)
+
+    def summary(self) -> Dict[str, Any]:
+        """Summarize the recorded values for the debug endpoint."""
+        with self._lock:
+            operations: Dict[str, Dict[str, Any]] = {}
+            for (operation,) in list(self.latency.values):
+                snapshot = self.latency.snapshot(operation)
+                calls = snapshot["count"]
+                scanned = self.rows_scanned.values.get((operation,), 0)
+                returned = self.rows_returned.values.get((operation,), 0)
+                operations[operation] = {
+                    "calls": calls,
+                    "total_seconds": snapshot["sum"],
+                    "mean_seconds": snapshot["sum"] / calls if calls else 0.0,
+                    "p50_seconds": self.latency.quantile(0.5, operation),
+                    "p99_seconds": self.latency.quantile(0.99, operation),
+                    "rows_scanned": scanned,
+                    "rows_returned": returned,
+                    "rows_scanned_per_call": scanned / calls if calls else 0.0,
+                }
+            lock = self.lock_wait.snapshot()
+            return {
+                "enabled": self.enabled,
+                "operations": operations,
+                "id_lock": {
+                    "acquisitions": lock["count"],
+                    "total_wait_seconds": lock["sum"],
+                    "p99_wait_seconds": self.lock_wait.quantile(0.99),
+                },
+            }
+
+
+db_stats = DbStats(enabled=env_flag(DB_INSTRUMENTATION_ENV, False))
+REGISTRY.register_collector(
+    "db", lambda: db_stats.metrics() if db_stats.enabled else []
+)
+
+
+def _wrap(func: Callable[..., Any], scanned: ScanCounter, counted: bool) -> Any:
+    operation = func.__name__
+
+    @functools.wraps(func)
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        if not db_stats.enabled:
+            result = func(*args, **kwargs)
+            return result[0] if counted else result
+        start = perf_counter()
+        result = func(*args, **kwargs)
+        elapsed = perf_counter() - start
+        if counted:
+            result, rows = result
+        else:
+            rows = scanned(result, *args, **kwargs)
+        db_stats.record(operation, elapsed, rows, rows_returned(result))
+        return result
+
+    return wrapper
+
+
+def _nothing_scanned(result: Any, *args: Any, **kwargs: Any) -> int:
+    return 0
+
+
+def instrumented(scanned: Optional[ScanCounter] = None) -> Callable[[F], F]:
+    """Record calls, latency and row counts of a store function in ``db_stats``.
+
+    ``scanned`` receives the call's result followed by its arguments and returns
+    how many books the call examined; when omitted the call scans nothing.
+    """
+
+    def decorator(func: F) -> F:
+        return _wrap(func, scanned or _nothing_scanned, False)  # type: ignore
+
+    return decorator
+
+
+def instrumented_counted(func: Callable[P, Tuple[R, int]]) -> Callable[P, R]:
+    """Like ``instrumented``, for a store function that counts its own scan.
+
+    The function returns ``(result, scanned)``; its callers get ``result``.
+    """
+    return _wrap(func, _nothing_scanned, True)
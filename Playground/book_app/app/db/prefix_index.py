@@ -0,0 +1,121 @@
+import heapq
+import threading
+from bisect import bisect_left, insort
+from collections import Counter
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+from app.models import Book
+
+KINDS = ("title", "author")
+
+Entry = Tuple[str, str, str]
+
+
+def _starting_with(entries: List[Entry], folded: str) -> Iterator[Entry]:
+    """Yield the entries of sorted ``entries`` whose key starts with ``folded``."""
+    for position in range(bisect_left(entries, (folded,)), len(entries)):
+        entry = entries[position]
+        if not entry[0].startswith(folded):
+            return
+        yield entry
+
+
+class PrefixIndex:
+    """Sorted array of case-folded titles and authors for prefix lookups.
+
+    Every distinct title and author is one ``(folded, kind, text)`` entry, so
+    all entries starting with a prefix sit next to each other. Entries shared
+    by several books are counted rather than repeated, and are also kept in a
+    second sorted array: only they can outrank the rest, which have one book
+    each. A lookup ranks the shared matches and fills up with the first
+    single-book matches, so it costs a binary search plus a walk over the
+    shared matches and about ``limit`` entries.
+    """
+
+    def __init__(self) -> None:
+        self._entries: List[Entry] = []
+        self._shared: List[Entry] = []
+        self._counts: Dict[Tuple[str, str], int] = {}
+        self._books: Dict[int, Tuple[str, str]] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def rebuild(self, books: Iterable[Book]) -> None:
+        """Replace the index contents with ``books``."""
+        with self._lock:
+            self._books = {book.id: (book.title, book.author) for book in books}
+            self._counts = dict(
+                Counter(
+                    (kind, text)
+                    for fields in self._books.values()
+                    for kind, text in zip(KINDS, fields)
+                )
+            )
+            self._entries = sorted(
+                (text.casefold(), kind, text) for kind, text in self._counts
+            )
+            self._shared = [
+                entry
+                for entry in self._entries
+                if self._counts[(entry[1], entry[2])] > 1
+            ]
+
+    def add(self, book: Book) -> None:
+        """Index ``book``, replacing any earlier version with the same id."""
+        with self._lock:
+            self._remove(book.id)
+            self._books[book.id] = (book.title, book.author)
+            for key in zip(KINDS, (book.title, book.author)):
+                self._counts[key] = self._counts.get(key, 0) + 1
+                kind, text = key
+                if self._counts[key] == 1:
+                    insort(self._entries, (text.casefold(), kind, text))
+                elif self._counts[key] == 2:
+                    insort(self._shared, (text.casefold(), kind, text))
+
+    def remove(self, book_id: int) -> None:
+        """Drop the book with ``book_id`` from the index if present."""
+        with self._lock:
+            self._remove(book_id)
+
+    def _remove(self, book_id: int) -> None:
+        fields = self._books.pop(book_id, None)
+        if fields is None:
+            return
+        for key in zip(KINDS, fields):
+            self._counts[key] -= 1
+            kind, text = key
+            entry = (text.casefold(), kind, text)
+            if self._counts[key] == 1:
+                del self._shared[bisect_left(self._shared, entry)]
+            if self._counts[key]:
+                continue
+            del self._counts[key]
+            del self._entries[bisect_left(self._entries, entry)]
+
+    def suggest(self, prefix: str, limit: int) -> List[Tuple[str, str, int]]:
+        """Return the ``limit`` ``(text, kind, books)`` with the most books.
+
+        Only titles and authors starting with ``prefix`` match, compared
+        case-insensitively; ties come in case-folded order.
+        """
+        folded = prefix.casefold()
+        with self._lock:
+            counts = self._counts
+            ranked = heapq.nsmallest(
+                limit,
+                (
+                    (-counts[(kind, text)], key, kind, text)
+                    for key, kind, text in _starting_with(self._shared, folded)
+                ),
+            )
+            suggestions = [(text, kind, -books) for books, _, kind, text in ranked]
+            if len(suggestions) < limit:
+                for _, kind, text in _starting_with(self._entries, folded):
+                    if counts[(kind, text)] == 1:
+                        suggestions.append((text, kind, 1))
+                        if len(suggestions) == limit:
+                            break
+        return suggestions
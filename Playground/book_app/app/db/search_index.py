@@ -0,0 +1,168 @@
+import heapq
+import math
+import re
+import threading
+from collections import Counter
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from app.models import Book
+
+_TOKEN = re.compile(r"\w+")
+
+
+def tokenize(text: str) -> List[str]:
+    """Split ``text`` into case-folded word tokens."""
+    return _TOKEN.findall(text.casefold())
+
+
+class SearchIndex:
+    """Inverted index over book titles and authors with BM25 ranking.
+
+    Each book is one document made of its title and author tokens. Postings
+    map a token to the term frequency per book id. The index keeps its own
+    copy of every book's tokens, so a book can be removed or re-indexed even
+    after the object was changed in place.
+    """
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75) -> None:
+        self.k1 = k1
+        self.b = b
+        self.postings: Dict[str, Dict[int, int]] = {}
+        self.books: Dict[int, Book] = {}
+        self._terms: Dict[int, Tuple[str, ...]] = {}
+        self._lengths: Dict[int, int] = {}
+        self._total_length = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.books)
+
+    def rebuild(self, books: Iterable[Book]) -> None:
+        """Replace the index contents with ``books``."""
+        with self._lock:
+            self.postings.clear()
+            self.books.clear()
+            self._terms.clear()
+            self._lengths.clear()
+            self._total_length = 0
+            for book in books:
+                self._add(book)
+
+    def add(self, book: Book) -> None:
+        """Index ``book``, replacing any earlier version with the same id."""
+        with self._lock:
+            self._remove(book.id)
+            self._add(book)
+
+    def remove(self, book_id: int) -> None:
+        """Drop the book with ``book_id`` from the index if present."""
+        with self._lock:
+            self._remove(book_id)
+
+    def _add(self, book: Book) -> None:
+        terms = tuple(tokenize(book.title) + tokenize(book.author))
+        self.books[book.id] = book
+        self._terms[book.id] = terms
+        self._lengths[book.id] = len(terms)
+        self._total_length += len(terms)
+        postings = self.postings
+        for term, count in Counter(terms).items():
+            postings.setdefault(term, {})[book.id] = count
+
+    def _remove(self, book_id: int) -> None:
+        terms = self._terms.pop(book_id, None)
+        if terms is None:
+            return
+        del self.books[book_id]
+        del self._lengths[book_id]
+        self._total_length -= len(terms)
+        for term in set(terms):
+            docs = self.postings[term]
+            del docs[book_id]
+            if not docs:
+                del self.postings[term]
+
+    def _posting_lists(self, query: str) -> List[Dict[int, int]]:
+        """Posting lists of the query words, shortest first; [] if any is missing."""
+        lists: List[Dict[int, int]] = []
+        for term in set(tokenize(query)):
+            docs = self.postings.get(term)
+            if docs is None:
+                return []
+            lists.append(docs)
+        lists.sort(key=len)
+        return lists
+
+    def count(
+        self, query: str, where: Optional[Callable[[Book], bool]] = None
+    ) -> Tuple[int, int]:
+        """Count the books ``search`` would match, without scoring them.
+
+        Returns the hits and the number of candidates examined.
+        """
+        with self._lock:
+            lists = self._posting_lists(query)
+            if not lists:
+                return 0, 0
+            shortest, others = lists[0], lists[1:]
+            books = self.books
+            hits = sum(
+                1
+                for book_id in shortest
+                if all(book_id in docs for docs in others)
+                and (where is None or where(books[book_id]))
+            )
+            return hits, len(shortest)
+
+    def search(
+        self,
+        query: str,
+        limit: Optional[int],
+        where: Optional[Callable[[Book], bool]] = None,
+    ) -> Tuple[List[Tuple[Book, float]], int]:
+        """Return up to ``limit`` books containing every query word, best first.
+
+        Candidates come from the shortest posting list and are checked
+        against the others, so a rare word keeps the work small. Scores are
+        summed BM25 contributions of the query words. Only the top ``limit``
+        candidates are kept, with a bounded heap, so matches are never sorted
+        in full; ``limit=None`` ranks every match. With ``where``, only books
+        it accepts are ranked. Ties go to the lower book id. Also returns the
+        number of candidates examined.
+        """
+        with self._lock:
+            count = len(self.books)
+            lists = self._posting_lists(query)
+            if not lists or (limit is not None and limit <= 0):
+                return [], 0
+            k1 = self.k1
+            base = k1 * (1 - self.b)
+            scale = k1 * self.b * count / self._total_length
+            weights = [
+                math.log(1 + (count - len(docs) + 0.5) / (len(docs) + 0.5)) * (k1 + 1)
+                for docs in lists
+            ]
+            lengths = self._lengths
+            books = self.books
+            shortest, first_weight = lists[0], weights[0]
+            others = list(zip(lists[1:], weights[1:]))
+
+            def scored() -> Iterator[Tuple[float, int]]:
+                for book_id, tf in shortest.items():
+                    norm = base + scale * lengths[book_id]
+                    score = first_weight * tf / (tf + norm)
+                    for docs, weight in others:
+                        other_tf = docs.get(book_id)
+                        if other_tf is None:
+                            break
+                        score += weight * other_tf / (other_tf + norm)
+                    else:
+                        if where is None or where(books[book_id]):
+                            yield score, -book_id
+
+            if limit is None:
+                top = sorted(scored(), reverse=True)
+            else:
+                top = heapq.nlargest(limit, scored())
+            hits = [(self.books[-negated], score) for score, negated in top]
+            return hits, len(shortest)
@@ -0,0 +1,284 @@
+import heapq
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from itertools import count, islice
+from typing import (
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    TypeVar,
+)
+
+from app.db.sort_index import SortIndex, SortSpec, sort_books, sort_key
+from app.metrics import Gauge, Metric
+from app.models import Book
+
+T = TypeVar("T")
+
+# A book and its insertion sequence number, which orders unsorted results.
+Entry = Tuple[int, Book]
+
+
+class Shard:
+    """One partition of the catalog, with its own lock and indexes.
+
+    Books are kept by id in insertion order, next to a per-category index and
+    the configured sort indexes (built on the first sorted read). Writers
+    hold ``lock``; readers copy what they need under it and work on the copy.
+    """
+
+    def __init__(self, sort_specs: Iterable[SortSpec]) -> None:
+        self.lock = threading.Lock()
+        self.books: Dict[int, Entry] = {}
+        self.categories: Dict[str, Dict[int, Entry]] = {}
+        self.sort_indexes = {spec: SortIndex(spec) for spec in sort_specs}
+        self.sorted_built = False
+
+    def put(self, seq: int, book: Book) -> Optional[Book]:
+        """Store ``book``, replacing the book with its id; return the old one.
+
+        A new book gets insertion number ``seq``; a replacement keeps the
+        number (and so the place) of the book it replaces.
+        """
+        old = self.books.get(book.id)
+        entry = (seq, book) if old is None else (old[0], book)
+        self.books[book.id] = entry
+        folded = book.category.casefold()
+        moved = old is not None and old[1].category.casefold() != folded
+        if moved:
+            self._uncategorize(old[1])
+        members = self.categories.setdefault(folded, {})
+        if moved and members and entry[0] < next(reversed(members.values()))[0]:
+            # A book moved here keeps its place in insertion order.
+            members[book.id] = entry
+            self.categories[folded] = dict(
+                sorted(members.items(), key=lambda item: item[1][0])
+            )
+        else:
+            members[book.id] = entry
+        if self.sorted_built:
+            for index in self.sort_indexes.values():
+                index.add(book)
+        return None if old is None else old[1]
+
+    def remove(self, book_id: int) -> Optional[Book]:
+        """Drop the book with ``book_id``; return it, or None if absent."""
+        old = self.books.pop(book_id, None)
+        if old is None:
+            return None
+        self._uncategorize(old[1])
+        if self.sorted_built:
+            for index in self.sort_indexes.values():
+                index.remove(book_id)
+        return old[1]
+
+    def _uncategorize(self, book: Book) -> None:
+        folded = book.category.casefold()
+        members = self.categories[folded]
+        del members[book.id]
+        if not members:
+            del self.categories[folded]
+
+    def entries(
+        self, category: Optional[str] = None, end: Optional[int] = None
+    ) -> List[Entry]:
+        """Copy the first ``end`` entries, in insertion order.
+
+        With ``category`` (folded), only the entries of that category.
+        """
+        with self.lock:
+            source = self.books if category is None else self.categories.get(category)
+            if not source:
+                return []
+            return list(islice(source.values(), end))
+
+    def build_sort_indexes(self) -> None:
+        """Build the sort indexes now rather than on the first sorted read."""
+        with self.lock:
+            self._build_sorted()
+
+    def _build_sorted(self) -> None:
+        if not self.sorted_built:
+            books = [book for _, book in self.books.values()]
+            for index in self.sort_indexes.values():
+                index.rebuild(books)
+            self.sorted_built = True
+
+    def sorted_page(
+        self, spec: SortSpec, category: Optional[str], end: Optional[int]
+    ) -> Tuple[List[Book], int]:
+        """First ``end`` books in ``spec`` order, and how many were examined."""
+        index = self.sort_indexes.get(spec)
+        if index is None:
+            books = [book for _, book in self.entries(category)]
+            return sort_books(books, spec)[:end], len(books)
+        with self.lock:
+            self._build_sorted()
+            where = (
+                None
+                if category is None
+                else (lambda book: book.category.casefold() == category)
+            )
+            return index.page(0, end, where)
+
+
+class ShardedBooks:
+    """The catalog partitioned by book id across ``shard_count`` shards.
+
+    Stands in for the store's book list: it iterates (in insertion order),
+    has a length and ``append``/``extend``/``clear``. Writes to a book go to
+    its shard alone and hold only that shard's lock, so writers to different
+    shards never wait for each other, deletes included. Items are addressed
+    by id: ``find`` returns ``(id, book)``, and ``[id] = book`` / ``del [id]``
+    replace or remove it with ``lock_for(id)`` held.
+
+    Listing, category and substring queries run on every shard at once in a
+    thread pool (one thread per shard) and merge the per-shard results, by
+    insertion order or by the sort order. The threads run in parallel only
+    on a free-threaded Python build; with the GIL they take turns.
+    """
+
+    def __init__(self, shard_count: int, sort_specs: Iterable[SortSpec] = ()) -> None:
+        if shard_count < 1:
+            raise ValueError("shard_count must be at least 1")
+        specs = tuple(sort_specs)
+        self.shards = [Shard(specs) for _ in range(shard_count)]
+        self._pool = (
+            ThreadPoolExecutor(max_workers=shard_count, thread_name_prefix="shard")
+            if shard_count > 1
+            else None
+        )
+        self._seq = count()
+        self._seq_lock = threading.Lock()
+
+    def close(self) -> None:
+        """Stop the scatter-gather threads."""
+        if self._pool is not None:
+            self._pool.shutdown(wait=False)
+
+    def shard_of(self, book_id: int) -> Shard:
+        """The shard holding (or to hold) the book with ``book_id``."""
+        return self.shards[hash(book_id) % len(self.shards)]
+
+    def lock_for(self, book_id: int) -> threading.Lock:
+        """The lock writers to the book with ``book_id`` must hold."""
+        return self.shard_of(book_id).lock
+
+    def scatter(self, query: Callable[[Shard], T]) -> List[T]:
+        """Run ``query`` on every shard (in parallel) and return the results."""
+        if self._pool is None:
+            return [query(self.shards[0])]
+        return list(self._pool.map(query, self.shards))
+
+    def _next_seq(self) -> int:
+        with self._seq_lock:
+            return next(self._seq)
+
+    def __len__(self) -> int:
+        return sum(len(shard.books) for shard in self.shards)
+
+    def __iter__(self) -> Iterator[Book]:
+        return self._merged(self.scatter(Shard.entries))
+
+    def iter_locked(self) -> Iterator[Book]:
+        """Iterate like ``iter`` for a caller already holding every shard lock."""
+        return self._merged([list(shard.books.values()) for shard in self.shards])
+
+    def build_sort_indexes(self) -> None:
+        """Build every shard's sort indexes, in parallel."""
+        self.scatter(Shard.build_sort_indexes)
+
+    def find(self, book_id: int) -> Optional[Tuple[int, Book]]:
+        """Return ``(book_id, book)`` if the book exists, else None."""
+        entry = self.shard_of(book_id).books.get(book_id)
+        return None if entry is None else (book_id, entry[1])
+
+    def __setitem__(self, book_id: int, book: Book) -> None:
+        self.shard_of(book_id).put(self._next_seq(), book)
+
+    def __delitem__(self, book_id: int) -> None:
+        if self.shard_of(book_id).remove(book_id) is None:
+            raise KeyError(book_id)
+
+    def append(self, book: Book) -> None:
+        """Add ``book`` after every other book."""
+        shard = self.shard_of(book.id)
+        with shard.lock:
+            shard.put(self._next_seq(), book)
+
+    def extend(self, books: Iterable[Book]) -> None:
+        """Add ``books`` in order, filling the shards in parallel."""
+        parts: List[List[Entry]] = [[] for _ in self.shards]
+        with self._seq_lock:
+            for book in books:
+                parts[hash(book.id) % len(parts)].append((next(self._seq), book))
+
+        def fill(shard: Shard, entries: List[Entry]) -> None:
+            with shard.lock:
+                for seq, book in entries:
+                    shard.put(seq, book)
+
+        if self._pool is None:
+            fill(self.shards[0], parts[0])
+        else:
+            list(self._pool.map(fill, self.shards, parts))
+
+    def clear(self) -> None:
+        """Drop every book."""
+        for shard in self.shards:
+            with shard.lock:
+                shard.books.clear()
+                shard.categories.clear()
+                for index in shard.sort_indexes.values():
+                    index.rebuild(())
+                shard.sorted_built = False
+
+    def _merged(self, parts: Sequence[List[Entry]]) -> Iterator[Book]:
+        return (book for _, book in heapq.merge(*parts))
+
+    def metrics(self, name: str) -> List[Metric]:
+        """Build a metric of the books per shard, prefixed with ``name``."""
+        books = Gauge(f"{name}_books", "Books per store shard.", labels=("shard",))
+        for number, shard in enumerate(self.shards):
+            books.set(number, value=len(shard.books))
+        return [books]
+
+    def page(
+        self,
+        category: Optional[str] = None,
+        spec: Optional[SortSpec] = None,
+        offset: int = 0,
+        limit: Optional[int] = None,
+    ) -> Tuple[List[Book], int]:
+        """Books (in ``category``, case-insensitive) in insertion or ``spec`` order.
+
+        Each shard contributes at most ``offset + limit`` books. Also returns
+        how many books the shards examined.
+        """
+        folded = None if category is None else category.casefold()
+        end = None if limit is None else offset + limit
+        if spec is None:
+            parts = self.scatter(lambda shard: shard.entries(folded, end))
+            page = list(islice(self._merged(parts), offset, end))
+            return page, sum(map(len, parts))
+        pages = self.scatter(lambda shard: shard.sorted_page(spec, folded, end))
+        merged = heapq.merge(*(page for page, _ in pages), key=sort_key(spec))
+        return list(islice(merged, offset, end)), sum(scanned for _, scanned in pages)
+
+    def search(self, query_lower: str) -> List[Book]:
+        """Books whose title or author contains ``query_lower``, in insertion order."""
+
+        def matches(shard: Shard) -> List[Entry]:
+            return [
+                (seq, book)
+                for seq, book in shard.entries()
+                if query_lower in book.title.lower()
+                or query_lower in book.author.lower()
+            ]
+
+        return list(self._merged(self.scatter(matches)))
@@ -0,0 +1,425 @@
+import mmap
+import os
+import struct
+import sys
+import threading
+from array import array
+from bisect import bisect_left, bisect_right, insort
+from collections.abc import MutableSequence
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from app.db.cache import LRUCache
+from app.metrics import Gauge, Metric
+from app.models import Book
+
+MAGIC = b"BOOKSNAP"
+FORMAT_VERSION = 1
+# Strings are addressed with 32-bit offsets.
+MAX_STRINGS_SIZE = 0xFFFFFFFF
+
+# Header: magic, format version, record size, book count, highest id, newest
+# updated_at, the offsets of the record, id index, string and count sections,
+# and the number of category and author counts. Everything is little-endian;
+# the id index is searched in place as machine integers.
+_HEADER = struct.Struct("<8sIIQqqQQQQII")
+# Record: id, version, updated_at, then (offset, length) of the title, author
+# and category in the string table.
+_RECORD = struct.Struct("<qqqIIIIII")
+# Count entry: (offset, length) of a category or author, and its book count.
+_COUNT = struct.Struct("<III")
+
+_EPOCH = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+_NO_TIME = -(1 << 63)
+
+Counts = Tuple[Dict[str, int], Dict[str, int], Optional[datetime]]
+
+
+def _micros(moment: datetime) -> int:
+    if moment.tzinfo is not None:
+        # Stored like ``datetime.now()``: naive local time.
+        moment = moment.astimezone().replace(tzinfo=None)
+    return (moment - _EPOCH) // _MICROSECOND
+
+
+def _padded(size: int) -> int:
+    return -(-size // 8) * 8
+
+
+def write_snapshot(path: Union[str, Path], books: Iterable[Book]) -> int:
+    """Write ``books`` to a snapshot file at ``path``; return its size in bytes.
+
+    Records keep the order of ``books``. Each distinct string is stored once,
+    so repeated authors and categories cost one record field each. The file
+    is written next to ``path`` and renamed over it, so processes that have
+    the old snapshot open keep reading the old contents.
+    """
+    path = Path(path)
+    strings: Dict[str, Tuple[int, int]] = {}
+    table = bytearray()
+
+    def intern(text: str) -> Tuple[int, int]:
+        ref = strings.get(text)
+        if ref is None:
+            data = text.encode()
+            if len(table) + len(data) > MAX_STRINGS_SIZE:
+                raise ValueError("Snapshot strings exceed 4 GiB")
+            ref = strings[text] = (len(table), len(data))
+            table.extend(data)
+        return ref
+
+    records = bytearray()
+    ids: List[Tuple[int, int]] = []
+    categories: Dict[str, int] = {}
+    authors: Dict[str, int] = {}
+    newest = _NO_TIME
+    for position, book in enumerate(books):
+        updated_at = _micros(book.updated_at)
+        newest = max(newest, updated_at)
+        records += _RECORD.pack(
+            book.id,
+            book.version,
+            updated_at,
+            *intern(book.title),
+            *intern(book.author),
+            *intern(book.category),
+        )
+        ids.append((book.id, position))
+        categories[book.category] = categories.get(book.category, 0) + 1
+        authors[book.author] = authors.get(book.author, 0) + 1
+
+    ids.sort()
+    count = len(ids)
+    records_offset = _HEADER.size
+    ids_offset = records_offset + len(records)
+    strings_offset = ids_offset + _padded(12 * count)
+    counts_offset = strings_offset + _padded(len(table))
+    header = _HEADER.pack(
+        MAGIC,
+        FORMAT_VERSION,
+        _RECORD.size,
+        count,
+        max((book_id for book_id, _ in ids), default=0),
+        newest,
+        records_offset,
+        ids_offset,
+        strings_offset,
+        counts_offset,
+        len(categories),
+        len(authors),
+    )
+    sections = [
+        header,
+        records,
+        array("q", (book_id for book_id, _ in ids)).tobytes(),
+        array("I", (position for _, position in ids)).tobytes(),
+        bytes(strings_offset - ids_offset - 12 * count),
+        table,
+        bytes(counts_offset - strings_offset - len(table)),
+    ]
+    for counted in (categories, authors):
+        for text, books_with in counted.items():
+            sections.append(_COUNT.pack(*strings[text], books_with))
+
+    partial = path.with_name(path.name + ".tmp")
+    with open(partial, "wb") as file:
+        size = sum(file.write(section) for section in sections)
+    os.replace(partial, path)
+    return size
+
+
+class Snapshot:
+    """Read-only view of a snapshot file, mapped into memory.
+
+    Opening reads only the header. A book is decoded from its fixed-width
+    record when asked for; ids are found by binary search in the sorted id
+    index. Pages are read by the OS on first touch and shared between all
+    processes mapping the same file. Authors and categories repeat, so the
+    ``strings_cache_size`` most recently decoded are kept and shared by the
+    books that name them.
+    """
+
+    def __init__(
+        self, path: Union[str, Path], strings_cache_size: int = 10_000
+    ) -> None:
+        if sys.byteorder != "little":
+            raise ValueError("Snapshots can only be read on little-endian machines")
+        self.path = Path(path)
+        with open(self.path, "rb") as file:
+            self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        (
+            magic,
+            format_version,
+            record_size,
+            self.count,
+            self.max_id,
+            newest,
+            self._records,
+            ids_offset,
+            self._strings,
+            self._counts,
+            self._categories,
+            self._authors,
+        ) = _HEADER.unpack_from(self._mmap)
+        if magic != MAGIC or (format_version, record_size) != (
+            FORMAT_VERSION,
+            _RECORD.size,
+        ):
+            self._mmap.close()
+            raise ValueError(f"{self.path} is not a version {FORMAT_VERSION} snapshot")
+        self.last_updated_at = (
+            None if newest == _NO_TIME else _EPOCH + newest * _MICROSECOND
+        )
+        view = memoryview(self._mmap)
+        self._ids = view[ids_offset : ids_offset + 8 * self.count].cast("q")
+        positions_offset = ids_offset + 8 * self.count
+        self._positions = view[
+            positions_offset : positions_offset + 4 * self.count
+        ].cast("I")
+        view.release()
+        self._decoded: LRUCache[str] = LRUCache(strings_cache_size)
+
+    def __len__(self) -> int:
+        return self.count
+
+    def close(self) -> None:
+        """Unmap the file. Books already decoded stay usable."""
+        self._ids.release()
+        self._positions.release()
+        self._mmap.close()
+
+    def _string(self, offset: int, length: int) -> str:
+        start = self._strings + offset
+        return self._mmap[start : start + length].decode()
+
+    def _shared(self, offset: int, length: int) -> str:
+        text = self._decoded.get(offset)
+        if text is None:
+            text = self._string(offset, length)
+            self._decoded.put(offset, text)
+        return text
+
+    def book(self, position: int) -> Book:
+        """Decode the book stored at ``position``."""
+        (
+            book_id,
+            version,
+            updated_at,
+            title_offset,
+            title_length,
+            author_offset,
+            author_length,
+            category_offset,
+            category_length,
+        ) = _RECORD.unpack_from(self._mmap, self._records + position * _RECORD.size)
+        return Book.model_construct(
+            id=book_id,
+            title=self._string(title_offset, title_length),
+            author=self._shared(author_offset, author_length),
+            category=self._shared(category_offset, category_length),
+            updated_at=_EPOCH + updated_at * _MICROSECOND,
+            version=version,
+        )
+
+    def position_of(self, book_id: int) -> Optional[int]:
+        """Return the position of the book with ``book_id``, or None."""
+        index = bisect_left(self._ids, book_id)
+        if index < self.count and self._ids[index] == book_id:
+            return self._positions[index]
+        return None
+
+    def counts(self) -> Counts:
+        """Return the books per category and per author, and the newest update."""
+        entries = [
+            (self._string(offset, length), books)
+            for offset, length, books in _COUNT.iter_unpack(
+                self._mmap[
+                    self._counts : self._counts
+                    + _COUNT.size * (self._categories + self._authors)
+                ]
+            )
+        ]
+        return (
+            dict(entries[: self._categories]),
+            dict(entries[self._categories :]),
+            self.last_updated_at,
+        )
+
+
+class SnapshotBooks(MutableSequence):
+    """The store's book list backed by a snapshot, plus an overlay of writes.
+
+    Behaves like the list it stands in for. Books are decoded from the
+    snapshot when read; the ``cache_size`` most recently read by index or id
+    are kept, so hot books are decoded once, while scans decode as they go
+    and keep nothing. Writes since the snapshot live in the overlay: books
+    replaced or deleted by snapshot position, and books appended after the
+    snapshot's books. Books can only be inserted at the end, which is all the
+    store does. Appends may run concurrently; other writes must not overlap
+    each other or an append, which the store's locks see to.
+    """
+
+    def __init__(self, snapshot: Snapshot, cache_size: int = 10_000) -> None:
+        self.snapshot = snapshot
+        self.cache: LRUCache[Book] = LRUCache(cache_size)
+        self._replaced: Dict[int, Book] = {}
+        # Id of each replacement -> its position, as a replacement may carry
+        # another book's id.
+        self._replaced_ids: Dict[int, int] = {}
+        self._deleted: List[int] = []
+        self._appended: List[Book] = []
+        self._appended_ids: Dict[int, int] = {}
+        self._append_lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return self.snapshot.count - len(self._deleted) + len(self._appended)
+
+    def close(self) -> None:
+        """Unmap the snapshot."""
+        self.snapshot.close()
+
+    @property
+    def overlay_size(self) -> int:
+        """Writes held in the overlay: replaced, deleted and appended books."""
+        return len(self._replaced) + len(self._deleted) + len(self._appended)
+
+    def _base_count(self) -> int:
+        return self.snapshot.count - len(self._deleted)
+
+    def _position(self, index: int) -> int:
+        """Snapshot position of the ``index``-th book not deleted."""
+        deleted = self._deleted
+        if not deleted:
+            return index
+        low, high = index, index + len(deleted)
+        while low < high:
+            middle = (low + high) // 2
+            if middle + 1 - bisect_right(deleted, middle) > index:
+                high = middle
+            else:
+                low = middle + 1
+        return low
+
+    def _load(self, position: int) -> Book:
+        book = self._replaced.get(position)
+        if book is not None:
+            return book
+        book = self.cache.get(position)
+        if book is None:
+            book = self.snapshot.book(position)
+            self.cache.put(position, book)
+        return book
+
+    def _index(self, index: int) -> int:
+        size = len(self)
+        if index < 0:
+            index += size
+        if not 0 <= index < size:
+            raise IndexError("book index out of range")
+        return index
+
+    def _unreplace(self, position: int) -> None:
+        old = self._replaced.pop(position, None)
+        if old is not None and self._replaced_ids.get(old.id) == position:
+            del self._replaced_ids[old.id]
+
+    def _index_appended(self) -> None:
+        self._appended_ids = {book.id: i for i, book in enumerate(self._appended)}
+
+    def __getitem__(self, index):  # type: ignore[override]
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        index = self._index(index)
+        base = self._base_count()
+        if index >= base:
+            return self._appended[index - base]
+        return self._load(self._position(index))
+
+    def __setitem__(self, index, book):  # type: ignore[override]
+        if isinstance(index, slice):
+            raise TypeError("snapshot books cannot be assigned by slice")
+        index = self._index(index)
+        base = self._base_count()
+        if index >= base:
+            old = self._appended[index - base]
+            self._appended[index - base] = book
+            if self._appended_ids.get(old.id) == index - base:
+                del self._appended_ids[old.id]
+            self._appended_ids[book.id] = index - base
+            return
+        position = self._position(index)
+        self._unreplace(position)
+        self._replaced[position] = book
+        self._replaced_ids[book.id] = position
+
+    def __delitem__(self, index):  # type: ignore[override]
+        if isinstance(index, slice):
+            raise TypeError("snapshot books cannot be deleted by slice")
+        index = self._index(index)
+        base = self._base_count()
+        if index >= base:
+            del self._appended[index - base]
+            self._index_appended()
+            return
+        position = self._position(index)
+        insort(self._deleted, position)
+        self._unreplace(position)
+
+    def insert(self, index: int, book: Book) -> None:
+        if index < len(self):
+            raise TypeError("snapshot books can only be added at the end")
+        self.append(book)
+
+    def append(self, book: Book) -> None:
+        with self._append_lock:
+            self._appended_ids[book.id] = len(self._appended)
+            self._appended.append(book)
+
+    def __iter__(self) -> Iterator[Book]:
+        deleted = self._deleted
+        skip = 0
+        replaced = self._replaced
+        decode = self.snapshot.book
+        for position in range(self.snapshot.count):
+            if skip < len(deleted) and deleted[skip] == position:
+                skip += 1
+                continue
+            book = replaced.get(position)
+            yield decode(position) if book is None else book
+        yield from self._appended
+
+    def find(self, book_id: int) -> Optional[Tuple[int, Book]]:
+        """Return ``(index, book)`` for the book with ``book_id``, or None.
+
+        Uses the snapshot's id index and the overlay's ids rather than a scan.
+        """
+        deleted = self._deleted
+        position = self._replaced_ids.get(book_id)
+        if position is None:
+            position = self.snapshot.position_of(book_id)
+            if position is not None and position in self._replaced:
+                # Replaced by a book with another id.
+                position = None
+        if position is not None:
+            skipped = bisect_left(deleted, position)
+            if skipped == len(deleted) or deleted[skipped] != position:
+                return position - skipped, self._load(position)
+        offset = self._appended_ids.get(book_id)
+        if offset is not None:
+            return self._base_count() + offset, self._appended[offset]
+        return None
+
+    def metrics(self, name: str) -> List[Metric]:
+        """Build metric objects for the snapshot and overlay, prefixed with ``name``."""
+        books = Gauge(f"{name}_books", "Books in the mapped snapshot file.")
+        books.set(value=self.snapshot.count)
+        cached = Gauge(f"{name}_cached_books", "Decoded snapshot books kept cached.")
+        cached.set(value=len(self.cache))
+        overlay = Gauge(
+            f"{name}_overlay_books",
+            "Books replaced, deleted or added since the snapshot.",
+        )
+        overlay.set(value=self.overlay_size)
+        return [books, cached, overlay]
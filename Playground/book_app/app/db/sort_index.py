@@ -0,0 +1,156 @@
+import threading
+from bisect import bisect_left, insort
+from functools import lru_cache
+from itertools import islice
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from app.models import Book
+
+SORTABLE_FIELDS = tuple(Book.model_fields)
+
+# Sort order as ``(field, descending)`` pairs, most significant first.
+SortSpec = Tuple[Tuple[str, bool], ...]
+
+
+@lru_cache(maxsize=256)
+def parse_sort(text: str) -> SortSpec:
+    """Parse ``"-updated_at,title"`` into ``(("updated_at", True), ("title", False))``.
+
+    A leading ``-`` sorts that field in descending order. Raises ValueError
+    for fields books do not have.
+    """
+    spec = []
+    for part in text.split(","):
+        descending = part.startswith("-")
+        name = part[1:] if descending else part
+        if name not in SORTABLE_FIELDS:
+            raise ValueError(f"Cannot sort books by {part!r}")
+        spec.append((name, descending))
+    return tuple(spec)
+
+
+def _value(book: Book, name: str) -> Any:
+    value = getattr(book, name)
+    return value.casefold() if isinstance(value, str) else value
+
+
+class _Descending:
+    """Sort key component that orders its value in reverse."""
+
+    __slots__ = ("value",)
+
+    def __init__(self, value: Any) -> None:
+        self.value = value
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, _Descending) and self.value == other.value
+
+    def __lt__(self, other: "_Descending") -> bool:
+        return other.value < self.value
+
+
+def sort_key(spec: SortSpec) -> Callable[[Book], tuple]:
+    """Return the key ordering books by ``spec``, then by id.
+
+    Strings compare case-insensitively.
+    """
+
+    def key(book: Book) -> tuple:
+        parts = [
+            _Descending(_value(book, name)) if descending else _value(book, name)
+            for name, descending in spec
+        ]
+        parts.append(book.id)
+        return tuple(parts)
+
+    return key
+
+
+def sort_books(books: Iterable[Book], spec: SortSpec) -> List[Book]:
+    """Return ``books`` sorted by ``spec`` (then id), like ``sort_key`` orders them.
+
+    Uses one stable sort per field, least significant first, so no per-book
+    key objects are compared.
+    """
+    ordered = sorted(books, key=lambda book: book.id)
+    for name, descending in reversed(spec):
+        ordered.sort(key=lambda book: _value(book, name), reverse=descending)
+    return ordered
+
+
+class SortIndex:
+    """Books kept in one sort order, for pages without sorting per request.
+
+    Entries are the books' ``sort_key`` tuples in a sorted list, so a page is
+    a slice of it and a write is a binary search plus a list insert/delete.
+    Filtered pages walk the entries in order until the page is full.
+    """
+
+    def __init__(self, spec: SortSpec) -> None:
+        self.spec = spec
+        self._key = sort_key(spec)
+        self._entries: List[tuple] = []
+        self._keys: Dict[int, tuple] = {}
+        self._books: Dict[int, Book] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def rebuild(self, books: Iterable[Book]) -> None:
+        """Replace the index contents with ``books``."""
+        ordered = sort_books(books, self.spec)
+        entries = [self._key(book) for book in ordered]
+        with self._lock:
+            self._entries = entries
+            self._keys = {entry[-1]: entry for entry in entries}
+            self._books = {book.id: book for book in ordered}
+
+    def add(self, book: Book) -> None:
+        """Index ``book``, replacing any earlier version with the same id."""
+        key = self._key(book)
+        with self._lock:
+            self._remove(book.id)
+            self._keys[book.id] = key
+            self._books[book.id] = book
+            insort(self._entries, key)
+
+    def remove(self, book_id: int) -> None:
+        """Drop the book with ``book_id`` from the index if present."""
+        with self._lock:
+            self._remove(book_id)
+
+    def _remove(self, book_id: int) -> None:
+        key = self._keys.pop(book_id, None)
+        if key is None:
+            return
+        del self._books[book_id]
+        del self._entries[bisect_left(self._entries, key)]
+
+    def page(
+        self,
+        offset: int = 0,
+        limit: Optional[int] = None,
+        where: Optional[Callable[[Book], bool]] = None,
+    ) -> Tuple[List[Book], int]:
+        """Return up to ``limit`` books after the first ``offset``, in order.
+
+        With ``where``, only books it accepts are counted and returned. Also
+        returns how many index entries were examined.
+        """
+        end = None if limit is None else offset + limit
+        with self._lock:
+            books = self._books
+            if where is None:
+                page = [books[entry[-1]] for entry in self._entries[offset:end]]
+                return page, len(page)
+            scanned = 0
+            matches = []
+            for entry in self._entries:
+                scanned += 1
+                book = books[entry[-1]]
+                if where(book):
+                    matches.append(book)
+                    if end is not None and len(matches) == end:
+                        break
+        return list(islice(matches, offset, None)), scanned
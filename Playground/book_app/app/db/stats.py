@@ -0,0 +1,117 @@
+import threading
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from app.metrics import Gauge, Metric
+from app.models import Book
+
+
+def _bump(counts: Dict[str, int], key: str, delta: int) -> None:
+    count = counts.get(key, 0) + delta
+    if count:
+        counts[key] = count
+    else:
+        del counts[key]
+
+
+class CatalogCounters:
+    """Book counts per category and author, adjusted by every write.
+
+    Each write changes a handful of counters, so reading the statistics never
+    looks at the books. ``last_updated_at`` is the time of the latest change
+    to the catalog: a book's ``updated_at`` when it is written, the time of
+    a deletion, or the newest ``updated_at`` after a reload.
+    """
+
+    def __init__(self) -> None:
+        self.total = 0
+        self.categories: Dict[str, int] = {}
+        self.authors: Dict[str, int] = {}
+        self.last_updated_at: Optional[datetime] = None
+        self._lock = threading.Lock()
+
+    def rebuild(self, books: Iterable[Book]) -> None:
+        """Recount from ``books``."""
+        with self._lock:
+            self.total = 0
+            self.categories = {}
+            self.authors = {}
+            self.last_updated_at = None
+            for book in books:
+                self._add(book)
+
+    def restore(
+        self,
+        total: int,
+        categories: Dict[str, int],
+        authors: Dict[str, int],
+        last_updated_at: Optional[datetime],
+    ) -> None:
+        """Take counts computed elsewhere (e.g. stored in a snapshot)."""
+        with self._lock:
+            self.total = total
+            self.categories = categories
+            self.authors = authors
+            self.last_updated_at = last_updated_at
+
+    def add(self, book: Book) -> None:
+        """Count a created book."""
+        with self._lock:
+            self._add(book)
+
+    def replace(self, old: Book, new: Book) -> None:
+        """Count ``old`` being replaced by ``new``."""
+        with self._lock:
+            self._remove(old)
+            self._add(new)
+
+    def remove(self, book: Book, at: Optional[datetime] = None) -> None:
+        """Count a book deleted at ``at`` (default: now)."""
+        with self._lock:
+            self._remove(book)
+            self.last_updated_at = at or datetime.now()
+
+    def _add(self, book: Book) -> None:
+        self.total += 1
+        _bump(self.categories, book.category, 1)
+        _bump(self.authors, book.author, 1)
+        if self.last_updated_at is None or book.updated_at > self.last_updated_at:
+            self.last_updated_at = book.updated_at
+
+    def _remove(self, book: Book) -> None:
+        self.total -= 1
+        _bump(self.categories, book.category, -1)
+        _bump(self.authors, book.author, -1)
+
+    def category_counts(self) -> Dict[str, int]:
+        """Return a copy of the per-category counts."""
+        with self._lock:
+            return dict(self.categories)
+
+    def snapshot(
+        self,
+    ) -> Tuple[int, Dict[str, int], Dict[str, int], Optional[datetime]]:
+        """Return ``(total, categories, authors, last_updated_at)`` at one instant."""
+        with self._lock:
+            return (
+                self.total,
+                dict(self.categories),
+                dict(self.authors),
+                self.last_updated_at,
+            )
+
+    def metrics(self, name: str) -> List[Metric]:
+        """Build metric objects for the counters, prefixed with ``name``.
+
+        Per-author counts are left out: there are too many authors for
+        labels.
+        """
+        categories = self.category_counts()
+        books = Gauge(f"{name}_books", "Books in the catalog.")
+        books.set(value=sum(categories.values()))
+        by_category = Gauge(
+            f"{name}_category_books", "Books per category.", labels=("category",)
+        )
+        for category, count in categories.items():
+            by_category.set(category, value=count)
+        return [books, by_category]
@@ -0,0 +1,177 @@
+import json
+import logging
+import os
+import time
+from datetime import datetime, timezone
+from logging.handlers import TimedRotatingFileHandler
+from pathlib import Path
+from typing import Any
+
+from app.config import env_float, env_int
+
+LOG_LEVEL_ENV = "LOG_LEVEL"
+READ_SAMPLE_RATE_ENV = "LOG_READ_SAMPLE_RATE"
+READ_MAX_PER_SECOND_ENV = "LOG_READ_MAX_PER_SECOND"
+
+
+class JSONFormatter(logging.Formatter):
+    """Format log records as JSON lines.
+
+    The timestamp comes from ``record.created`` instead of re-reading the clock,
+    and the message is only interpolated here, once a handler emits the record.
+    Extra structured fields can be attached with ``extra={"fields": {...}}``.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        log_data = {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(record.created))
+            + f".{int(record.msecs):03d}Z",
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        fields = getattr(record, "fields", None)
+        if fields:
+            log_data.update(fields)
+        if record.exc_info:
+            log_data["exception"] = self.formatException(record.exc_info)
+        return json.dumps(log_data, default=str)
+
+
+class LogSampler:
+    """Decide whether a sampled log call goes through.
+
+    ``sample_rate`` is applied deterministically as "one call in
+    ``round(1 / sample_rate)``" (0.1 lets every tenth call through), so
+    low-traffic routes still show up in the logs. A rate of 0 drops all calls.
+    ``max_per_second`` caps the calls let through per wall-clock second;
+    0 disables the cap.
+    """
+
+    def __init__(self, sample_rate: float = 1.0, max_per_second: int = 0) -> None:
+        self.configure(sample_rate, max_per_second)
+
+    def configure(self, sample_rate: float = 1.0, max_per_second: int = 0) -> None:
+        """Change the sampling policy and reset the internal counters."""
+        self.sample_rate = min(max(sample_rate, 0.0), 1.0)
+        self.max_per_second = max(max_per_second, 0)
+        self.passthrough = self.sample_rate >= 1.0 and not self.max_per_second
+        self._every = round(1 / self.sample_rate) if self.sample_rate > 0 else 0
+        self._count = 0
+        self._window = 0
+        self._window_count = 0
+
+    def allow(self) -> bool:
+        """Return True if the current call should be logged."""
+        if self.passthrough:
+            return True
+
+        if self._every != 1:
+            if not self._every:
+                return False
+            self._count += 1
+            if self._count % self._every:
+                return False
+
+        if self.max_per_second:
+            window = int(time.monotonic())
+            if window != self._window:
+                self._window = window
+                self._window_count = 0
+            if self._window_count >= self.max_per_second:
+                return False
+            self._window_count += 1
+
+        return True
+
+
+class SampledLogger(logging.LoggerAdapter):
+    """Logger adapter that samples calls before a LogRecord is built.
+
+    Level and sampling checks both run ahead of record creation, so a call
+    that is disabled or sampled out costs about as much as a function call.
+    """
+
+    def __init__(self, logger: logging.Logger, sampler: LogSampler) -> None:
+        super().__init__(logger, {})
+        self.sampler = sampler
+
+    def log(self, level: int, msg: Any, *args: Any, **kwargs: Any) -> None:
+        if self.logger.isEnabledFor(level) and self.sampler.allow():
+            kwargs.setdefault("stacklevel", 2)
+            self.logger.log(level, msg, *args, **kwargs)
+
+
+read_sampler = LogSampler()
+
+
+def get_read_logger(name: str) -> SampledLogger:
+    """Return a sampled logger for successful read paths under ``name``."""
+    return SampledLogger(logging.getLogger(f"{name}.reads"), read_sampler)
+
+
+def _level_from_env() -> int:
+    """Resolve the log level from ``LOG_LEVEL`` (name or number), default INFO."""
+    value = os.environ.get(LOG_LEVEL_ENV, "INFO").strip().upper()
+    if value.isdigit():
+        return int(value)
+    level = logging.getLevelName(value)
+    return level if isinstance(level, int) else logging.INFO
+
+
+class LazyFileHandler(TimedRotatingFileHandler):
+    """Daily rotating file handler that creates its folder on the first write.
+
+    The file is not opened until a record is emitted, so importing the app
+    touches nothing on disk.
+    """
+
+    def __init__(self, filename: Path, **kwargs: Any) -> None:
+        super().__init__(filename=str(filename), delay=True, **kwargs)
+
+    def _open(self):  # type: ignore[no-untyped-def]
+        Path(self.baseFilename).parent.mkdir(parents=True, exist_ok=True)
+        return super()._open()
+
+
+def setup_logging() -> logging.Logger:
+    """Configure JSON file logging with daily rotation.
+
+    The level is taken from ``LOG_LEVEL``. Read-path loggers obtained with
+    ``get_read_logger`` are sampled according to ``LOG_READ_SAMPLE_RATE``
+    and ``LOG_READ_MAX_PER_SECOND``.
+    """
+    log_dir = Path("logs")
+    log_file = log_dir / f"app_{datetime.now(timezone.utc).strftime('%Y-%m-%d')}.log"
+
+    level = _level_from_env()
+    logger = logging.getLogger("app")
+    logger.setLevel(level)
+
+    read_sampler.configure(
+        env_float(READ_SAMPLE_RATE_ENV, 1.0),
+        env_int(READ_MAX_PER_SECOND_ENV, 0),
+    )
+
+    if logger.handlers:
+        return logger
+
+    file_handler = LazyFileHandler(
+        log_file,
+        when="midnight",
+        interval=1,
+        utc=True,
+    )
+    file_handler.setLevel(level)
+    file_handler.setFormatter(JSONFormatter())
+
+    console_handler = logging.StreamHandler()
+    console_handler.setLevel(level)
+    console_handler.setFormatter(
+        logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    )
+
+    logger.addHandler(file_handler)
+    logger.addHandler(console_handler)
+
+    return logger
@@ -0,0 +1,214 @@
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
+
+# Latency buckets in seconds, tuned for an in-memory API (50us .. 5s).
+DEFAULT_BUCKETS: Tuple[float, ...] = (
+    0.00005,
+    0.0001,
+    0.00025,
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+)
+
+LabelValues = Tuple[object, ...]
+
+
+def _escape(value: object) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: Sequence[str], values: LabelValues, extra: str = "") -> str:
+    """Render a Prometheus label set such as ``{route="/api/books",le="0.1"}``."""
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(value)
+
+
+class Counter:
+    """Monotonic counter, optionally split by label values."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()) -> None:
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.values: Dict[LabelValues, float] = {}
+
+    def inc(self, *label_values: object, amount: float = 1) -> None:
+        """Add ``amount`` to the series for ``label_values``."""
+        values = self.values
+        values[label_values] = values.get(label_values, 0) + amount
+
+    def samples(self) -> Iterable[str]:
+        """Yield one exposition line per label set."""
+        for label_values, value in self.values.items():
+            labels = _format_labels(self.labels, label_values)
+            yield f"{self.name}{labels} {_format_value(value)}"
+
+
+class Gauge(Counter):
+    """Value that can go up and down, optionally split by label values."""
+
+    kind = "gauge"
+
+    def set(self, *label_values: object, value: float) -> None:
+        """Replace the value of the series for ``label_values``."""
+        self.values[label_values] = value
+
+    def dec(self, *label_values: object, amount: float = 1) -> None:
+        """Subtract ``amount`` from the series for ``label_values``."""
+        self.inc(*label_values, amount=-amount)
+
+
+class Histogram:
+    """Cumulative histogram with fixed buckets, split by label values.
+
+    Each label set stores per-bucket counts (not yet cumulative), the sum and
+    the count, so ``observe`` is one bisect plus three additions.
+    """
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labels: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> None:
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        self.values: Dict[LabelValues, List[float]] = {}
+
+    def observe(self, value: float, *label_values: object) -> None:
+        """Record one observation for ``label_values``."""
+        series = self.values.get(label_values)
+        if series is None:
+            # One slot per bucket, one for +Inf, then sum.
+            series = self.values[label_values] = [0] * (len(self.buckets) + 2)
+        series[bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def snapshot(self, *label_values: object) -> Dict[str, float]:
+        """Return count and sum for a label set (zeros if never observed)."""
+        series = self.values.get(label_values)
+        if series is None:
+            return {"count": 0, "sum": 0.0}
+        return {"count": sum(series[:-1]), "sum": series[-1]}
+
+    def quantile(self, q: float, *label_values: object) -> float:
+        """Estimate a quantile as the upper bound of the bucket containing it."""
+        series = self.values.get(label_values)
+        if not series:
+            return 0.0
+        total = sum(series[:-1])
+        rank = q * total
+        running = 0
+        for bound, count in zip(self.buckets, series):
+            running += count
+            if running >= rank:
+                return bound
+        return float("inf")
+
+    def samples(self) -> Iterable[str]:
+        """Yield cumulative bucket, sum and count lines per label set."""
+        for label_values, series in self.values.items():
+            running = 0
+            for bound, count in zip(self.buckets, series):
+                running += count
+                labels = _format_labels(self.labels, label_values, f'le="{bound}"')
+                yield f"{self.name}_bucket{labels} {running}"
+            running += series[len(self.buckets)]
+            labels = _format_labels(self.labels, label_values, 'le="+Inf"')
+            yield f"{self.name}_bucket{labels} {running}"
+            labels = _format_labels(self.labels, label_values)
+            yield f"{self.name}_sum{labels} {_format_value(series[-1])}"
+            yield f"{self.name}_count{labels} {running}"
+
+
+Metric = Counter | Histogram
+
+
+class MetricsRegistry:
+    """Collection of metrics rendered together in Prometheus text format.
+
+    Besides metric objects, callables returning ready-made metric objects can
+    be registered as collectors; they run only when metrics are scraped.
+    """
+
+    def __init__(self) -> None:
+        self.metrics: Dict[str, Metric] = {}
+        self.collectors: Dict[str, Callable[[], Iterable[Metric]]] = {}
+
+    def register(self, metric: Metric) -> Metric:
+        """Add ``metric``; if the name is taken, return the existing metric."""
+        existing = self.metrics.get(metric.name)
+        if existing is not None:
+            return existing
+        self.metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help: str, labels: Sequence[str] = ()) -> Counter:
+        """Get or create a counter."""
+        return self.register(Counter(name, help, labels))  # type: ignore[return-value]
+
+    def gauge(self, name: str, help: str, labels: Sequence[str] = ()) -> Gauge:
+        """Get or create a gauge."""
+        return self.register(Gauge(name, help, labels))  # type: ignore[return-value]
+
+    def histogram(
+        self,
+        name: str,
+        help: str,
+        labels: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        """Get or create a histogram."""
+        histogram = Histogram(name, help, labels, buckets)
+        return self.register(histogram)  # type: ignore[return-value]
+
+    def register_collector(
+        self, name: str, collector: Callable[[], Iterable[Metric]]
+    ) -> None:
+        """Register (or replace) the collector called ``name``."""
+        self.collectors[name] = collector
+
+    def reset(self) -> None:
+        """Clear all recorded values, keeping registrations. Used for testing."""
+        for metric in self.metrics.values():
+            metric.values.clear()
+
+    def render(self) -> str:
+        """Render every metric in the Prometheus text exposition format."""
+        metrics: List[Metric] = list(self.metrics.values())
+        for collector in self.collectors.values():
+            metrics.extend(collector())
+
+        lines: List[str] = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
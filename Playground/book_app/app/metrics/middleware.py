@@ -0,0 +1,97 @@
+import asyncio
+from time import perf_counter
+from typing import List
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.metrics import REGISTRY, Counter, MetricsRegistry
+from app.warmup import WARMUP_SCOPE_KEY
+
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware recording request count, status and latency.
+
+    Requests are labelled with the matched route template (e.g.
+    ``/api/books/{book_id:int}/details``), which the router stores in
+    ``scope["route"]``, so raw paths never create new series. Non-HTTP
+    scopes (lifespan, websockets) and warm-up requests are passed straight
+    through.
+    """
+
+    def __init__(self, app: ASGIApp, registry: MetricsRegistry = REGISTRY) -> None:
+        self.app = app
+        self.latency = registry.histogram(
+            "http_request_duration_seconds",
+            "HTTP request latency by method, route template and status code.",
+            ("method", "route", "status"),
+        )
+        self.in_flight = registry.gauge(
+            "http_requests_in_flight", "HTTP requests currently being served."
+        )
+        self.in_flight.set(value=0)
+        registry.register_collector("http_requests_total", self._collect_requests)
+
+    def _collect_requests(self) -> List[Counter]:
+        """Derive request counts from the latency histogram at scrape time."""
+        counter = Counter(
+            "http_requests_total",
+            "HTTP requests by method, route template and status code.",
+            self.latency.labels,
+        )
+        for label_values in list(self.latency.values):
+            counter.values[label_values] = self.latency.snapshot(*label_values)["count"]
+        return [counter]
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope.get(WARMUP_SCOPE_KEY):
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        in_flight = self.in_flight.values
+        in_flight[()] = in_flight.get((), 0) + 1
+        start = perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = perf_counter() - start
+            in_flight[()] = in_flight.get((), 1) - 1
+            route = scope.get("route")
+            self.latency.observe(
+                elapsed,
+                scope["method"],
+                route.path if route is not None else UNMATCHED_ROUTE,
+                status,
+            )
+
+
+async def monitor_event_loop_lag(
+    interval: float = 0.5, registry: MetricsRegistry = REGISTRY
+) -> None:
+    """Measure how late the event loop wakes up from a sleep, until cancelled.
+
+    Lag is the extra delay beyond ``interval``; sustained lag means the loop is
+    blocked by CPU work or synchronous calls.
+    """
+    lag_gauge = registry.gauge(
+        "event_loop_lag_seconds", "Most recent event loop scheduling delay."
+    )
+    lag_histogram = registry.histogram(
+        "event_loop_lag_distribution_seconds", "Event loop scheduling delay."
+    )
+    loop = asyncio.get_running_loop()
+    while True:
+        start = loop.time()
+        await asyncio.sleep(interval)
+        lag = max(loop.time() - start - interval, 0.0)
+        lag_gauge.set(value=lag)
+        lag_histogram.observe(lag)
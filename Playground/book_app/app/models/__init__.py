@@ -1,5 +1,5 @@
 from datetime import datetime
-from typing import Optional
+from typing import Dict, List, Literal, Optional
 
 from pydantic import BaseModel, Field
 
@@ -12,6 +12,58 @@ class Book(BaseModel):
     author: str
     category: str
     updated_at: datetime = Field(default_factory=datetime.now)
+    version: int = Field(default=1, description="Incremented on every update")
+
+
+class ScoredBook(Book):
+    """Response model for a ranked search hit."""
+
+    score: float = Field(..., description="BM25 relevance score")
+
+
+class Suggestion(BaseModel):
+    """Response model for an autocomplete suggestion."""
+
+    text: str = Field(..., description="Matching title or author")
+    kind: Literal["title", "author"] = Field(..., description="Field that matched")
+    books: int = Field(..., description="Number of books with this title or author")
+
+
+class BookChanges(BaseModel):
+    """Response model for delta sync: what changed after a store version."""
+
+    version: int = Field(..., description="Store version to pass as `since` next")
+    reset: bool = Field(
+        ..., description="True if `books` is the whole catalog and replaces the copy"
+    )
+    books: List[Book] = Field(..., description="Books created or updated since")
+    deleted: List[int] = Field(..., description="Ids of books deleted since")
+
+
+class BookStats(BaseModel):
+    """Response model for catalog statistics."""
+
+    version: int = Field(..., description="Store version the counts are from")
+    total: int = Field(..., description="Number of books")
+    categories: Dict[str, int] = Field(..., description="Books per category")
+    authors: Dict[str, int] = Field(..., description="Books per author")
+    last_updated_at: Optional[datetime] = Field(
+        ..., description="Time of the latest create, update or delete"
+    )
+
+
+class DuplicateCluster(BaseModel):
+    """Response model for a group of books that look like duplicates."""
+
+    books: List[Book] = Field(..., description="Books in the cluster, by id")
+    exact: bool = Field(
+        ...,
+        description="True if titles and authors differ only in case, accents, "
+        "punctuation or spacing",
+    )
+    similarity: float = Field(
+        ..., description="Lowest similarity (0-1) linking the cluster"
+    )
 
 
 class AddBookDto(BaseModel):
@@ -0,0 +1,166 @@
+import cProfile
+import hmac
+import logging
+import re
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+PROFILING_TOKEN_ENV = "PROFILING_TOKEN"
+PROFILING_DIR_ENV = "PROFILING_DIR"
+PROFILE_HEADER = "x-profile-token"
+PROFILE_ID_HEADER = "x-profile-id"
+PROFILE_ROUTES_PREFIX = "/debug/profile"
+
+logger = logging.getLogger(__name__)
+
+_UNSAFE_CHARS = re.compile(r"[^A-Za-z0-9_.-]+")
+
+
+class RequestProfiler:
+    """Admin-triggered cProfile capture of individual requests.
+
+    A request is profiled when it carries the admin token in the
+    ``X-Profile-Token`` header, or while the profiler is armed for the next N
+    requests or until a deadline. Only one request is profiled at a time;
+    cProfile follows every thread, so a profile also contains whatever else
+    the process ran while the request was in flight.
+    """
+
+    def __init__(self, token: str, output_dir: Path, keep: int = 50) -> None:
+        self.token = token.encode()
+        self.output_dir = output_dir
+        self.keep = keep
+        self.remaining = 0
+        self.deadline = 0.0
+        self.active = False
+        self._sequence = 0
+
+    def check_token(self, token: Optional[str]) -> bool:
+        """Return True if ``token`` matches the admin token."""
+        return token is not None and hmac.compare_digest(token.encode(), self.token)
+
+    def arm(self, requests: int = 0, seconds: float = 0.0) -> None:
+        """Start profiling requests.
+
+        Profiles the next ``requests`` requests and every request for the next
+        ``seconds`` seconds; either may be 0.
+        """
+        self.remaining = max(requests, 0)
+        self.deadline = time.monotonic() + seconds if seconds > 0 else 0.0
+
+    def disarm(self) -> None:
+        """Stop profiling armed requests."""
+        self.remaining = 0
+        self.deadline = 0.0
+
+    def status(self) -> Dict[str, Any]:
+        """Describe the current arming state."""
+        return {
+            "remaining_requests": self.remaining,
+            "seconds_left": max(self.deadline - time.monotonic(), 0.0),
+            "active": self.active,
+        }
+
+    def claim(self, scope: Scope) -> bool:
+        """Decide whether to profile the request in ``scope``."""
+        if self.active or scope["path"].startswith(PROFILE_ROUTES_PREFIX):
+            return False
+        if self.remaining:
+            self.remaining -= 1
+            return True
+        if self.deadline:
+            if time.monotonic() < self.deadline:
+                return True
+            self.deadline = 0.0
+        for name, value in scope["headers"]:
+            if name == PROFILE_HEADER.encode():
+                return self.check_token(value.decode("latin-1"))
+        return False
+
+    def profile_name(self, scope: Scope) -> str:
+        """Build a unique file name from the time, method and route template."""
+        route = scope.get("route")
+        path = route.path if route is not None else scope["path"]
+        self._sequence += 1
+        return "{}_{:04d}_{}_{}.pstats".format(
+            time.strftime("%Y%m%dT%H%M%S", time.gmtime()),
+            self._sequence % 10000,
+            scope["method"],
+            _UNSAFE_CHARS.sub("_", path).strip("_") or "root",
+        )
+
+    def save(self, profile: cProfile.Profile, name: str) -> None:
+        """Write ``profile`` to ``name`` in the output folder."""
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        profile.dump_stats(self.output_dir / name)
+        self._prune()
+
+    def list_profiles(self) -> List[Dict[str, Any]]:
+        """List saved profiles, newest first."""
+        if not self.output_dir.exists():
+            return []
+        files = sorted(
+            self.output_dir.glob("*.pstats"),
+            key=lambda path: path.stat().st_mtime,
+            reverse=True,
+        )
+        return [{"name": path.name, "bytes": path.stat().st_size} for path in files]
+
+    def profile_path(self, name: str) -> Optional[Path]:
+        """Resolve a saved profile by name, refusing anything outside the folder."""
+        if _UNSAFE_CHARS.search(name) or not name.endswith(".pstats"):
+            return None
+        path = self.output_dir / name
+        return path if path.is_file() else None
+
+    def _prune(self) -> None:
+        for stale in self.list_profiles()[self.keep :]:
+            (self.output_dir / stale["name"]).unlink(missing_ok=True)
+
+
+class ProfilingMiddleware:
+    """ASGI middleware that runs claimed requests under cProfile.
+
+    Only installed when profiling is enabled, so it costs nothing otherwise.
+    The profile's name is returned in the ``X-Profile-Id`` response header and
+    the file is written once the request has finished.
+    """
+
+    def __init__(self, app: ASGIApp, profiler: RequestProfiler) -> None:
+        self.app = app
+        self.profiler = profiler
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not self.profiler.claim(scope):
+            await self.app(scope, receive, send)
+            return
+
+        profile = cProfile.Profile()
+        name = ""
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal name
+            if message["type"] == "http.response.start":
+                # The route is resolved by now, so the name can include it.
+                name = self.profiler.profile_name(scope)
+                headers = list(message.get("headers", []))
+                headers.append((PROFILE_ID_HEADER.encode(), name.encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        self.profiler.active = True
+        try:
+            profile.enable()
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                profile.disable()
+                if not name:
+                    name = self.profiler.profile_name(scope)
+                self.profiler.save(profile, name)
+                logger.info("Saved request profile: %s", name)
+        finally:
+            self.profiler.active = False
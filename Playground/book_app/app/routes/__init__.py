@@ -1,57 +1,290 @@
 import logging
 from datetime import datetime
-from typing import Optional
+from typing import Optional, Union
 
-from fastapi import APIRouter, Body, status, HTTPException
-from app.models import Book, AddBookDto, UpdateBookDto
+from fastapi import (
+    APIRouter,
+    Body,
+    Depends,
+    Header,
+    Query,
+    Response,
+    status,
+    HTTPException,
+)
+from fastapi.responses import JSONResponse, StreamingResponse
+from app.changefeed import FeedFull, feed
+from app.logger import get_read_logger
+from app.models import (
+    Book,
+    AddBookDto,
+    BookChanges,
+    BookStats,
+    DuplicateCluster,
+    ScoredBook,
+    Suggestion,
+    UpdateBookDto,
+)
 from app.db import (
     increment_book_id,
+    search_books_ranked as db_search_books_ranked,
+    suggest_books as db_suggest_books,
     get_all_books as db_get_all_books,
+    get_changes_since as db_get_changes_since,
+    get_stats as db_get_stats,
+    find_duplicates as db_find_duplicates,
+    find_duplicate_clusters as db_find_duplicate_clusters,
+    compare_and_swap_book as db_compare_and_swap_book,
     get_book_by_title as db_get_book_by_title,
     get_book_by_id as db_get_book_by_id,
     create_book as db_create_book,
-    update_book as db_update_book,
     delete_book as db_delete_book,
+    index_built,
 )
+from app.db.executor import run_in_store
+from app.db.sort_index import SORTABLE_FIELDS
+from app.routes.projection import Fields, fields_param, projected, projected_rows
 
 logger = logging.getLogger(__name__)
+read_logger = get_read_logger(__name__)
 
 router = APIRouter(prefix="/api/books", tags=["Book"])
 
+book_fields = fields_param(Book)
+scored_book_fields = fields_param(ScoredBook)
+
+_SORT_FIELD = f"-?({'|'.join(SORTABLE_FIELDS)})"
+SORT_PATTERN = rf"^{_SORT_FIELD}(,{_SORT_FIELD})*$"
+
+# Times an update without If-Match is retried after losing a race.
+UPDATE_ATTEMPTS = 5
+
+
+def _etag(book: Book) -> str:
+    """Return the entity tag of ``book``: its quoted version."""
+    return f'"{book.version}"'
+
+
+def _if_match(if_match: Optional[str], book: Book) -> bool:
+    """Whether ``book`` satisfies an If-Match header; no header or ``*`` always does."""
+    if if_match is None or if_match.strip() == "*":
+        return True
+    return _etag(book) in (tag.strip() for tag in if_match.split(","))
+
+
+def _precondition_failed(book: Book) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_412_PRECONDITION_FAILED,
+        detail=f"Book with id: {book.id} has changed (now at version {book.version})",
+        headers={"ETag": _etag(book)},
+    )
+
 
 @router.get(
     "",
     status_code=status.HTTP_200_OK,
     response_model=list[Book],
 )
-def get_all_books(category: Optional[str] = None) -> list[Book]:
-    """Retrieve all books from the database, optionally filtered by category."""
-    logger.info("Retrieving books from database")
+async def get_all_books(
+    category: Optional[str] = None,
+    sort: Optional[str] = Query(
+        None,
+        pattern=SORT_PATTERN,
+        description=(
+            "Comma-separated fields to sort by, `-` for descending, e.g. "
+            "`-updated_at,title`; insertion order by default"
+        ),
+    ),
+    offset: int = Query(0, ge=0, description="Books to skip"),
+    limit: Optional[int] = Query(None, ge=1, description="Maximum number of books"),
+    fields: Fields = Depends(book_fields),
+) -> Union[list[Book], Response]:
+    """Retrieve books, optionally filtered by category, sorted, paged and projected."""
+    logger.debug(
+        "Retrieving books from database: category=%s, sort=%s, offset=%s, limit=%s",
+        category,
+        sort,
+        offset,
+        limit,
+    )
 
-    books = db_get_all_books(category)
+    books = await run_in_store(
+        db_get_all_books,
+        category,
+        sort,
+        offset,
+        limit,
+        heavy=sort is not None and not index_built("sort"),
+    )
 
-    logger.info(f"Retrieved {len(books)} book(s)")
+    read_logger.info("Retrieved %d book(s)", len(books))
+    if fields:
+        return projected(Book, fields, books)
     return books
 
 
+@router.get(
+    "/search",
+    status_code=status.HTTP_200_OK,
+    response_model=list[ScoredBook],
+)
+async def search_books(
+    q: str = Query(..., min_length=1, description="Words to look for"),
+    limit: int = Query(10, ge=1, le=100, description="Maximum number of hits"),
+    fields: Fields = Depends(scored_book_fields),
+) -> Union[list[ScoredBook], Response]:
+    """Rank books containing every word of ``q`` by BM25 relevance."""
+    logger.debug("Searching books: q=%s, limit=%s", q, limit)
+
+    hits = await run_in_store(
+        db_search_books_ranked, q, limit, heavy=not index_built("search")
+    )
+
+    read_logger.info("Search returned %d book(s)", len(hits))
+    if fields:
+        # Serialized from the hits; no ScoredBook is built just to be cut down.
+        return projected_rows(
+            ScoredBook,
+            fields,
+            ({**book.__dict__, "score": round(score, 4)} for book, score in hits),
+        )
+    return [
+        ScoredBook(**book.model_dump(), score=round(score, 4)) for book, score in hits
+    ]
+
+
+@router.get(
+    "/suggest",
+    status_code=status.HTTP_200_OK,
+    response_model=list[Suggestion],
+)
+async def suggest_books(
+    prefix: str = Query(..., min_length=1, description="Start of a title or author"),
+    limit: int = Query(10, ge=1, le=50, description="Maximum number of suggestions"),
+) -> list[Suggestion]:
+    """Suggest titles and authors starting with ``prefix`` (case-insensitive)."""
+    suggestions = await run_in_store(
+        db_suggest_books, prefix, limit, heavy=not index_built("prefix")
+    )
+    return [
+        Suggestion(text=text, kind=kind, books=books)
+        for text, kind, books in suggestions
+    ]
+
+
+@router.get(
+    "/changes",
+    status_code=status.HTTP_200_OK,
+    response_model=BookChanges,
+)
+async def get_book_changes(
+    since: int = Query(
+        0, ge=0, description="Version of the last sync; 0 for a full copy"
+    ),
+) -> BookChanges:
+    """Return books created or updated and ids deleted after version ``since``.
+
+    Pass the returned ``version`` as ``since`` next time. If ``reset`` is set,
+    ``books`` is the whole catalog and replaces the local copy.
+    """
+    changes = await run_in_store(db_get_changes_since, since)
+
+    read_logger.info(
+        "Changes since %d: %d book(s), %d deletion(s), reset=%s",
+        since,
+        len(changes.books),
+        len(changes.deleted),
+        changes.reset,
+    )
+    return changes
+
+
+@router.get(
+    "/stats",
+    status_code=status.HTTP_200_OK,
+    response_model=BookStats,
+)
+async def get_book_stats() -> BookStats:
+    """Return book counts in total, per category and per author, and the latest change.
+
+    Served from counters kept up to date by every write; no book is read.
+    """
+    return await run_in_store(db_get_stats)
+
+
+@router.get(
+    "/duplicates",
+    status_code=status.HTTP_200_OK,
+    response_model=list[DuplicateCluster],
+)
+async def get_duplicate_clusters() -> list[DuplicateCluster]:
+    """Find groups of books that look like duplicates of each other.
+
+    Titles and authors equal after folding case, accents, punctuation and
+    spacing are exact duplicates; others are near duplicates found with
+    MinHash and LSH. The scan takes time linear in the catalog size.
+    """
+    clusters = await run_in_store(db_find_duplicate_clusters, heavy=True)
+    read_logger.info("Duplicate scan found %d cluster(s)", len(clusters))
+    return clusters
+
+
+@router.get(
+    "/events",
+    response_class=StreamingResponse,
+    responses={200: {"content": {"text/event-stream": {}}}, 503: {}},
+)
+async def book_events(
+    since: Optional[int] = Query(
+        None, ge=0, description="Resume after this event id (default: now)"
+    ),
+    last_event_id: Optional[int] = Header(None, ge=0),
+) -> StreamingResponse:
+    """Stream book changes as server-sent events.
+
+    Events are ``create``, ``update`` and ``delete`` with the book (or its id)
+    as JSON, and ``reset`` when the client must reload everything. A
+    reconnecting EventSource resumes after its ``Last-Event-ID``.
+    """
+    resume = last_event_id if last_event_id is not None else since
+    try:
+        subscriber, backlog = feed.subscribe(resume)
+    except FeedFull:
+        return JSONResponse(
+            {"detail": "Too many change feed subscribers"},
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            headers={"Retry-After": "5"},
+        )
+    return StreamingResponse(
+        feed.stream(subscriber, backlog),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @router.get(
     "/{book_id:int}/details",
     status_code=status.HTTP_200_OK,
     response_model=Book,
 )
-def get_book_details(book_id: int) -> Book:
-    """Retrieve a book by its unique ID."""
-    logger.info(f"Retrieving book with id: {book_id}")
+async def get_book_details(
+    book_id: int, response: Response, fields: Fields = Depends(book_fields)
+) -> Union[Book, Response]:
+    """Retrieve a book by its unique ID, with its version as the ETag."""
+    logger.debug("Retrieving book with id: %s", book_id)
 
-    book = db_get_book_by_id(book_id)
+    book = await run_in_store(db_get_book_by_id, book_id)
     if not book:
-        logger.warning(f"Book not found with id: {book_id}")
+        logger.warning("Book not found with id: %s", book_id)
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Book with id: {book_id} not found",
         )
 
-    logger.info(f"Retrieved book: id={book.id}, title={book.title}")
+    read_logger.info("Retrieved book: id=%s, title=%s", book.id, book.title)
+    if fields:
+        return projected(Book, fields, book, headers={"ETag": _etag(book)})
+    response.headers["ETag"] = _etag(book)
     return book
 
 
@@ -60,19 +293,24 @@ def get_book_details(book_id: int) -> Book:
     status_code=status.HTTP_200_OK,
     response_model=Book,
 )
-def get_book(title: str) -> Book:
-    """Retrieve a book by its title (case-insensitive)."""
-    logger.info(f"Retrieving book with title: {title}")
+async def get_book(
+    title: str, response: Response, fields: Fields = Depends(book_fields)
+) -> Union[Book, Response]:
+    """Retrieve a book by its title (case-insensitive), with its ETag."""
+    logger.debug("Retrieving book with title: %s", title)
 
-    book = db_get_book_by_title(title)
+    book = await run_in_store(db_get_book_by_title, title)
     if not book:
-        logger.warning(f"Book not found with title: {title}")
+        logger.warning("Book not found with title: %s", title)
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Book with title: {title} not found",
         )
 
-    logger.info(f"Retrieved book: id={book.id}, title={book.title}")
+    read_logger.info("Retrieved book: id=%s, title=%s", book.id, book.title)
+    if fields:
+        return projected(Book, fields, book, headers={"ETag": _etag(book)})
+    response.headers["ETag"] = _etag(book)
     return book
 
 
@@ -81,9 +319,29 @@ def get_book(title: str) -> Book:
     status_code=status.HTTP_201_CREATED,
     response_model=Book,
 )
-async def create_book(request: AddBookDto = Body()) -> Book:
-    """Create a new book in the database."""
-    logger.info(f"Creating new book: title={request.title}, author={request.author}")
+async def create_book(
+    request: AddBookDto = Body(),
+    check_duplicates: bool = Query(
+        False, description="Refuse with 409 if the book looks like an existing one"
+    ),
+) -> Book:
+    """Create a new book in the database, optionally refusing likely duplicates."""
+    logger.info("Creating new book: title=%s, author=%s", request.title, request.author)
+
+    if check_duplicates:
+        duplicates = await run_in_store(
+            db_find_duplicates,
+            request.title,
+            request.author,
+            heavy=not index_built("duplicate"),
+        )
+        if duplicates:
+            ids = ", ".join(str(book.id) for book, _ in duplicates)
+            logger.warning("Possible duplicate of book(s) %s rejected", ids)
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail=f"Book looks like a duplicate of book(s) with id: {ids}",
+            )
 
     book_id = await increment_book_id()
     new_book = Book(
@@ -93,9 +351,9 @@ async def create_book(request: AddBookDto = Body()) -> Book:
         category=request.category,
         updated_at=datetime.now(),
     )
-    db_create_book(new_book)
+    await run_in_store(db_create_book, new_book)
 
-    logger.info(f"Created book: id={new_book.id}, title={new_book.title}")
+    logger.info("Created book: id=%s, title=%s", new_book.id, new_book.title)
     return new_book
 
 
@@ -103,44 +361,78 @@ async def create_book(request: AddBookDto = Body()) -> Book:
     "/{book_id:int}",
     status_code=status.HTTP_204_NO_CONTENT,
 )
-def update_book(book_id: int, request: UpdateBookDto = Body()) -> None:
-    """Update an existing book by its ID."""
-    logger.info(f"Updating book with id: {book_id}")
+async def update_book(
+    book_id: int,
+    response: Response,
+    request: UpdateBookDto = Body(),
+    if_match: Optional[str] = Header(None),
+) -> None:
+    """Update an existing book by its ID.
 
-    existing_book = db_get_book_by_id(book_id)
-    if not existing_book:
-        logger.warning(f"Book not found for update: id={book_id}")
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Book with id: {book_id} not found",
-        )
+    The stored book is never changed in place: a new version is swapped in
+    only if nobody else changed the book since it was read. With
+    ``If-Match``, a book at another version fails with 412. Without it, the
+    update is re-applied to the newer version. The new ETag is returned.
+    """
+    logger.info("Updating book with id: %s", book_id)
+    changes = request.model_dump(exclude_none=True)
+
+    for _ in range(UPDATE_ATTEMPTS):
+        existing_book = await run_in_store(db_get_book_by_id, book_id)
+        if not existing_book:
+            logger.warning("Book not found for update: id=%s", book_id)
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Book with id: {book_id} not found",
+            )
+        if not _if_match(if_match, existing_book):
+            logger.warning("Stale update of book id=%s rejected", book_id)
+            raise _precondition_failed(existing_book)
 
-    if request.title is not None:
-        existing_book.title = request.title
-    if request.author is not None:
-        existing_book.author = request.author
-    if request.category is not None:
-        existing_book.category = request.category
-    existing_book.updated_at = datetime.now()
+        updated_book = existing_book.model_copy(
+            update={**changes, "updated_at": datetime.now()}
+        )
+        swapped = await run_in_store(
+            db_compare_and_swap_book, book_id, existing_book.version, updated_book
+        )
+        if swapped:
+            response.headers["ETag"] = _etag(updated_book)
+            logger.info(
+                "Updated book: id=%s, title=%s", updated_book.id, updated_book.title
+            )
+            return
+        logger.info("Book id=%s changed concurrently, retrying update", book_id)
 
-    db_update_book(book_id, existing_book)
-    logger.info(f"Updated book: id={existing_book.id}, title={existing_book.title}")
+    raise HTTPException(
+        status_code=status.HTTP_409_CONFLICT,
+        detail=f"Book with id: {book_id} is changing too often, try again",
+    )
 
 
 @router.delete(
     "/{book_id:int}",
     status_code=status.HTTP_204_NO_CONTENT,
 )
-def delete_book(book_id: int) -> None:
-    """Delete a book by its ID."""
-    logger.info(f"Deleting book with id: {book_id}")
+async def delete_book(book_id: int, if_match: Optional[str] = Header(None)) -> None:
+    """Delete a book by its ID; with ``If-Match``, only at that version (else 412)."""
+    logger.info("Deleting book with id: %s", book_id)
+
+    expected_version = None
+    if if_match is not None:
+        existing_book = await run_in_store(db_get_book_by_id, book_id)
+        if existing_book and not _if_match(if_match, existing_book):
+            raise _precondition_failed(existing_book)
+        expected_version = existing_book.version if existing_book else None
 
-    deleted = db_delete_book(book_id)
+    deleted = await run_in_store(db_delete_book, book_id, expected_version)
     if not deleted:
-        logger.warning(f"Book not found for deletion: id={book_id}")
+        current = await run_in_store(db_get_book_by_id, book_id)
+        if current is not None:
+            raise _precondition_failed(current)
+        logger.warning("Book not found for deletion: id=%s", book_id)
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Book with id: {book_id} not found",
         )
 
-    logger.info(f"Deleted book with id: {book_id}")
+    logger.info("Deleted book with id: %s", book_id)
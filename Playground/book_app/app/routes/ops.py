@@ -0,0 +1,33 @@
+from typing import Any, Dict
+
+from fastapi import APIRouter, Request, status
+from fastapi.responses import JSONResponse, PlainTextResponse
+
+from app.db.instrumentation import db_stats
+from app.metrics import REGISTRY
+
+router = APIRouter(tags=["Ops"])
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def metrics() -> PlainTextResponse:
+    """Expose in-process metrics in Prometheus text format."""
+    return PlainTextResponse(REGISTRY.render(), media_type=PROMETHEUS_CONTENT_TYPE)
+
+
+@router.get("/ready")
+async def ready(request: Request) -> JSONResponse:
+    """Readiness probe: 503 until the startup warm-up has finished."""
+    if request.app.state.ready:
+        return JSONResponse({"status": "ready"})
+    return JSONResponse(
+        {"status": "warming up"}, status_code=status.HTTP_503_SERVICE_UNAVAILABLE
+    )
+
+
+@router.get("/debug/db")
+async def db_debug() -> Dict[str, Any]:
+    """Per-operation book store statistics (requires ``DB_INSTRUMENTATION=1``)."""
+    return db_stats.summary()
@@ -0,0 +1,74 @@
+from typing import Any, Dict, List, Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Request, status
+from fastapi.responses import FileResponse
+
+from app.profiling import RequestProfiler
+
+
+def get_profiler(
+    request: Request, x_profile_token: Optional[str] = Header(default=None)
+) -> RequestProfiler:
+    """Return the app's profiler if the caller presents the admin token."""
+    profiler: RequestProfiler = request.app.state.profiler
+    if not profiler.check_token(x_profile_token):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="A valid X-Profile-Token header is required",
+        )
+    return profiler
+
+
+router = APIRouter(prefix="/debug", tags=["Profiling"])
+
+
+@router.get("/profile")
+def get_profiling_status(
+    profiler: RequestProfiler = Depends(get_profiler),
+) -> Dict[str, Any]:
+    """Show whether profiling is armed and how much of it is left."""
+    return profiler.status()
+
+
+@router.post("/profile")
+def arm_profiling(
+    requests: int = 0,
+    seconds: float = 0.0,
+    profiler: RequestProfiler = Depends(get_profiler),
+) -> Dict[str, Any]:
+    """Profile the next N requests and/or every request for a time window."""
+    if requests <= 0 and seconds <= 0:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Pass requests > 0 and/or seconds > 0",
+        )
+    profiler.arm(requests=requests, seconds=seconds)
+    return profiler.status()
+
+
+@router.delete("/profile", status_code=status.HTTP_204_NO_CONTENT)
+def disarm_profiling(profiler: RequestProfiler = Depends(get_profiler)) -> None:
+    """Stop profiling armed requests."""
+    profiler.disarm()
+
+
+@router.get("/profiles")
+def list_profiles(
+    profiler: RequestProfiler = Depends(get_profiler),
+) -> List[Dict[str, Any]]:
+    """List saved profiles, newest first."""
+    return profiler.list_profiles()
+
+
+@router.get("/profiles/{name}")
+def download_profile(
+    name: str, profiler: RequestProfiler = Depends(get_profiler)
+) -> FileResponse:
+    """Download a saved profile (load it with ``pstats.Stats(path)``)."""
+    path = profiler.profile_path(name)
+    if path is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Profile: {name} not found",
+        )
+    return FileResponse(path, media_type="application/octet-stream", filename=name)
@@ -0,0 +1,109 @@
+from functools import lru_cache
+from typing import Any, Callable, Dict, FrozenSet, Iterable, Optional, Type
+
+from fastapi import Query
+from fastapi.responses import Response
+from pydantic import BaseModel, TypeAdapter
+from pydantic_core import SchemaSerializer, core_schema
+
+Fields = Optional[FrozenSet[str]]
+
+
+class Projection:
+    """Precomputed JSON serializers for a subset of a model's fields.
+
+    Instances are serialized from their attribute dicts through a TypedDict
+    schema that only knows the requested fields, so the other fields are
+    skipped rather than converted and then dropped.
+    """
+
+    def __init__(self, model: Type[BaseModel], fields: FrozenSet[str]) -> None:
+        item = core_schema.typed_dict_schema(
+            {
+                name: core_schema.typed_dict_field(
+                    TypeAdapter(field.annotation).core_schema
+                )
+                for name, field in model.model_fields.items()
+                if name in fields
+            },
+            total=False,
+        )
+        self._one = SchemaSerializer(item)
+        self._many = SchemaSerializer(core_schema.list_schema(item))
+
+    def one(self, instance: BaseModel) -> bytes:
+        """Serialize the projected fields of ``instance`` as a JSON object."""
+        return self._one.to_json(instance.__dict__)
+
+    def many(self, instances: Iterable[BaseModel]) -> bytes:
+        """Serialize the projected fields of ``instances`` as a JSON array."""
+        return self.rows(instance.__dict__ for instance in instances)
+
+    def rows(self, rows: Iterable[Dict[str, Any]]) -> bytes:
+        """Serialize the projected fields of field dicts as a JSON array.
+
+        Lets callers skip building model instances; keys that are not
+        projected are ignored.
+        """
+        return self._many.to_json(list(rows))
+
+
+@lru_cache(maxsize=256)
+def get_projection(model: Type[BaseModel], fields: FrozenSet[str]) -> Projection:
+    """Return the (cached) projection of ``model`` onto ``fields``."""
+    return Projection(model, fields)
+
+
+def fields_param(model: Type[BaseModel]) -> Callable[..., Fields]:
+    """Build a dependency parsing the ``fields`` query parameter for ``model``.
+
+    Only the model's field names are accepted, which the OpenAPI schema shows
+    as a pattern. No parameter means all fields.
+    """
+    names = list(model.model_fields)
+    choice = "|".join(names)
+
+    def dependency(
+        fields: Optional[str] = Query(
+            None,
+            pattern=rf"^({choice})(,({choice}))*$",
+            description=(
+                "Comma-separated fields to return, e.g. `id,title`; all by "
+                f"default. One of: {', '.join(names)}."
+            ),
+        ),
+    ) -> Fields:
+        return frozenset(fields.split(",")) if fields else None
+
+    return dependency
+
+
+def projected(
+    model: Type[BaseModel],
+    fields: FrozenSet[str],
+    content: Any,
+    headers: Optional[Dict[str, str]] = None,
+) -> Response:
+    """Return a JSON response with only ``fields`` of ``content``.
+
+    ``content`` is one ``model`` instance or a list of them.
+    """
+    projection = get_projection(model, fields)
+    body = (
+        projection.many(content)
+        if isinstance(content, list)
+        else projection.one(content)
+    )
+    return Response(body, media_type="application/json", headers=headers)
+
+
+def projected_rows(
+    model: Type[BaseModel], fields: FrozenSet[str], rows: Iterable[Dict[str, Any]]
+) -> Response:
+    """Return a JSON array response with only ``fields`` of each of ``rows``.
+
+    ``rows`` are dicts of ``model``'s fields, e.g. a book's ``__dict__`` plus
+    computed fields, serialized without validating them into instances.
+    """
+    body = get_projection(model, fields).rows(rows)
+    return Response(body, media_type="application/json")
@@ -1,25 +1,82 @@
 import logging
-from typing import Optional
+from functools import lru_cache
+from pathlib import Path
+from typing import TYPE_CHECKING, Optional
+from urllib.parse import urlencode
 
 from fastapi import APIRouter, Request
 from fastapi.responses import HTMLResponse
-from fastapi.templating import Jinja2Templates
 
-from app.db import get_all_books, get_book_by_id, get_categories, search_books
+from app.changefeed import feed
+from app.db import (
+    count_books,
+    count_search_hits,
+    get_all_books,
+    get_book_by_id,
+    get_categories,
+    get_stats,
+    index_built,
+    search_books,
+    search_books_ranked,
+)
+from app.db.executor import run_in_store
+from app.db.sort_index import parse_sort, sort_books
+
+if TYPE_CHECKING:
+    from fastapi.templating import Jinja2Templates
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(tags=["UI"])
-templates = Jinja2Templates(directory="app/templates")
+# Books per page on the books page.
+BOOKS_PAGE_SIZE = 60
+# Books shown on the home page.
+FEATURED_BOOKS = 6
+# Sort orders offered on the books page, by ``sort`` value.
+SORT_OPTIONS = {
+    "title": "Title (A-Z)",
+    "author": "Author (A-Z)",
+    "-updated_at": "Recently updated",
+}
+
+TEMPLATES_DIR = Path(__file__).resolve().parent.parent / "templates"
+
+# Request header asking for only the changing part of a page (any value).
+FRAGMENT_HEADER = "X-Fragment"
+# Pages with a fragment differ by the header, so caches must keep both apart.
+FRAGMENT_VARY = {"Vary": FRAGMENT_HEADER}
+
+
+def wants_fragment(request: Request) -> bool:
+    """Whether the request asks for a page fragment rather than the page."""
+    return bool(request.headers.get(FRAGMENT_HEADER))
+
+
+def _page_url(request: Request, page: int) -> str:
+    params = {**request.query_params, "page": str(page)}
+    if page == 1:
+        del params["page"]
+    return f"{request.url.path}?{urlencode(params)}" if params else request.url.path
+
+
+@lru_cache(maxsize=None)
+def get_templates() -> "Jinja2Templates":
+    """Build the Jinja2 environment on the first page render.
+
+    Importing Jinja2 and creating the environment is skipped entirely by
+    processes that only serve the API.
+    """
+    from fastapi.templating import Jinja2Templates
+
+    return Jinja2Templates(directory=TEMPLATES_DIR)
 
 
 @router.get("/", response_class=HTMLResponse)
 async def home(request: Request):
     """Home page with featured books."""
-    all_books = get_all_books()
-    categories = get_categories()
-    featured = all_books[:6]
-    return templates.TemplateResponse(
+    featured = await run_in_store(get_all_books, None, None, 0, FEATURED_BOOKS)
+    categories = await run_in_store(get_categories)
+    return get_templates().TemplateResponse(
         "index.html",
         {
             "request": request,
@@ -34,43 +91,92 @@ async def books_page(
     request: Request,
     category: Optional[str] = None,
     search: Optional[str] = None,
+    sort: Optional[str] = None,
+    page: int = 1,
 ):
-    """Books listing page with filters."""
-    categories = get_categories()
+    """Books listing page with filters, sorting and paging.
 
-    books = get_all_books()
-    if category:
-        books = [b for b in books if b.category.casefold() == category.casefold()]
+    With the ``X-Fragment`` header only the results (filter summary, book
+    grid and pager) are rendered, for swapping into a page already shown.
+    """
+    try:
+        spec = parse_sort(sort) if sort else None
+    except ValueError:
+        sort = spec = None
+    category = category or None
+    page = max(page, 1)
+    offset = (page - 1) * BOOKS_PAGE_SIZE
 
     if search:
-        books = search_books(search)
-        if category:
-            books = [b for b in books if b.category.casefold() == category.casefold()]
+        total = await run_in_store(
+            count_search_hits, search, category, heavy=not index_built("search")
+        )
+        if total and not spec:
+            # Best first: rank only the hits up to the end of this page.
+            ranked = await run_in_store(
+                search_books_ranked, search, offset + BOOKS_PAGE_SIZE, category
+            )
+            books = [book for book, _ in ranked[offset:]]
+        else:
+            if total:
+                ranked = await run_in_store(search_books_ranked, search, None, category)
+                books = [book for book, _ in ranked]
+            else:
+                # No whole-word match (e.g. a partial word): fall back to substrings.
+                books = await run_in_store(search_books, search)
+                if category:
+                    folded = category.casefold()
+                    books = [b for b in books if b.category.casefold() == folded]
+                total = len(books)
+            if spec:
+                books = sort_books(books, spec)
+            books = books[offset : offset + BOOKS_PAGE_SIZE]
+    else:
+        total = await run_in_store(count_books, category)
+        books = await run_in_store(
+            get_all_books,
+            category,
+            sort,
+            offset,
+            BOOKS_PAGE_SIZE,
+            heavy=spec is not None and not index_built("sort"),
+        )
 
-    return templates.TemplateResponse(
-        "books.html",
-        {
-            "request": request,
-            "books": books,
-            "categories": categories,
-            "selected_category": category,
-            "search_query": search,
-            "total_books": len(books),
-        },
+    page_count = max(1, -(-total // BOOKS_PAGE_SIZE))
+    context = {
+        "request": request,
+        "books": books,
+        "selected_category": category,
+        "search_query": search,
+        "selected_sort": sort,
+        "total_books": total,
+        "page": page,
+        "page_count": page_count,
+        "previous_page_url": _page_url(request, page - 1) if page > 1 else None,
+        "next_page_url": (_page_url(request, page + 1) if page < page_count else None),
+    }
+    if wants_fragment(request):
+        return get_templates().TemplateResponse(
+            "partials/book_results.html", context, headers=FRAGMENT_VARY
+        )
+    context["categories"] = await run_in_store(get_categories)
+    context["sort_options"] = SORT_OPTIONS
+    return get_templates().TemplateResponse(
+        "books.html", context, headers=FRAGMENT_VARY
     )
 
 
 @router.get("/books/{book_id}", response_class=HTMLResponse)
 async def book_detail(request: Request, book_id: int):
     """Book detail page."""
-    book = get_book_by_id(book_id)
+    book = await run_in_store(get_book_by_id, book_id)
     if not book:
-        return templates.TemplateResponse(
+        return get_templates().TemplateResponse(
             "book_detail.html",
             {"request": request, "book": None, "error": "Book not found"},
             status_code=404,
         )
-    return templates.TemplateResponse(
+    return get_templates().TemplateResponse(
         "book_detail.html",
         {"request": request, "book": book},
     )
@@ -78,15 +184,30 @@ async def book_detail(request: Request, book_id: int):
 
 @router.get("/admin", response_class=HTMLResponse)
 async def admin_dashboard(request: Request):
-    """Admin dashboard for managing books."""
-    books = get_all_books()
-    categories = get_categories()
-    return templates.TemplateResponse(
+    """Admin dashboard for managing books.
+
+    With the ``X-Fragment`` header only the rows of the books table are
+    rendered.
+    """
+    if wants_fragment(request):
+        books = await run_in_store(get_all_books)
+        return get_templates().TemplateResponse(
+            "partials/admin_rows.html",
+            {"request": request, "books": books},
+            headers=FRAGMENT_VARY,
+        )
+    # Read before the books: changes made in between are replayed, not lost.
+    feed_version = feed.version
+    books = await run_in_store(get_all_books)
+    stats = await run_in_store(get_stats)
+    return get_templates().TemplateResponse(
         "admin/dashboard.html",
         {
             "request": request,
             "books": books,
-            "categories": categories,
-            "total_books": len(books),
+            "categories": sorted(stats.categories),
+            "total_books": stats.total,
+            "feed_version": feed_version,
         },
+        headers=FRAGMENT_VARY,
     )
@@ -0,0 +1,190 @@
+import asyncio
+import logging
+from time import perf_counter
+from typing import Any, Awaitable, Callable, Dict, List, Tuple
+from urllib.parse import quote
+
+from fastapi import FastAPI
+from starlette.types import Message
+
+from app.config import env_str
+from app.db import (
+    build_prefix_index,
+    build_search_index,
+    build_sort_indexes,
+    count_books,
+    get_categories,
+    snapshot_loaded,
+)
+
+WARMUP_MODE_ENV = "WARMUP_MODE"
+WARMUP_PATHS_ENV = "WARMUP_PATHS"
+WARMUP_MODES = ("background", "blocking", "off")
+# Set in the scope of warm-up requests; the metrics and capture middleware
+# pass such requests straight through.
+WARMUP_SCOPE_KEY = "app.warmup"
+
+API_WARMUP_PATHS = [
+    "/api/books",
+    "/api/books?category=Business",
+    "/api/books/1/details",
+    "/api/books/Atomic Habits",
+    "/api/books/suggest?prefix=a",
+    "/api/books?sort=title&limit=20",
+    "/api/books/stats",
+]
+# The search warms ranked search and its page; search_cache only holds the
+# substring results of searches no whole word matches, which are not warmed.
+UI_WARMUP_PATHS = ["/", "/books", "/books?search=habits", "/books/1", "/admin"]
+# With a snapshot, the paths above and the index builds would decode every
+# book, and the indexes would keep them all in this worker's heap. These read
+# a page or go through the id index; the rest waits for real traffic.
+API_SNAPSHOT_WARMUP_PATHS = [
+    "/api/books?limit=20",
+    "/api/books?category=Business&limit=20",
+    "/api/books/1/details",
+    "/api/books/stats",
+]
+UI_SNAPSHOT_WARMUP_PATHS = ["/", "/books", "/books/1"]
+
+WarmupStep = Callable[[FastAPI], Awaitable[Any]]
+
+logger = logging.getLogger(__name__)
+
+_steps: Dict[str, WarmupStep] = {}
+
+
+def register_warmup_step(name: str, step: WarmupStep) -> None:
+    """Run ``step`` during warm-up, after the steps registered before it.
+
+    Registering a name again replaces the earlier step.
+    """
+    _steps[name] = step
+
+
+async def _load_store(app: FastAPI) -> None:
+    # Counts only: listing would decode every book of a snapshot.
+    count_books()
+    get_categories()
+
+
+async def _build_search_index(app: FastAPI) -> None:
+    if not snapshot_loaded():
+        build_search_index()
+
+
+async def _build_prefix_index(app: FastAPI) -> None:
+    if not snapshot_loaded():
+        build_prefix_index()
+
+
+async def _build_sort_indexes(app: FastAPI) -> None:
+    if not snapshot_loaded():
+        build_sort_indexes()
+
+
+async def _compile_templates(app: FastAPI) -> None:
+    if not app.state.include_ui:
+        return
+    from app.routes.ui import get_templates
+
+    env = get_templates().env
+    for name in env.list_templates():
+        env.get_template(name)
+
+
+async def _build_openapi(app: FastAPI) -> None:
+    app.openapi()
+
+
+async def _send_requests(app: FastAPI) -> None:
+    configured = env_str(WARMUP_PATHS_ENV, "")
+    if configured:
+        paths = [path.strip() for path in configured.split(",") if path.strip()]
+    elif snapshot_loaded():
+        paths = API_SNAPSHOT_WARMUP_PATHS + (
+            UI_SNAPSHOT_WARMUP_PATHS if app.state.include_ui else []
+        )
+    else:
+        paths = API_WARMUP_PATHS + (UI_WARMUP_PATHS if app.state.include_ui else [])
+    for path in paths:
+        status = await warmup_request(app, path)
+        if status >= 500:
+            logger.warning("Warm-up request %s returned %d", path, status)
+
+
+register_warmup_step("store", _load_store)
+register_warmup_step("search_index", _build_search_index)
+register_warmup_step("prefix_index", _build_prefix_index)
+register_warmup_step("sort_indexes", _build_sort_indexes)
+register_warmup_step("templates", _compile_templates)
+register_warmup_step("openapi", _build_openapi)
+register_warmup_step("requests", _send_requests)
+
+
+async def warmup_request(app: FastAPI, path: str) -> int:
+    """Serve ``GET path`` in-process through ``app`` and return the status.
+
+    The request goes through the whole ASGI app, warming its middleware stack
+    too, but is marked with ``WARMUP_SCOPE_KEY`` so it is neither counted in
+    the request metrics nor captured. An error is logged and reported as 500.
+    """
+    path, _, query = path.partition("?")
+    scope: Dict[str, Any] = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": quote(path).encode(),
+        "query_string": query.encode(),
+        "root_path": "",
+        "headers": [(b"host", b"warmup")],
+        "client": None,
+        "server": ("warmup", 80),
+        WARMUP_SCOPE_KEY: True,
+    }
+    status = 0
+
+    async def receive() -> Message:
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message: Message) -> None:
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+
+    try:
+        await app(scope, receive, send)
+    except Exception:
+        # Answered with 500 already; the app re-raises for the server to log.
+        logger.exception("Warm-up request %s raised", path)
+        return 500
+    return status
+
+
+async def warm_up(app: FastAPI) -> List[Tuple[str, float]]:
+    """Run every warm-up step, then mark the app ready.
+
+    A failing step is logged and skipped so a bad warm-up path cannot keep an
+    instance out of rotation. Returns each step's name and duration in seconds.
+    """
+    timings = []
+    started = perf_counter()
+    for name, step in list(_steps.items()):
+        step_started = perf_counter()
+        try:
+            await step(app)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("Warm-up step %s failed", name)
+        timings.append((name, perf_counter() - step_started))
+    app.state.ready = True
+    logger.info(
+        "Warm-up finished in %.1fms: %s",
+        (perf_counter() - started) * 1000,
+        ", ".join(f"{name}={seconds * 1000:.1f}ms" for name, seconds in timings),
+    )
+    return timings
@@ -0,0 +1 @@
+# Performance benchmarks package (run with `python -m benchmarks.<name>`)
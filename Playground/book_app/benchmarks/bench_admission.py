@@ -0,0 +1,169 @@
+"""Show tail latency with and without admission control beyond saturation.
+
+Starts uvicorn in a subprocess with a larger catalog and ``STORE_OFFLOAD=1``,
+so title lookups cost real CPU and requests overlap in the thread pool,
+then offers requests over HTTP at increasing fixed rates: once with
+``ADMISSION_CONTROL`` off and once with small limits. For each run it reports
+throughput of successful responses, the p50/p99 latency of those responses,
+the share of requests shed with 503, and connection errors.
+
+Once the offered rate exceeds capacity, without admission control the backlog
+and everyone's latency grow for as long as the overload lasts; with it,
+latency of admitted requests stays near the bound set by the limits and the
+excess is refused quickly. Note that with the default inline store calls
+a request rarely yields mid-way, so requests seldom overlap and the limits
+have little to act on; queueing then happens in the event loop itself.
+
+Usage:
+    python -m benchmarks.bench_admission [--books 200000]
+        [--rates 10,40,80] [--duration 6]
+        [--limits read=4:8,search=4:8,write=4:8,ui=4:8]
+
+The load generator shares the machine, so keep the offered rates low enough
+that the server, not the client, is the bottleneck (hence the large catalog).
+"""
+
+import argparse
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List
+
+import httpx
+
+from benchmarks.load_test import percentile
+
+ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_LIMITS = "read=4:8,search=4:8,write=4:8,ui=4:8"
+
+SERVER = """
+import sys
+import uvicorn
+from app import create_api_app
+from app.db import load_books
+from benchmarks.bench_storage import synthetic_books
+load_books(synthetic_books(int(sys.argv[1])))
+uvicorn.run(create_api_app(), port=int(sys.argv[2]), log_level="warning")
+"""
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@contextmanager
+def server(books: int, env: Dict[str, str]) -> Iterator[str]:
+    """Run the API in a subprocess and yield its URL once it is ready."""
+    port = _free_port()
+    process = subprocess.Popen(
+        [sys.executable, "-c", SERVER, str(books), str(port)],
+        cwd=ROOT,
+        env={**os.environ, "LOG_LEVEL": "ERROR", "STORE_OFFLOAD": "1", **env},
+    )
+    url = f"http://127.0.0.1:{port}"
+    try:
+        deadline = time.monotonic() + 60
+        while True:
+            try:
+                if httpx.get(f"{url}/ready").status_code == 200:
+                    break
+            except httpx.TransportError:
+                pass
+            if time.monotonic() > deadline or process.poll() is not None:
+                raise RuntimeError("Benchmark server did not become ready")
+            time.sleep(0.1)
+        yield url
+    finally:
+        process.terminate()
+        process.wait()
+
+
+async def drive(url: str, rate: float, duration: float) -> Dict[str, float]:
+    """Send title lookups at a fixed ``rate`` per second for ``duration``.
+
+    Arrivals are open-loop: a new request starts on schedule whether or not
+    earlier ones have finished, as with real users beyond saturation.
+    """
+    ok: List[float] = []
+    shed = errors = 0
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=None)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=120) as client:
+
+        async def one(n: int) -> None:
+            nonlocal shed, errors
+            start = time.perf_counter()
+            try:
+                # A title that misses scans the whole catalog but returns little,
+                # so the server's CPU rather than the client's is the bottleneck.
+                response = await client.get(f"/api/books/Missing title {n}")
+            except httpx.TransportError:
+                errors += 1
+                return
+            if response.status_code == 503:
+                shed += 1
+            else:
+                ok.append(time.perf_counter() - start)
+
+        tasks = []
+        started = time.perf_counter()
+        for n in range(int(rate * duration)):
+            delay = n / rate - (time.perf_counter() - started)
+            if delay > 0:
+                await asyncio.sleep(delay)
+            tasks.append(asyncio.create_task(one(n)))
+        await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - started
+
+    ok.sort()
+    total = len(ok) + shed + errors
+    return {
+        "rps": len(ok) / elapsed,
+        "p50_ms": percentile(ok, 0.50) * 1000,
+        "p99_ms": percentile(ok, 0.99) * 1000,
+        "shed": shed / total if total else 0.0,
+        "errors": errors,
+    }
+
+
+def run(books: int, rates: List[float], duration: float, limits: str) -> None:
+    """Print one row per admission mode and offered request rate."""
+    print(f"books={books} limits={limits}")
+    print(
+        f"{'mode':<10}{'offered':>9}{'ok rps':>10}{'p50 ms':>10}"
+        f"{'p99 ms':>10}{'shed':>8}{'errors':>8}"
+    )
+    modes = {
+        "off": {"ADMISSION_CONTROL": "0"},
+        "on": {"ADMISSION_LIMITS": limits},
+    }
+    for mode, env in modes.items():
+        with server(books, env) as url:
+            for rate in rates:
+                stats = asyncio.run(drive(url, rate, duration))
+                print(
+                    f"{mode:<10}{rate:>9.0f}{stats['rps']:>10.0f}"
+                    f"{stats['p50_ms']:>10.2f}{stats['p99_ms']:>10.2f}"
+                    f"{stats['shed']:>8.1%}{stats['errors']:>8}"
+                )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--books", type=int, default=200_000)
+    parser.add_argument("--rates", default="10,40,80")
+    parser.add_argument("--duration", type=float, default=6.0)
+    parser.add_argument("--limits", default=DEFAULT_LIMITS)
+    args = parser.parse_args()
+    rates = [float(rate) for rate in args.rates.split(",")]
+    run(args.books, rates, args.duration, args.limits)
+
+
+if __name__ == "__main__":
+    main()
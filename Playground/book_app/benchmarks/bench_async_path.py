@@ -0,0 +1,116 @@
+"""Compare thread-pool (sync ``def``) and async-native book routes under load.
+
+Builds three small apps over the same store calls:
+
+- ``threadpool``: plain ``def`` endpoints, dispatched to anyio's thread pool
+  (the previous behaviour of the book routes)
+- ``async``: ``async def`` endpoints calling the store inline (current routes)
+- ``offload``: ``async def`` endpoints with ``STORE_OFFLOAD`` forced on
+
+and drives each at high concurrency over an ASGI transport.
+
+Usage:
+    python -m benchmarks.bench_async_path [--concurrency 400] [--duration 5]
+        [--threads 40]
+"""
+
+import argparse
+import asyncio
+import time
+from typing import Dict, List
+
+import anyio.to_thread
+import httpx
+from fastapi import FastAPI
+
+from app.db import executor, get_all_books, get_book_by_id, reset_books
+from app.models import Book
+from benchmarks.load_test import percentile
+
+
+def build_app(mode: str) -> FastAPI:
+    """Build an app whose endpoints use the given dispatch ``mode``."""
+    app = FastAPI()
+
+    if mode == "threadpool":
+
+        @app.get("/books/{book_id}", response_model=Book)
+        def book_sync(book_id: int) -> Book:
+            return get_book_by_id(book_id)  # type: ignore[return-value]
+
+        @app.get("/books", response_model=list[Book])
+        def books_sync(category: str = "Business") -> list[Book]:
+            return get_all_books(category)
+
+    else:
+
+        @app.get("/books/{book_id}", response_model=Book)
+        async def book_async(book_id: int) -> Book:
+            book = await executor.run_in_store(get_book_by_id, book_id)
+            return book  # type: ignore[return-value]
+
+        @app.get("/books", response_model=list[Book])
+        async def books_async(category: str = "Business") -> list[Book]:
+            return await executor.run_in_store(get_all_books, category)
+
+    return app
+
+
+async def drive(app: FastAPI, concurrency: int, duration: float) -> Dict[str, float]:
+    """Send alternating detail/list requests from ``concurrency`` workers."""
+    latencies: List[float] = []
+    deadline = time.perf_counter() + duration
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://bench"
+    ) as client:
+
+        async def worker(worker_id: int) -> None:
+            n = worker_id
+            while time.perf_counter() < deadline:
+                path = f"/books/{n % 50 + 1}" if n % 2 else "/books"
+                start = time.perf_counter()
+                await client.get(path)
+                latencies.append(time.perf_counter() - start)
+                n += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(i) for i in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "rps": len(latencies) / elapsed,
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+    }
+
+
+async def main_async(concurrency: int, duration: float, threads: int) -> None:
+    anyio.to_thread.current_default_thread_limiter().total_tokens = threads
+    print(f"concurrency={concurrency} threads={threads}")
+    print(f"{'mode':<12}{'rps':>10}{'p50 ms':>10}{'p99 ms':>10}")
+    for mode in ("threadpool", "async", "offload"):
+        reset_books()
+        executor.offload = mode == "offload"
+        try:
+            stats = await drive(build_app(mode), concurrency, duration)
+        finally:
+            executor.offload = False
+        print(
+            f"{mode:<12}{stats['rps']:>10.0f}{stats['p50_ms']:>10.2f}"
+            f"{stats['p99_ms']:>10.2f}"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--concurrency", type=int, default=400)
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--threads", type=int, default=40)
+    args = parser.parse_args()
+    asyncio.run(main_async(args.concurrency, args.duration, args.threads))
+
+
+if __name__ == "__main__":
+    main()
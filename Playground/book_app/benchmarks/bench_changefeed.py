@@ -0,0 +1,93 @@
+"""Cost of pushing one book change to many dashboards vs reloading them.
+
+Connects ``--subscribers`` in-process change feed subscribers, publishes
+``--changes`` updates and reports the time until every subscriber has
+received them, with CPU time and bytes per change per subscriber. For
+comparison it renders ``/admin`` (what each dashboard re-fetched after a
+write before the feed) at the same catalog size.
+
+Usage:
+    python -m benchmarks.bench_changefeed [--books 10000] [--subscribers 100]
+        [--changes 200]
+"""
+
+import argparse
+import asyncio
+import time
+
+import httpx
+
+from app import create_app
+from app.changefeed import ChangeFeed
+from app.db import load_books, reset_books
+from app.metrics import MetricsRegistry
+from benchmarks.bench_storage import synthetic_books
+
+
+async def fan_out(subscribers: int, changes: int, books: list) -> dict:
+    """Publish ``changes`` updates to ``subscribers`` and wait for delivery."""
+    feed = ChangeFeed(
+        buffer_size=changes, max_subscribers=subscribers, registry=MetricsRegistry()
+    )
+    clients = [feed.subscribe()[0] for _ in range(subscribers)]
+
+    async def drain(client) -> int:
+        received = size = 0
+        while received < changes:
+            frames = await client.next_frames(1)
+            received += len(frames)
+            size += sum(len(frame) for frame in frames)
+        return size
+
+    cpu, wall = time.process_time(), time.perf_counter()
+    readers = [asyncio.create_task(drain(client)) for client in clients]
+    for change in range(changes):
+        feed.publish("update", books[change % len(books)])
+    sizes = await asyncio.gather(*readers)
+    cpu, wall = time.process_time() - cpu, time.perf_counter() - wall
+    return {
+        "wall_ms": wall * 1000,
+        "cpu_us": cpu / (changes * subscribers) * 1e6,
+        "bytes": sum(sizes) / (changes * subscribers),
+    }
+
+
+async def reload_cost(runs: int) -> dict:
+    """Time rendering the admin dashboard, as each reload did."""
+    transport = httpx.ASGITransport(app=create_app())
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as c:
+        cpu, wall = time.process_time(), time.perf_counter()
+        for _ in range(runs):
+            response = await c.get("/admin")
+        cpu, wall = time.process_time() - cpu, time.perf_counter() - wall
+    return {"cpu_us": cpu / runs * 1e6, "bytes": len(response.content)}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--books", type=int, default=10_000)
+    parser.add_argument("--subscribers", type=int, default=100)
+    parser.add_argument("--changes", type=int, default=200)
+    args = parser.parse_args()
+
+    books = synthetic_books(args.books)
+    load_books(books)
+    try:
+        feed = asyncio.run(fan_out(args.subscribers, args.changes, books))
+        reload = asyncio.run(reload_cost(5))
+    finally:
+        reset_books()
+    print(f"books={args.books} subscribers={args.subscribers} changes={args.changes}")
+    print(
+        f"change feed: delivered all in {feed['wall_ms']:.0f}ms, "
+        f"{feed['cpu_us']:.1f}us CPU and {feed['bytes']:.0f} bytes "
+        f"per change per dashboard"
+    )
+    print(
+        f"page reload: {reload['cpu_us'] / 1000:.1f}ms CPU and "
+        f"{reload['bytes']} bytes per change per dashboard"
+    )
+
+
+if __name__ == "__main__":
+    main()
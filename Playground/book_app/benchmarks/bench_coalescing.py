@@ -0,0 +1,89 @@
+"""Measure CPU saved by coalescing bursts of identical read requests.
+
+Fires bursts of identical requests for popular URLs (a category listing, a
+search page and the home page) at the app over an ASGI transport, with
+``REQUEST_COALESCING`` off and on, and reports process CPU time and wall time
+per burst plus how many requests were answered from a shared response.
+
+Requests only overlap when a handler yields mid-way, so bursts are run with
+store calls both inline (the default) and offloaded to the thread pool
+(``STORE_OFFLOAD=1``). Inline handlers run to completion one at a time and
+leave nothing to coalesce.
+
+Usage:
+    python -m benchmarks.bench_coalescing [--books 20000] [--burst 50]
+        [--bursts 20]
+"""
+
+import argparse
+import asyncio
+import os
+import time
+from typing import Dict
+from unittest import mock
+
+import httpx
+
+from app import create_app
+from app.db import executor, load_books, reset_books
+from app.metrics import REGISTRY
+from benchmarks.bench_storage import synthetic_books
+
+URLS = ["/api/books?category=Business", "/books?search=habits", "/"]
+
+
+async def run_bursts(burst: int, bursts: int, coalescing: bool) -> Dict[str, float]:
+    """Send ``bursts`` rounds of ``burst`` identical requests per URL."""
+    env = {"REQUEST_COALESCING": "1" if coalescing else "0"}
+    with mock.patch.dict(os.environ, env):
+        app = create_app()
+    REGISTRY.reset()
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as c:
+        cpu, wall = time.process_time(), time.perf_counter()
+        for _ in range(bursts):
+            for url in URLS:
+                responses = await asyncio.gather(*(c.get(url) for _ in range(burst)))
+                assert all(r.status_code == 200 for r in responses)
+        cpu, wall = time.process_time() - cpu, time.perf_counter() - wall
+    counter = REGISTRY.metrics.get("http_requests_coalesced_total")
+    shared = counter.values.get((), 0) if counter is not None else 0
+    rounds = bursts * len(URLS)
+    return {
+        "cpu_ms": cpu / rounds * 1000,
+        "wall_ms": wall / rounds * 1000,
+        "shared": shared / (rounds * burst),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--books", type=int, default=20_000)
+    parser.add_argument("--burst", type=int, default=50)
+    parser.add_argument("--bursts", type=int, default=20)
+    args = parser.parse_args()
+
+    load_books(synthetic_books(args.books))
+    print(f"books={args.books} burst={args.burst} urls={len(URLS)}")
+    print(
+        f"{'store':<10}{'coalescing':<12}{'cpu ms/burst':>14}{'wall ms':>10}"
+        f"{'shared':>8}"
+    )
+    try:
+        for offload in (False, True):
+            executor.offload = offload
+            for coalescing in (False, True):
+                stats = asyncio.run(run_bursts(args.burst, args.bursts, coalescing))
+                print(
+                    f"{'offload' if offload else 'inline':<10}"
+                    f"{'on' if coalescing else 'off':<12}"
+                    f"{stats['cpu_ms']:>14.1f}{stats['wall_ms']:>10.1f}"
+                    f"{stats['shared']:>8.0%}"
+                )
+    finally:
+        executor.offload = False
+        reset_books()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+"""Concurrent read-modify-write on books: in-place, global lock and CAS.
+
+Each of ``--threads`` threads increments a counter kept in a book title
+``--ops`` times, either on one shared ("hot") book or on a book of its own
+("spread"), using one of three strategies:
+
+- ``in-place``: mutate the stored object and save it, as the update route
+  used to; increments get lost when threads interleave.
+- ``global-lock``: hold one lock around every read-modify-write.
+- ``cas``: copy, change and ``compare_and_swap_book``, retrying on conflict.
+
+Reports throughput, CAS retries per operation and lost increments. The
+interpreter's switch interval is shortened so that threads interleave as
+often as they would around awaits in a real server.
+
+The ``spread+del`` rows repeat the spread runs while another thread deletes
+books from the far end of a ``--books`` catalog, to show how much deletes,
+which hold every stripe lock while they remove a book, hold up the writers.
+
+Usage:
+    python -m benchmarks.bench_contention [--threads 8] [--ops 2000] [--books 20000]
+"""
+
+import argparse
+import sys
+import threading
+import time
+from typing import Callable, Dict
+
+from app import db
+from benchmarks.bench_storage import synthetic_books
+
+GLOBAL_LOCK = threading.Lock()
+
+
+def in_place(book_id: int) -> int:
+    book = db.get_book_by_id(book_id)
+    book.title = str(int(book.title) + 1)  # type: ignore[union-attr]
+    db.update_book(book_id, book)  # type: ignore[arg-type]
+    return 0
+
+
+def global_lock(book_id: int) -> int:
+    with GLOBAL_LOCK:
+        book = db.get_book_by_id(book_id)
+        new = book.model_copy(  # type: ignore[union-attr]
+            update={"title": str(int(book.title) + 1)}  # type: ignore[union-attr]
+        )
+        db.update_book(book_id, new)
+    return 0
+
+
+def cas(book_id: int) -> int:
+    retries = 0
+    while True:
+        book = db.get_book_by_id(book_id)
+        new = book.model_copy(  # type: ignore[union-attr]
+            update={"title": str(int(book.title) + 1)}  # type: ignore[union-attr]
+        )
+        if db.compare_and_swap_book(book_id, book.version, new):  # type: ignore
+            return retries
+        retries += 1
+
+
+STRATEGIES: Dict[str, Callable[[int], int]] = {
+    "in-place": in_place,
+    "global-lock": global_lock,
+    "cas": cas,
+}
+
+
+def run(
+    strategy: str, threads: int, ops: int, hot: bool, delete_from: int = 0
+) -> Dict[str, float]:
+    """Run one scenario on a fresh catalog and return its statistics.
+
+    With ``delete_from``, the catalog has that many books, and those nobody
+    increments are deleted, last first, while the threads run.
+    """
+    books = synthetic_books(max(threads, 100, delete_from))
+    for book in books:
+        book.title = "0"
+    db.load_books(books)
+    step = STRATEGIES[strategy]
+    retries = [0] * threads
+    done = threading.Event()
+    deleted = [0]
+
+    def deleter() -> None:
+        for book_id in range(len(books), threads, -1):
+            if done.is_set():
+                return
+            deleted[0] += db.delete_book(book_id)
+
+    def worker(index: int) -> None:
+        book_id = 1 if hot else index + 1
+        for _ in range(ops):
+            retries[index] += step(book_id)
+
+    workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    deleting = threading.Thread(target=deleter) if delete_from else None
+    start = time.perf_counter()
+    if deleting is not None:
+        deleting.start()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    done.set()
+    if deleting is not None:
+        deleting.join()
+
+    ids = [1] if hot else range(1, threads + 1)
+    counted = sum(int(db.get_book_by_id(i).title) for i in ids)  # type: ignore
+    return {
+        "ops_per_s": threads * ops / elapsed,
+        "retries": sum(retries) / (threads * ops),
+        "lost": threads * ops - counted,
+        "deletes_per_s": deleted[0] / elapsed,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--ops", type=int, default=2000)
+    parser.add_argument("--books", type=int, default=20000)
+    parser.add_argument("--switch-interval", type=float, default=1e-5)
+    args = parser.parse_args()
+
+    sys.setswitchinterval(args.switch_interval)
+    print(f"threads={args.threads} ops/thread={args.ops}")
+    print(
+        f"{'books':<11}{'strategy':<13}{'ops/s':>10}{'retries/op':>12}"
+        f"{'lost':>8}{'deletes/s':>11}"
+    )
+    try:
+        for label, hot, delete_from in (
+            ("hot", True, 0),
+            ("spread", False, 0),
+            ("spread+del", False, args.books),
+        ):
+            for strategy in STRATEGIES:
+                stats = run(strategy, args.threads, args.ops, hot, delete_from)
+                print(
+                    f"{label:<11}{strategy:<13}"
+                    f"{stats['ops_per_s']:>10.0f}{stats['retries']:>12.3f}"
+                    f"{stats['lost']:>8.0f}{stats['deletes_per_s']:>11.0f}"
+                )
+    finally:
+        db.reset_books()
+
+
+if __name__ == "__main__":
+    main()
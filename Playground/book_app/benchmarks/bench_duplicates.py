@@ -0,0 +1,126 @@
+"""Duplicate detection time and quality vs catalog size.
+
+Builds catalogs of distinct random books, adds a variant of ``--duplicates``
+of them (changed case, punctuation, spacing or one typo), then times
+indexing and the cluster scan. Reports how many variants were clustered with
+their original (recall) and how many clusters contain no variant pair (false
+clusters). For contrast, the cost of comparing every pair of signatures is
+extrapolated from 2000 books.
+
+Usage:
+    python -m benchmarks.bench_duplicates [--sizes 10000,100000,1000000]
+        [--duplicates 0.01]
+"""
+
+import argparse
+import random
+import time
+from itertools import combinations
+from typing import Dict, List
+
+from app.db.duplicates import DuplicateIndex, fingerprint, similarity
+from app.models import Book
+
+SYLLABLES = "ka lo mi ne ru sa ti vo be da fe gi ho ju ly po qu ze".split()
+
+
+def variant(text: str, rng: random.Random) -> str:
+    """Return ``text`` with one kind of cosmetic change or a typo."""
+    change = rng.randrange(4)
+    if change == 0:
+        return text.upper()
+    if change == 1:
+        return text.replace(" ", ", ", 1) + "."
+    if change == 2:
+        return "  " + text.replace(" ", "   ")
+    position = rng.randrange(len(text))
+    return text[:position] + text[position + 1 :]
+
+
+def catalog(size: int, duplicates: float, seed: int = 7) -> tuple:
+    """Build ``size`` distinct books plus variants; return them and the pairs."""
+    rng = random.Random(seed)
+    words = list(
+        {"".join(rng.choices(SYLLABLES, k=rng.randint(2, 4))) for _ in range(20_000)}
+    )
+    books: List[Book] = []
+    for book_id in range(1, size + 1):
+        books.append(
+            Book.model_construct(
+                id=book_id,
+                title=" ".join(rng.choices(words, k=rng.randint(2, 5))).title(),
+                author=" ".join(rng.choices(words, k=2)).title(),
+                category="Fiction",
+            )
+        )
+    pairs: Dict[int, int] = {}
+    for original in rng.sample(books[:size], int(size * duplicates)):
+        copy_id = len(books) + 1
+        books.append(
+            Book.model_construct(
+                id=copy_id,
+                title=variant(original.title, rng),
+                author=original.author,
+                category="Fiction",
+            )
+        )
+        pairs[copy_id] = original.id
+    return books, pairs
+
+
+def pairwise_seconds(books: List[Book], size: int) -> float:
+    """Extrapolate the time to compare all pairs of ``size`` books."""
+    sample = [fingerprint(book.title, book.author)[1] for book in books[:2000]]
+    start = time.perf_counter()
+    for first, second in combinations(sample, 2):
+        similarity(first, second)
+    per_pair = (time.perf_counter() - start) / (len(sample) * (len(sample) - 1) / 2)
+    return per_pair * size * (size - 1) / 2
+
+
+def bench_size(size: int, duplicates: float) -> None:
+    """Index a catalog of ``size`` books and report time and quality."""
+    books, pairs = catalog(size, duplicates)
+    index = DuplicateIndex()
+    start = time.perf_counter()
+    index.rebuild(books)
+    build_s = time.perf_counter() - start
+    start = time.perf_counter()
+    clusters, compared = index.clusters()
+    scan_s = time.perf_counter() - start
+
+    cluster_of = {
+        book.id: number
+        for number, (members, _, _) in enumerate(clusters)
+        for book in members
+    }
+    found = sum(
+        copy_id in cluster_of and cluster_of.get(copy_id) == cluster_of.get(original)
+        for copy_id, original in pairs.items()
+    )
+    true_clusters = {cluster_of[copy_id] for copy_id in pairs if copy_id in cluster_of}
+    false = len(clusters) - len(true_clusters)
+    print(
+        f"{len(books):<10}{build_s:>10.1f}{scan_s:>10.1f}{compared:>12}"
+        f"{found / max(1, len(pairs)):>9.1%}{false:>8}"
+        f"{pairwise_seconds(books, len(books)) / 3600:>14.1f}"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="10000,100000,1000000")
+    parser.add_argument("--duplicates", type=float, default=0.01)
+    args = parser.parse_args()
+
+    print(f"duplicates={args.duplicates:.1%}")
+    print(
+        f"{'books':<10}{'build s':>10}{'scan s':>10}{'compared':>12}"
+        f"{'recall':>9}{'false':>8}{'pairwise h':>14}"
+    )
+    for size in (int(value) for value in args.sizes.split(",")):
+        bench_size(size, args.duplicates)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""Bytes and time per books-page interaction: full page vs ``X-Fragment``.
+
+For each catalog size, fetches the books page for a few interactions (a
+category click, a search, the next page) over an ASGI transport, as the
+whole page and as the results fragment the page swaps in. ``unpaged`` is
+the whole page with every matching book, as the page was rendered before
+it was paged. Reports the median request time and the response bytes.
+
+Usage:
+    python -m benchmarks.bench_fragments [--sizes 50,10000,100000] [--runs 5]
+"""
+
+import argparse
+import asyncio
+from typing import Dict, List, Optional
+from unittest import mock
+
+import httpx
+
+from app import create_app
+from app.db import load_books, reset_books
+from app.routes.ui import FRAGMENT_HEADER
+from benchmarks.bench_projection import fetch_ms
+from benchmarks.bench_storage import synthetic_books
+
+INTERACTIONS = {
+    "category": "/books?category=Leadership",
+    "search": "/books?search=habits",
+    "next page": "/books?page=2",
+}
+# Without paging the whole catalog was one page.
+UNPAGED_URLS = {**INTERACTIONS, "next page": "/books"}
+MODES: Dict[str, Optional[Dict[str, str]]] = {
+    "unpaged": None,
+    "page": {},
+    "fragment": {FRAGMENT_HEADER: "results"},
+}
+
+
+async def bench_size(size: int, runs: int) -> None:
+    """Load ``size`` books and fetch every interaction in every mode."""
+    load_books(synthetic_books(size))
+    transport = httpx.ASGITransport(app=create_app())
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as c:
+        for interaction, url in INTERACTIONS.items():
+            for mode, headers in MODES.items():
+                if headers is None:
+                    with mock.patch("app.routes.ui.BOOKS_PAGE_SIZE", size):
+                        c.headers.clear()
+                        request_ms, size_bytes = await fetch_ms(
+                            c, UNPAGED_URLS[interaction], runs
+                        )
+                else:
+                    c.headers.clear()
+                    c.headers.update(headers)
+                    request_ms, size_bytes = await fetch_ms(c, url, runs)
+                print(
+                    f"{size:<9}{interaction:<12}{mode:<10}{request_ms:>12.1f}"
+                    f"{size_bytes:>13}"
+                )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="50,10000,100000")
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    sizes: List[int] = [int(value) for value in args.sizes.split(",")]
+    print(f"{'size':<9}{'action':<12}{'mode':<10}{'request ms':>12}{'bytes':>13}")
+    try:
+        for size in sizes:
+            asyncio.run(bench_size(size, args.runs))
+    finally:
+        reset_books()
+
+
+if __name__ == "__main__":
+    main()
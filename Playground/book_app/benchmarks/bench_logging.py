@@ -0,0 +1,91 @@
+"""Microbenchmark of logging cost per request on the book read path.
+
+Sends ``GET /api/books?category=Business`` and ``GET /api/books/1/details``
+through the API app in-process (httpx's ASGI transport, no sockets), with JSON
+log output going to an in-memory sink, under different log levels and
+sampling rates. Scenarios take turns over ``--repeat`` rounds of
+``--iterations`` request pairs, and each keeps its fastest round. The
+reported overhead is relative to logging disabled.
+
+Usage:
+    python -m benchmarks.bench_logging [--iterations N] [--repeat N]
+"""
+
+import argparse
+import asyncio
+import io
+import logging
+import time
+
+import httpx
+
+from app import create_api_app
+from app.logger import JSONFormatter, read_sampler
+
+
+class _NullStream(io.TextIOBase):
+    """Stream that discards everything written to it."""
+
+    def write(self, s: str) -> int:
+        return len(s)
+
+
+def _configure(level: int, sample_rate: float = 1.0) -> None:
+    app_logger = logging.getLogger("app")
+    for handler in list(app_logger.handlers):
+        app_logger.removeHandler(handler)
+
+    handler = logging.StreamHandler(_NullStream())
+    handler.setFormatter(JSONFormatter())
+    app_logger.addHandler(handler)
+    app_logger.setLevel(level)
+    read_sampler.configure(sample_rate)
+
+
+async def _run(client: httpx.AsyncClient, iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        (await client.get("/api/books?category=Business")).raise_for_status()
+        (await client.get("/api/books/1/details")).raise_for_status()
+    return time.perf_counter() - start
+
+
+async def main_async(iterations: int, repeat: int) -> None:
+    scenarios = [
+        ("disabled (CRITICAL)", logging.CRITICAL, 1.0),
+        ("WARNING", logging.WARNING, 1.0),
+        ("INFO", logging.INFO, 1.0),
+        ("INFO, reads sampled 1%", logging.INFO, 0.01),
+        ("DEBUG", logging.DEBUG, 1.0),
+    ]
+
+    transport = httpx.ASGITransport(app=create_api_app())
+    best = {name: float("inf") for name, _, _ in scenarios}
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://bench"
+    ) as client:
+        # Scenarios take turns, so drift in the machine affects them alike.
+        for _ in range(repeat):
+            for name, level, sample_rate in scenarios:
+                _configure(level, sample_rate)
+                best[name] = min(best[name], await _run(client, iterations))
+
+    baseline = None
+    print(f"{'scenario':<28}{'us/request':>12}{'overhead us':>14}")
+    for name, _, _ in scenarios:
+        per_request = best[name] / (2 * iterations) * 1e6
+        if baseline is None:
+            baseline = per_request
+        print(f"{name:<28}{per_request:>12.2f}{per_request - baseline:>14.2f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=7)
+    args = parser.parse_args()
+    asyncio.run(main_async(args.iterations, args.repeat))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""Microbenchmark of MetricsMiddleware overhead per request.
+
+Drives a minimal ASGI app directly (no HTTP, no routing) with and without the
+middleware in front of it, so the difference is the middleware's own cost.
+
+Usage:
+    python -m benchmarks.bench_metrics [--iterations N]
+"""
+
+import argparse
+import asyncio
+import time
+from types import SimpleNamespace
+
+from app.metrics import MetricsRegistry
+from app.metrics.middleware import MetricsMiddleware
+
+ROUTE = SimpleNamespace(path="/api/books/{book_id:int}/details")
+START = {"type": "http.response.start", "status": 200, "headers": []}
+BODY = {"type": "http.response.body", "body": b"{}"}
+
+
+async def _endpoint(scope, receive, send) -> None:
+    scope["route"] = ROUTE
+    await send(START)
+    await send(BODY)
+
+
+async def _receive():
+    return {"type": "http.request", "body": b""}
+
+
+async def _send(message) -> None:
+    return None
+
+
+async def _run(app, iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        scope = {"type": "http", "method": "GET", "path": "/api/books/1/details"}
+        await app(scope, _receive, _send)
+    return time.perf_counter() - start
+
+
+async def main_async(iterations: int) -> None:
+    bare = min([await _run(_endpoint, iterations) for _ in range(3)])
+    wrapped_app = MetricsMiddleware(_endpoint, MetricsRegistry())
+    wrapped = min([await _run(wrapped_app, iterations) for _ in range(3)])
+
+    per_bare = bare / iterations * 1e6
+    per_wrapped = wrapped / iterations * 1e6
+    print(f"bare app:        {per_bare:8.3f} us/request")
+    print(f"with middleware: {per_wrapped:8.3f} us/request")
+    print(f"overhead:        {per_wrapped - per_bare:8.3f} us/request")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=200000)
+    args = parser.parse_args()
+    asyncio.run(main_async(args.iterations))
+
+
+if __name__ == "__main__":
+    main()
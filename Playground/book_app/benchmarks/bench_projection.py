@@ -0,0 +1,97 @@
+"""Response size and time of ``GET /api/books`` per ``fields`` projection.
+
+For each catalog size and field set, fetches the book list over an ASGI
+transport and times serializing the catalog alone, reporting the median
+time and the response bytes. ``(default)`` is the unprojected response.
+
+Usage:
+    python -m benchmarks.bench_projection [--sizes 10000,100000]
+        [--fields id;id,title;id,title,author,category,updated_at,version]
+"""
+
+import argparse
+import asyncio
+import time
+from typing import Callable, List, Optional
+
+import httpx
+from pydantic import TypeAdapter
+
+from app import create_api_app
+from app.db import get_all_books, load_books, reset_books
+from app.models import Book
+from app.routes.projection import get_projection
+from benchmarks.bench_storage import synthetic_books
+
+BOOK_LIST = TypeAdapter(List[Book])
+
+
+def median_ms(fn: Callable[[], object], runs: int) -> float:
+    """Return the median time of ``fn()`` in ms."""
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return sorted(timings)[len(timings) // 2] * 1000
+
+
+async def fetch_ms(client: httpx.AsyncClient, url: str, runs: int) -> tuple:
+    """Return the median time in ms and the size of ``GET url``."""
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        response = await client.get(url)
+        timings.append(time.perf_counter() - start)
+    assert response.status_code == 200
+    return sorted(timings)[len(timings) // 2] * 1000, len(response.content)
+
+
+async def bench_size(size: int, field_sets: List[Optional[str]], runs: int) -> None:
+    """Load ``size`` books and compare each projection."""
+    load_books(synthetic_books(size))
+    books = get_all_books()
+    transport = httpx.ASGITransport(app=create_api_app())
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as c:
+        for fields in field_sets:
+            if fields is None:
+                url = "/api/books"
+                serialize_ms = median_ms(lambda: BOOK_LIST.dump_json(books), runs)
+            else:
+                url = f"/api/books?fields={fields}"
+                projection = get_projection(Book, frozenset(fields.split(",")))
+                serialize_ms = median_ms(lambda: projection.many(books), runs)
+            request_ms, size_bytes = await fetch_ms(c, url, runs)
+            print(
+                f"{size:<9}{fields or '(default)':<44}{serialize_ms:>12.1f}"
+                f"{request_ms:>12.1f}{size_bytes:>13}"
+            )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="10000,100000")
+    parser.add_argument(
+        "--fields",
+        default=(
+            "id;id,title;id,title,author;" "id,title,author,category,updated_at,version"
+        ),
+        help="Semicolon-separated field sets",
+    )
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    field_sets: List[Optional[str]] = [None, *args.fields.split(";")]
+    print(
+        f"{'size':<9}{'fields':<44}{'serialize ms':>12}{'request ms':>12}"
+        f"{'bytes':>13}"
+    )
+    try:
+        for size in (int(value) for value in args.sizes.split(",")):
+            asyncio.run(bench_size(size, field_sets, args.runs))
+    finally:
+        reset_books()
+
+
+if __name__ == "__main__":
+    main()
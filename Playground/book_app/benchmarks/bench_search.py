@@ -0,0 +1,68 @@
+"""Ranked (BM25) search latency against substring search at large sizes.
+
+Builds the inverted index over a synthetic catalog, then times
+``search_books_ranked`` for queries of different selectivity next to a cold
+``search_books`` substring scan. Candidates are the books holding the rarest
+query word: each topic word in the synthetic titles is shared by 1/16 of the
+books, while ``volume`` appears in every title and is the worst case.
+
+Usage:
+    python -m benchmarks.bench_search [--sizes 100000,1000000] [--limit 10]
+"""
+
+import argparse
+import time
+from typing import List
+
+from app import db
+from benchmarks.bench_storage import measure, synthetic_books
+
+
+def queries(size: int) -> List[str]:
+    """Queries from very selective to matching every book."""
+    return [f"volume {size // 2}", "author 7", "habits", "deep work", "volume"]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="100000,1000000")
+    parser.add_argument("--limit", type=int, default=10)
+    parser.add_argument("--min-time", type=float, default=0.5)
+    args = parser.parse_args()
+
+    print(
+        f"{'size':<10}{'query':<18}{'candidates':>12}{'ranked ms':>12}{'scan ms':>10}"
+    )
+    try:
+        for size in (int(value) for value in args.sizes.split(",")):
+            db.load_books(synthetic_books(size))
+            start = time.perf_counter()
+            db.build_search_index()
+            print(
+                f"{size:<10}{'(build index)':<18}{'':>12}"
+                f"{(time.perf_counter() - start) * 1000:>12.0f}"
+            )
+            for query in queries(size):
+                ranked = measure(
+                    lambda: db.search_books_ranked(query, args.limit),
+                    args.min_time,
+                    1000,
+                )
+                scan = measure(
+                    lambda: db.search_books(query),
+                    args.min_time,
+                    1000,
+                    setup=db.search_cache.clear,
+                )
+                candidates = db.search_index.search(query, args.limit)[1]
+                print(
+                    f"{size:<10}{query:<18}{candidates:>12}"
+                    f"{ranked['median_s'] * 1000:>12.2f}"
+                    f"{scan['median_s'] * 1000:>10.2f}"
+                )
+    finally:
+        db.reset_books()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""The book store as one list vs ``STORE_SHARDS`` shards, across catalog sizes.
+
+For each size and layout (``list`` or a shard count), reports median times of:
+
+- ``load s``: ``load_books`` of the whole catalog
+- ``page ms``: the first 20 books of one category (a tenth of the catalog,
+  drawn at random so that it is spread evenly over titles and shards)
+- ``category ms``: every book of that category
+- ``search ms``: an uncached substring search matching one book in 16
+- ``sorted ms``: the first 20 books of that category by title
+- ``writes/s``: updates, deletes and re-creates by ``--threads`` threads,
+  each on books of its own, and ``missed``: lookups by id that found no book
+  although it existed (a list scan racing a delete that shifts the list)
+
+Shard reads fan out to one thread per shard. They only run in parallel on
+a free-threaded build (the header says whether the GIL is enabled) with
+CPUs to spare; otherwise the threads take turns and the numbers show the
+cost of the fan-out and merge.
+
+Usage:
+    python -m benchmarks.bench_shards [--sizes 100000,1000000]
+        [--shards 1,2,4,8] [--threads 4] [--writes 2000]
+"""
+
+import argparse
+import os
+import random
+import sys
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from app import db
+from app.models import Book
+from benchmarks.bench_storage import CATEGORIES, measure, synthetic_books
+
+CATEGORY = "Fiction"
+
+
+def shuffled_books(size: int) -> List[Book]:
+    """``synthetic_books`` with categories drawn at random rather than by id."""
+    rng = random.Random(size)
+    books = synthetic_books(size)
+    for book in books:
+        book.category = rng.choice(CATEGORIES)
+    return books
+
+
+def run_writes(threads: int, writes: int, size: int) -> Tuple[float, int]:
+    """Run ``writes`` store writes on each of ``threads`` threads.
+
+    Returns the writes per second and the lookups that missed their book.
+    """
+    missed = [0] * threads
+
+    def worker(index: int) -> None:
+        for n in range(writes):
+            book_id = 1 + (index + n * threads) % size
+            book = db.get_book_by_id(book_id)
+            if book is None:
+                missed[index] += 1
+            elif n % 4 == 3:
+                db.delete_book(book_id)
+                db.create_book(book)  # type: ignore[arg-type]
+            else:
+                db.update_book(book_id, book.model_copy())  # type: ignore
+
+    workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    start = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    return threads * writes / (time.perf_counter() - start), sum(missed)
+
+
+def bench_layout(size: int, shards: int, args: argparse.Namespace) -> str:
+    """Time every operation on ``size`` books in ``shards`` shards (0: the list)."""
+    os.environ[db.STORE_SHARDS_ENV] = str(shards)
+    books = shuffled_books(size)
+    start = time.perf_counter()
+    db.load_books(books)
+    load_s = time.perf_counter() - start
+    del books
+    db.build_sort_indexes()
+
+    def ms(
+        func: Callable[[], object], setup: Optional[Callable[[], object]] = None
+    ) -> float:
+        return measure(func, args.min_time, args.max_runs, setup)["median_s"] * 1e3
+
+    timings: Dict[str, float] = {
+        "page": ms(lambda: db.get_all_books(CATEGORY, limit=20)),
+        "category": ms(lambda: db.get_all_books(CATEGORY)),
+        "search": ms(lambda: db.search_books("ocean"), db.search_cache.clear),
+        "sorted": ms(lambda: db.get_all_books(CATEGORY, "title", limit=20)),
+    }
+    rate, missed = run_writes(args.threads, args.writes, size)
+    return (
+        f"{size:<9}{shards or 'list':<8}{load_s:>8.2f}{timings['page']:>9.3f}"
+        f"{timings['category']:>13.2f}{timings['search']:>11.2f}"
+        f"{timings['sorted']:>11.3f}{rate:>10.0f}{missed:>8}"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="100000,1000000")
+    parser.add_argument("--shards", default="1,2,4,8")
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--writes", type=int, default=2000)
+    parser.add_argument("--min-time", type=float, default=1.0)
+    parser.add_argument("--max-runs", type=int, default=20)
+    args = parser.parse_args()
+
+    gil = getattr(sys, "_is_gil_enabled", lambda: True)()
+    print(f"cpus={os.cpu_count()} gil={'enabled' if gil else 'disabled'}")
+    print(
+        f"{'books':<9}{'shards':<8}{'load s':>8}{'page ms':>9}{'category ms':>13}"
+        f"{'search ms':>11}{'sorted ms':>11}{'writes/s':>10}{'missed':>8}"
+    )
+    layouts = [0] + [int(value) for value in args.shards.split(",")]
+    previous = os.environ.get(db.STORE_SHARDS_ENV)
+    try:
+        for size in (int(value) for value in args.sizes.split(",")):
+            for shards in layouts:
+                print(bench_layout(size, shards, args), flush=True)
+    finally:
+        if previous is None:
+            os.environ.pop(db.STORE_SHARDS_ENV, None)
+        else:
+            os.environ[db.STORE_SHARDS_ENV] = previous
+        db.reset_books()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""Startup cost of the book store: validated Book objects vs a mapped snapshot.
+
+For each catalog size, reports:
+
+- ``build s``: constructing the catalog as validated ``Book`` objects, as a
+  worker does for its seed data, and the Python heap it takes (``heap MB``)
+- ``write s`` / ``file MB``: writing the catalog as a snapshot file
+- ``open ms``: ``load_snapshot`` (median), and the heap it takes (``heap KB``)
+- ``lookup us``: the first ``get_book_by_id`` after opening
+- ``scan s``: a full scan, which decodes every book (and keeps none)
+
+Usage:
+    python -m benchmarks.bench_snapshot [--sizes 10000,100000,1000000] [--runs 5]
+"""
+
+import argparse
+import tempfile
+import time
+import tracemalloc
+from functools import partial
+from pathlib import Path
+from typing import Callable, List, Tuple
+
+from app.db import get_all_books, get_book_by_id, load_snapshot, reset_books
+from app.db.snapshot import write_snapshot
+from app.models import Book
+from benchmarks.bench_storage import CATEGORIES, WORDS
+
+
+def validated_books(size: int) -> List[Book]:
+    """Build ``size`` deterministic books through pydantic validation."""
+    return [
+        Book(
+            id=i,
+            title=f"{WORDS[i % 16].title()} {WORDS[(i // 16) % 16]} volume {i}",
+            author=f"Author {i % 997}",
+            category=CATEGORIES[i % len(CATEGORIES)],
+        )
+        for i in range(1, size + 1)
+    ]
+
+
+def timed(fn: Callable[[], object]) -> Tuple[float, object]:
+    """Return the time in seconds of ``fn()`` and its result."""
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
+
+
+def heap_bytes(fn: Callable[[], object]) -> int:
+    """Return the Python heap still allocated after ``fn()`` (result kept)."""
+    tracemalloc.start()
+    result = fn()
+    allocated = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del result
+    return allocated
+
+
+def bench_size(size: int, path: Path, runs: int) -> None:
+    """Compare building ``size`` books with mapping them from ``path``."""
+    build_s, books = timed(lambda: validated_books(size))
+    heap_mb = heap_bytes(lambda: validated_books(size)) / 1e6
+    write_s, file_size = timed(partial(write_snapshot, path, books))
+    del books
+
+    opens = []
+    for _ in range(runs):
+        reset_books()
+        opens.append(timed(lambda: load_snapshot(str(path)))[0])
+    open_ms = sorted(opens)[len(opens) // 2] * 1000
+    reset_books()
+    heap_kb = heap_bytes(lambda: load_snapshot(str(path))) / 1e3
+    lookup_s, book = timed(lambda: get_book_by_id(size // 2))
+    assert book is not None and book.id == size // 2
+    scan_s, listed = timed(get_all_books)
+    assert len(listed) == size
+    print(
+        f"{size:<9}{build_s:>9.2f}{heap_mb:>9.1f}{write_s:>9.2f}"
+        f"{file_size / 1e6:>9.1f}{open_ms:>9.2f}{heap_kb:>9.1f}"
+        f"{lookup_s * 1e6:>11.0f}{scan_s:>9.2f}"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="10000,100000,1000000")
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    print(
+        f"{'books':<9}{'build s':>9}{'heap MB':>9}{'write s':>9}{'file MB':>9}"
+        f"{'open ms':>9}{'heap KB':>9}{'lookup us':>11}{'scan s':>9}"
+    )
+    with tempfile.TemporaryDirectory() as directory:
+        path = Path(directory) / "books.snap"
+        try:
+            for size in (int(value) for value in args.sizes.split(",")):
+                bench_size(size, path, args.runs)
+        finally:
+            reset_books()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""Sorted first page from a maintained index vs sorting per request.
+
+For each catalog size, times ``get_all_books(sort=..., limit=--page)`` for
+an order kept in ``SORT_INDEXES`` and for the same order with its index
+dropped (sorted on every call), plus an update with and without the sort
+indexes maintained.
+
+Usage:
+    python -m benchmarks.bench_sort [--sizes 10000,100000,1000000]
+        [--sort -updated_at,title] [--page 20]
+"""
+
+import argparse
+from unittest import mock
+
+from app import db
+from app.db.sort_index import SortIndex, parse_sort
+from benchmarks.bench_storage import measure, synthetic_books
+
+
+def bench_size(size: int, sort: str, page: int, min_time: float) -> None:
+    """Load ``size`` books and time sorted pages and updates."""
+    books = synthetic_books(size)
+    db.load_books(books)
+    spec = parse_sort(sort)
+    middle = books[size // 2]
+    replacement = middle.model_copy(update={"title": "Replacement title"})
+
+    def first_page() -> None:
+        db.get_all_books(sort=sort, limit=page)
+
+    def update() -> None:
+        db.update_book(middle.id, replacement)
+
+    with mock.patch.dict(db.sort_indexes, clear=True):
+        sorted_ms = measure(first_page, min_time, 20)["median_s"] * 1000
+        plain_update_us = measure(update, min_time, 2000)["median_s"] * 1e6
+    with mock.patch.dict(db.sort_indexes, {spec: SortIndex(spec)}, clear=True):
+        with mock.patch.object(db, "_sort_indexes_built", False):
+            db.build_sort_indexes()
+            indexed_ms = measure(first_page, min_time, 2000)["median_s"] * 1000
+            indexed_update_us = measure(update, min_time, 2000)["median_s"] * 1e6
+    print(
+        f"{size:<10}{sorted_ms:>14.2f}{indexed_ms:>14.3f}"
+        f"{plain_update_us:>14.1f}{indexed_update_us:>14.1f}"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="10000,100000,1000000")
+    parser.add_argument("--sort", default="-updated_at,title")
+    parser.add_argument("--page", type=int, default=20)
+    parser.add_argument("--min-time", type=float, default=1.0)
+    args = parser.parse_args()
+
+    print(f"sort={args.sort} page={args.page}")
+    print(
+        f"{'size':<10}{'sorted ms':>14}{'indexed ms':>14}"
+        f"{'update us':>14}{'+index us':>14}"
+    )
+    try:
+        for size in (int(value) for value in args.sizes.split(",")):
+            bench_size(size, args.sort, args.page, args.min_time)
+    finally:
+        db.reset_books()
+
+
+if __name__ == "__main__":
+    main()
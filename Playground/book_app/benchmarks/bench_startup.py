@@ -0,0 +1,80 @@
+"""Measure cold-start cost: import time and time to first response.
+
+Each sample runs in a fresh interpreter so nothing is cached between runs.
+A sample measures three things:
+
+- ``import``: ``import app`` (builds the default app)
+- ``first_api``: create the API-only app and serve ``GET /api/books``
+- ``first_ui``: create the full app and serve ``GET /``
+
+The median of ``--runs`` samples is reported. With ``--budget-ms`` the run
+exits 1 when the median import time exceeds the budget, so CI can catch
+startup regressions.
+
+Usage:
+    python -m benchmarks.bench_startup [--runs 5] [--budget-ms 1500]
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, List
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Runs inside the child interpreter and prints one JSON line of timings in ms.
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import app
+imported = time.perf_counter()
+from fastapi.testclient import TestClient
+def first(factory, path):
+    begin = time.perf_counter()
+    with TestClient(factory()) as client:
+        assert client.get(path).status_code == 200
+    return (time.perf_counter() - begin) * 1000
+print(json.dumps({
+    "import": (imported - start) * 1000,
+    "first_api": first(app.create_api_app, "/api/books"),
+    "first_ui": first(app.create_app, "/"),
+    "modules": len(sys.modules),
+}))
+"""
+
+
+def sample() -> Dict[str, float]:
+    """Run the probe in a new interpreter and return its timings."""
+    output = subprocess.run(
+        [sys.executable, "-c", PROBE],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, help="Fail above this import")
+    args = parser.parse_args()
+
+    samples: List[Dict[str, float]] = [sample() for _ in range(args.runs)]
+    medians = {key: statistics.median(s[key] for s in samples) for key in samples[0]}
+    print(f"{'phase':<12}{'median ms':>12}")
+    for key in ("import", "first_api", "first_ui"):
+        print(f"{key:<12}{medians[key]:>12.1f}")
+    print(f"{'modules':<12}{medians['modules']:>12.0f}")
+
+    if args.budget_ms is not None and medians["import"] > args.budget_ms:
+        print(f"FAIL import {medians['import']:.1f}ms > {args.budget_ms}ms")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,219 @@
+"""Microbenchmarks of the app.db storage layer across catalog sizes.
+
+Fills the store with synthetic books and times every store operation. Results
+are written as JSON; ``--compare`` checks them against a saved baseline and
+exits with status 1 if any operation got slower than the threshold allows.
+
+Usage:
+    python -m benchmarks.bench_storage [--sizes 50,10000,100000,1000000]
+        [--output results.json] [--compare baseline.json] [--threshold 0.25]
+"""
+
+import argparse
+import json
+import platform
+import statistics
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+from app import db
+from app.models import Book
+
+DEFAULT_SIZES = (50, 10_000, 100_000, 1_000_000)
+CATEGORIES = [
+    "Self-Help",
+    "Motivational",
+    "Leadership",
+    "Philosophy",
+    "Business",
+    "Fiction",
+    "History",
+    "Science",
+    "Biography",
+    "Technology",
+]
+WORDS = [
+    "habits",
+    "power",
+    "mind",
+    "work",
+    "deep",
+    "strategy",
+    "lean",
+    "story",
+    "secret",
+    "future",
+    "code",
+    "river",
+    "stone",
+    "light",
+    "garden",
+    "empire",
+]
+
+Results = Dict[str, Dict[str, Dict[str, float]]]
+
+
+def synthetic_books(size: int) -> List[Book]:
+    """Build ``size`` deterministic books without per-field validation."""
+    updated_at = datetime(2024, 1, 1)
+    return [
+        Book.model_construct(
+            id=i,
+            title=f"{WORDS[i % 16].title()} {WORDS[(i // 16) % 16]} volume {i}",
+            author=f"Author {i % 997}",
+            category=CATEGORIES[i % len(CATEGORIES)],
+            updated_at=updated_at,
+        )
+        for i in range(1, size + 1)
+    ]
+
+
+def measure(
+    func: Callable[[], Any],
+    min_time: float,
+    max_runs: int,
+    setup: Optional[Callable[[], Any]] = None,
+    teardown: Optional[Callable[[], Any]] = None,
+) -> Dict[str, float]:
+    """Time single calls of ``func`` until ``min_time`` or ``max_runs`` is reached.
+
+    ``setup``/``teardown`` run around every call and are not timed.
+    """
+    timings: List[float] = []
+    deadline = time.perf_counter() + min_time
+    while len(timings) < max_runs and (
+        len(timings) < 3 or time.perf_counter() < deadline
+    ):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+        if teardown is not None:
+            teardown()
+    return {
+        "median_s": statistics.median(timings),
+        "min_s": min(timings),
+        "runs": len(timings),
+    }
+
+
+def bench_size(
+    size: int, min_time: float, max_runs: int
+) -> Dict[str, Dict[str, float]]:
+    """Run every storage benchmark against a catalog of ``size`` books."""
+    books = synthetic_books(size)
+    db.load_books(books)
+
+    middle = books[size // 2]
+    new_id = size + 1
+    extra = middle.model_copy(update={"id": new_id})
+    replacement = middle.model_copy(update={"title": "Replacement title"})
+    query = f"volume {middle.id}"
+
+    def run(name: str, func: Callable[[], Any], **kwargs: Any) -> None:
+        results[name] = measure(func, min_time, max_runs, **kwargs)
+
+    results: Dict[str, Dict[str, float]] = {}
+    run("get_all_books", lambda: db.get_all_books())
+    run("get_all_books(category)", lambda: db.get_all_books("history"))
+    run("get_categories", db.get_categories)
+    run("get_stats", db.get_stats)
+    run("search_books", lambda: db.search_books(query), setup=db.search_cache.clear)
+    run("search_books(cached)", lambda: db.search_books(query))
+    db.build_search_index()
+    run("search_books_ranked", lambda: db.search_books_ranked(query, 10))
+    db.build_prefix_index()
+    run("suggest_books", lambda: db.suggest_books(middle.title[:4].lower(), 10))
+    db.build_sort_indexes()
+    run("get_all_books(sort,page)", lambda: db.get_all_books(sort="title", limit=20))
+    run("get_book_by_title", lambda: db.get_book_by_title(middle.title.upper()))
+    run("get_book_by_id", lambda: db.get_book_by_id(middle.id))
+    run(
+        "create_book",
+        lambda: db.create_book(extra),
+        teardown=lambda: db.delete_book(new_id),
+    )
+    run("update_book", lambda: db.update_book(middle.id, replacement))
+    run(
+        "delete_book",
+        lambda: db.delete_book(new_id),
+        setup=lambda: db.create_book(extra),
+    )
+    return results
+
+
+def compare(current: Results, baseline: Results, threshold: float) -> List[str]:
+    """Return one message per operation whose median regressed past ``threshold``."""
+    regressions = []
+    for size, operations in current.items():
+        for name, stats in operations.items():
+            base = baseline.get(size, {}).get(name)
+            if not base or not base["median_s"]:
+                continue
+            ratio = stats["median_s"] / base["median_s"]
+            if ratio > 1 + threshold:
+                regressions.append(
+                    f"size={size} {name}: {base['median_s'] * 1e6:.2f}us -> "
+                    f"{stats['median_s'] * 1e6:.2f}us ({ratio:.2f}x)"
+                )
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--sizes",
+        default=",".join(str(size) for size in DEFAULT_SIZES),
+        help="Comma-separated catalog sizes",
+    )
+    parser.add_argument("--min-time", type=float, default=0.2)
+    parser.add_argument("--max-runs", type=int, default=10_000)
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    parser.add_argument("--compare", help="Baseline JSON file to compare against")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.25,
+        help="Allowed slowdown before flagging a regression (0.25 = 25%%)",
+    )
+    args = parser.parse_args()
+
+    results: Results = {}
+    for size in (int(value) for value in args.sizes.split(",")):
+        results[str(size)] = bench_size(size, args.min_time, args.max_runs)
+        for name, stats in results[str(size)].items():
+            print(
+                f"size={size:<9} {name:<26} median {stats['median_s'] * 1e6:12.2f}us"
+                f"  ({stats['runs']} runs)"
+            )
+    db.reset_books()
+
+    report = {
+        "meta": {
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+        },
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)["results"]
+        regressions = compare(results, baseline, args.threshold)
+        for message in regressions:
+            print(f"REGRESSION {message}")
+        if regressions:
+            sys.exit(1)
+        print("No regressions against baseline")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""Delta sync vs re-downloading the catalog, across catalog sizes.
+
+For each size, fetches ``GET /api/books`` (what mirrors did before) and
+``GET /api/books/changes?since=`` after ``--changes`` writes, over an ASGI
+transport, and reports time and response bytes for both.
+
+Usage:
+    python -m benchmarks.bench_sync [--sizes 10000,100000,1000000] [--changes 10]
+"""
+
+import argparse
+import asyncio
+import time
+from typing import Tuple
+
+import httpx
+
+from app import create_api_app
+from app.db import get_store_version, load_books, reset_books, update_book
+from benchmarks.bench_storage import synthetic_books
+
+
+async def fetch(client: httpx.AsyncClient, url: str, runs: int) -> Tuple[float, int]:
+    """Return the median time in ms and the size of ``GET url``."""
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        response = await client.get(url)
+        timings.append(time.perf_counter() - start)
+    assert response.status_code == 200
+    return sorted(timings)[len(timings) // 2] * 1000, len(response.content)
+
+
+async def bench_size(size: int, changes: int, runs: int) -> None:
+    """Load ``size`` books, make ``changes`` updates and compare both fetches."""
+    books = synthetic_books(size)
+    load_books(books)
+    since = get_store_version()
+    for book in books[:: max(1, size // changes)][:changes]:
+        update_book(book.id, book.model_copy(update={"title": "Changed title"}))
+    transport = httpx.ASGITransport(app=create_api_app())
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as c:
+        full_ms, full_bytes = await fetch(c, "/api/books", runs)
+        delta_ms, delta_bytes = await fetch(
+            c, f"/api/books/changes?since={since}", runs
+        )
+    print(
+        f"{size:<10}{full_ms:>12.1f}{full_bytes:>14}{delta_ms:>12.2f}{delta_bytes:>12}"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="10000,100000,1000000")
+    parser.add_argument("--changes", type=int, default=10)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"changes={args.changes}")
+    print(f"{'size':<10}{'full ms':>12}{'full bytes':>14}{'delta ms':>12}{'bytes':>12}")
+    try:
+        for size in (int(value) for value in args.sizes.split(",")):
+            asyncio.run(bench_size(size, args.changes, args.runs))
+    finally:
+        reset_books()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,289 @@
+"""HTTP load-test harness with per-endpoint latency percentiles.
+
+Drives ``create_app()`` in-process over an ASGI transport (client and server
+share one event loop, so latencies include client overhead), or a running
+server with ``--url``. Workers pick requests from a weighted mix for a fixed
+duration; the run fails (exit 1) when a threshold is exceeded.
+
+Usage:
+    python -m benchmarks.load_test [--concurrency 50] [--duration 10]
+        [--mix list=4,category=3,search=2,detail=4,title=1,write=1,ui=1]
+        [--url http://127.0.0.1:8000] [--max-p99-ms 100]
+        [--max-error-rate 0.01] [--min-rps 0] [--output report.json]
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import httpx
+
+from app import create_app
+from app.db import reset_books
+
+CATEGORIES = ["Self-Help", "Motivational", "Leadership", "Philosophy", "Business"]
+SEARCHES = ["habits", "simon", "power", "the", "zero", "stoic"]
+TITLES = ["Atomic Habits", "Deep Work", "Sapiens", "Drive", "Hooked", "Unknown"]
+
+DEFAULT_MIX = "list=4,category=3,search=2,detail=4,title=1,write=1,ui=1"
+
+Request = Callable[[httpx.AsyncClient, random.Random], Awaitable[httpx.Response]]
+
+
+def _list(client: httpx.AsyncClient, rng: random.Random) -> Awaitable[httpx.Response]:
+    return client.get("/api/books")
+
+
+def _category(
+    client: httpx.AsyncClient, rng: random.Random
+) -> Awaitable[httpx.Response]:
+    return client.get("/api/books", params={"category": rng.choice(CATEGORIES)})
+
+
+def _search(client: httpx.AsyncClient, rng: random.Random) -> Awaitable[httpx.Response]:
+    return client.get("/books", params={"search": rng.choice(SEARCHES)})
+
+
+def _detail(client: httpx.AsyncClient, rng: random.Random) -> Awaitable[httpx.Response]:
+    return client.get(f"/api/books/{rng.randint(1, 50)}/details")
+
+
+def _title(client: httpx.AsyncClient, rng: random.Random) -> Awaitable[httpx.Response]:
+    return client.get(f"/api/books/{rng.choice(TITLES)}")
+
+
+def _write(client: httpx.AsyncClient, rng: random.Random) -> Awaitable[httpx.Response]:
+    return client.post(
+        "/api/books",
+        json={
+            "title": f"Load test book {rng.randint(1, 1_000_000)}",
+            "author": "Load Tester",
+            "category": rng.choice(CATEGORIES),
+        },
+    )
+
+
+def _ui(client: httpx.AsyncClient, rng: random.Random) -> Awaitable[httpx.Response]:
+    return client.get(rng.choice(["/", "/books", "/books/1", "/admin"]))
+
+
+SCENARIOS: Dict[str, Request] = {
+    "list": _list,
+    "category": _category,
+    "search": _search,
+    "detail": _detail,
+    "title": _title,
+    "write": _write,
+    "ui": _ui,
+}
+
+
+def parse_mix(mix: str) -> Dict[str, int]:
+    """Parse ``name=weight,...`` into a weight per scenario."""
+    weights: Dict[str, int] = {}
+    for part in mix.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in SCENARIOS:
+            raise ValueError(f"Unknown scenario: {name} (use {', '.join(SCENARIOS)})")
+        weights[name] = int(weight or 1)
+    return weights
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    """Nearest-rank percentile of already sorted values."""
+    if not sorted_values:
+        return 0.0
+    index = min(int(q * len(sorted_values)), len(sorted_values) - 1)
+    return sorted_values[index]
+
+
+@dataclass
+class EndpointStats:
+    """Latencies and outcomes recorded for one scenario."""
+
+    latencies: List[float] = field(default_factory=list)
+    errors: int = 0
+    statuses: Dict[int, int] = field(default_factory=dict)
+
+    def summary(self, duration: float) -> Dict[str, Any]:
+        """Throughput, error rate and latency percentiles over ``duration``."""
+        values = sorted(self.latencies)
+        count = len(values)
+        return {
+            "requests": count,
+            "errors": self.errors,
+            "error_rate": self.errors / count if count else 0.0,
+            "statuses": self.statuses,
+            "rps": count / duration if duration else 0.0,
+            "p50_ms": percentile(values, 0.50) * 1000,
+            "p95_ms": percentile(values, 0.95) * 1000,
+            "p99_ms": percentile(values, 0.99) * 1000,
+            "max_ms": (values[-1] if values else 0.0) * 1000,
+        }
+
+
+@dataclass
+class LoadReport:
+    """Result of one load run."""
+
+    duration: float
+    concurrency: int
+    endpoints: Dict[str, EndpointStats]
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Summarize every endpoint plus an overall row."""
+        overall = EndpointStats()
+        for stats in self.endpoints.values():
+            overall.latencies.extend(stats.latencies)
+            overall.errors += stats.errors
+        return {
+            "duration_s": self.duration,
+            "concurrency": self.concurrency,
+            "overall": overall.summary(self.duration),
+            "endpoints": {
+                name: stats.summary(self.duration)
+                for name, stats in sorted(self.endpoints.items())
+            },
+        }
+
+
+async def run_load(
+    client: httpx.AsyncClient,
+    mix: Dict[str, int],
+    concurrency: int,
+    duration: float,
+    seed: int = 0,
+) -> LoadReport:
+    """Run ``concurrency`` workers sending the request ``mix`` for ``duration``."""
+    names = list(mix)
+    weights = [mix[name] for name in names]
+    endpoints = {name: EndpointStats() for name in names}
+    deadline = time.perf_counter() + duration
+
+    async def worker(worker_id: int) -> None:
+        rng = random.Random(seed * 100_003 + worker_id)
+        while time.perf_counter() < deadline:
+            name = rng.choices(names, weights)[0]
+            stats = endpoints[name]
+            start = time.perf_counter()
+            try:
+                response = await SCENARIOS[name](client, rng)
+                status = response.status_code
+            except httpx.HTTPError:
+                status = 0
+            stats.latencies.append(time.perf_counter() - start)
+            stats.statuses[status] = stats.statuses.get(status, 0) + 1
+            # 404s are expected for unknown titles; anything 5xx or failed is not.
+            if status == 0 or status >= 500:
+                stats.errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(i) for i in range(concurrency)))
+    return LoadReport(time.perf_counter() - started, concurrency, endpoints)
+
+
+async def run_in_process(
+    mix: Dict[str, int],
+    concurrency: int,
+    duration: float,
+    seed: int = 0,
+    app_factory: Callable[[], Any] = create_app,
+) -> LoadReport:
+    """Run a load test against a fresh app over an ASGI transport."""
+    reset_books()
+    app = app_factory()
+    transport = httpx.ASGITransport(app=app)
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://loadtest"
+        ) as client:
+            report = await run_load(client, mix, concurrency, duration, seed)
+    reset_books()
+    return report
+
+
+async def run_against_url(
+    url: str, mix: Dict[str, int], concurrency: int, duration: float, seed: int = 0
+) -> LoadReport:
+    """Run a load test against an already running server."""
+    limits = httpx.Limits(max_connections=concurrency)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=30) as client:
+        return await run_load(client, mix, concurrency, duration, seed)
+
+
+def check_thresholds(
+    report: Dict[str, Any],
+    max_p99_ms: Optional[float],
+    max_error_rate: float,
+    min_rps: float,
+) -> List[str]:
+    """Return one message per threshold the report violates."""
+    failures = []
+    for name, stats in report["endpoints"].items():
+        if max_p99_ms is not None and stats["p99_ms"] > max_p99_ms:
+            failures.append(f"{name}: p99 {stats['p99_ms']:.1f}ms > {max_p99_ms}ms")
+        if stats["error_rate"] > max_error_rate:
+            failures.append(
+                f"{name}: error rate {stats['error_rate']:.2%} > {max_error_rate:.2%}"
+            )
+    if report["overall"]["rps"] < min_rps:
+        failures.append(f"throughput {report['overall']['rps']:.0f} rps < {min_rps}")
+    return failures
+
+
+def print_report(report: Dict[str, Any]) -> None:
+    """Print a per-endpoint table of throughput and latency percentiles."""
+    header = f"{'endpoint':<10}{'requests':>10}{'rps':>10}{'errors':>8}"
+    header += f"{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}"
+    print(header)
+    rows = list(report["endpoints"].items()) + [("overall", report["overall"])]
+    for name, stats in rows:
+        print(
+            f"{name:<10}{stats['requests']:>10}{stats['rps']:>10.0f}"
+            f"{stats['errors']:>8}{stats['p50_ms']:>10.2f}{stats['p95_ms']:>10.2f}"
+            f"{stats['p99_ms']:>10.2f}{stats['max_ms']:>10.2f}"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--mix", default=DEFAULT_MIX)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--url", help="Target a running server instead")
+    parser.add_argument("--max-p99-ms", type=float, help="Fail above this p99")
+    parser.add_argument("--max-error-rate", type=float, default=0.01)
+    parser.add_argument("--min-rps", type=float, default=0.0)
+    parser.add_argument("--output", help="Write the report as JSON to this file")
+    args = parser.parse_args()
+
+    mix = parse_mix(args.mix)
+    if args.url:
+        run = run_against_url(args.url, mix, args.concurrency, args.duration, args.seed)
+    else:
+        run = run_in_process(mix, args.concurrency, args.duration, args.seed)
+    report = asyncio.run(run).to_dict()
+
+    print_report(report)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    failures = check_thresholds(
+        report, args.max_p99_ms, args.max_error_rate, args.min_rps
+    )
+    for message in failures:
+        print(f"FAIL {message}")
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,224 @@
+"""Replay captured traffic against a fresh app and compare two builds.
+
+Capture traffic by running the app with ``CAPTURE_FILE=traffic.jsonl``. Then
+replay it on each build and compare the results:
+
+    python -m benchmarks.replay run traffic.jsonl --output build_a.json
+    git checkout other-build
+    python -m benchmarks.replay run traffic.jsonl --output build_b.json
+    python -m benchmarks.replay compare build_a.json build_b.json
+
+``run`` starts from the default catalog and sends requests either at their
+original pace (``--pace original``, scaled by ``--speed``) or back to back
+(``--pace fast``, with ``--concurrency`` workers). Responses are fingerprinted
+after dropping volatile JSON fields (``--ignore-field``, default
+``updated_at``). ``compare`` reports per-route latency changes and responses
+that differ, and exits 1 on mismatches or on a slowdown above
+``--max-slowdown``.
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+import httpx
+
+from app import create_app
+from app.capture import decode_body, read_capture
+from app.db import reset_books
+from benchmarks.load_test import percentile
+
+
+def _strip_fields(value: Any, ignored: Sequence[str]) -> Any:
+    if isinstance(value, dict):
+        return {
+            key: _strip_fields(item, ignored)
+            for key, item in value.items()
+            if key not in ignored
+        }
+    if isinstance(value, list):
+        return [_strip_fields(item, ignored) for item in value]
+    return value
+
+
+def fingerprint(response: httpx.Response, ignored: Sequence[str]) -> str:
+    """Hash a response body, ignoring volatile fields in JSON payloads."""
+    content = response.content
+    if response.headers.get("content-type", "").startswith("application/json"):
+        try:
+            normalized = _strip_fields(response.json(), ignored)
+            content = json.dumps(normalized, sort_keys=True).encode()
+        except ValueError:
+            pass
+    return hashlib.sha1(content).hexdigest()[:16]
+
+
+async def _send(
+    client: httpx.AsyncClient,
+    index: int,
+    record: Dict[str, Any],
+    ignored: Sequence[str],
+    results: List[Optional[Dict[str, Any]]],
+) -> None:
+    headers = {"content-type": record["ct"]} if record.get("ct") else {}
+    headers.update(record.get("h", {}))
+    url = record["p"] + (f"?{record['q']}" if record.get("q") else "")
+    start = time.perf_counter()
+    response = await client.request(
+        record["m"], url, content=decode_body(record), headers=headers
+    )
+    results[index] = {
+        "route": f"{record['m']} {record.get('r') or record['p']}",
+        "status": response.status_code,
+        "latency": time.perf_counter() - start,
+        "digest": fingerprint(response, ignored),
+    }
+
+
+async def replay(
+    records: List[Dict[str, Any]],
+    pace: str = "fast",
+    speed: float = 1.0,
+    concurrency: int = 1,
+    ignored: Sequence[str] = ("updated_at",),
+) -> List[Dict[str, Any]]:
+    """Send ``records`` to a fresh app and return one result per request."""
+    reset_books()
+    app = create_app()
+    results: List[Optional[Dict[str, Any]]] = [None] * len(records)
+    transport = httpx.ASGITransport(app=app)
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://replay"
+        ) as client:
+            if pace == "original":
+                origin = records[0]["t"] if records else 0.0
+                started = time.perf_counter()
+                tasks = []
+                for index, record in enumerate(records):
+                    due = (record["t"] - origin) / speed
+                    delay = due - (time.perf_counter() - started)
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+                    tasks.append(
+                        asyncio.create_task(
+                            _send(client, index, record, ignored, results)
+                        )
+                    )
+                await asyncio.gather(*tasks)
+            else:
+                queue = iter(enumerate(records))
+
+                async def worker() -> None:
+                    for index, record in queue:
+                        await _send(client, index, record, ignored, results)
+
+                await asyncio.gather(*(worker() for _ in range(concurrency)))
+    reset_books()
+    return [result for result in results if result is not None]
+
+
+def summarize(results: List[Dict[str, Any]]) -> Dict[str, Dict[str, float]]:
+    """Per-route request count and latency percentiles in milliseconds."""
+    by_route: Dict[str, List[float]] = {}
+    for result in results:
+        by_route.setdefault(result["route"], []).append(result["latency"])
+    summary = {}
+    for route, latencies in sorted(by_route.items()):
+        latencies.sort()
+        summary[route] = {
+            "requests": len(latencies),
+            "p50_ms": percentile(latencies, 0.50) * 1000,
+            "p95_ms": percentile(latencies, 0.95) * 1000,
+            "p99_ms": percentile(latencies, 0.99) * 1000,
+        }
+    return summary
+
+
+def compare(
+    before: Dict[str, Any], after: Dict[str, Any], max_slowdown: float
+) -> List[str]:
+    """Print the latency comparison and return failure messages."""
+    failures = []
+    print(
+        f"{'route':<50}{'p50 before':>12}{'p50 after':>12}{'p99 before':>12}"
+        f"{'p99 after':>12}"
+    )
+    for route, stats in after["routes"].items():
+        base = before["routes"].get(route)
+        if base is None:
+            continue
+        print(
+            f"{route:<50}{base['p50_ms']:>12.2f}{stats['p50_ms']:>12.2f}"
+            f"{base['p99_ms']:>12.2f}{stats['p99_ms']:>12.2f}"
+        )
+        if base["p50_ms"] and stats["p50_ms"] > base["p50_ms"] * (1 + max_slowdown):
+            failures.append(
+                f"{route}: p50 {base['p50_ms']:.2f}ms -> {stats['p50_ms']:.2f}ms"
+            )
+
+    mismatches = 0
+    for index, (old, new) in enumerate(zip(before["requests"], after["requests"])):
+        if (old["status"], old["digest"]) != (new["status"], new["digest"]):
+            mismatches += 1
+            if mismatches <= 20:
+                print(
+                    f"MISMATCH #{index} {new['route']}: "
+                    f"{old['status']}/{old['digest']} -> "
+                    f"{new['status']}/{new['digest']}"
+                )
+    if len(before["requests"]) != len(after["requests"]):
+        failures.append("replays contain a different number of requests")
+    if mismatches:
+        failures.append(f"{mismatches} response(s) differ")
+    return failures
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="Replay a capture file")
+    run.add_argument("capture", type=Path)
+    run.add_argument("--output", type=Path, required=True)
+    run.add_argument("--pace", choices=["original", "fast"], default="fast")
+    run.add_argument("--speed", type=float, default=1.0)
+    run.add_argument("--concurrency", type=int, default=1)
+    run.add_argument("--ignore-field", action="append", default=None)
+
+    diff = commands.add_parser("compare", help="Compare two replay results")
+    diff.add_argument("before", type=Path)
+    diff.add_argument("after", type=Path)
+    diff.add_argument("--max-slowdown", type=float, default=0.25)
+
+    args = parser.parse_args()
+    if args.command == "run":
+        records = list(read_capture(args.capture))
+        ignored = args.ignore_field or ["updated_at"]
+        results = asyncio.run(
+            replay(records, args.pace, args.speed, args.concurrency, ignored)
+        )
+        report = {"requests": results, "routes": summarize(results)}
+        args.output.write_text(json.dumps(report, indent=1))
+        print(f"Replayed {len(results)} request(s) -> {args.output}")
+        for route, stats in report["routes"].items():
+            print(f"{route:<50}{stats['requests']:>8}{stats['p50_ms']:>10.2f}ms")
+        return
+
+    before = json.loads(args.before.read_text())
+    after = json.loads(args.after.read_text())
+    failures = compare(before, after, args.max_slowdown)
+    for message in failures:
+        print(f"FAIL {message}")
+    if failures:
+        sys.exit(1)
+    print("Replays match")
+
+
+if __name__ == "__main__":
+    main()
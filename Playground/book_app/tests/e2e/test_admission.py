@@ -0,0 +1,50 @@
+import os
+import unittest
+from unittest import mock
+
+from fastapi.testclient import TestClient
+
+from app import create_app
+from app.admission import AdmissionMiddleware
+from app.db import reset_books
+
+
+class TestAdmissionControl(unittest.TestCase):
+    """End-to-end tests for load shedding in the application."""
+
+    def setUp(self):
+        """Reset the database before each test."""
+        reset_books()
+
+    def test_saturated_class_is_shed(self):
+        """Test that a class with no capacity gets 503 while others still work."""
+        env = {"ADMISSION_LIMITS": "write=0:0", "ADMISSION_RETRY_AFTER": "3"}
+        with mock.patch.dict(os.environ, env):
+            client = TestClient(create_app())
+        response = client.post(
+            "/api/books", json={"title": "T", "author": "A", "category": "C"}
+        )
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.headers["retry-after"], "3")
+        self.assertEqual(client.get("/api/books").status_code, 200)
+        self.assertEqual(client.delete("/api/books/1").status_code, 503)
+        metrics = client.get("/metrics").text
+        self.assertIn(
+            'http_requests_total{method="POST",route="/api/books",status="503"} 1',
+            metrics,
+        )
+        self.assertIn(
+            'http_requests_total{method="DELETE",route="/api/books/{book_id:int}",'
+            'status="503"} 1',
+            metrics,
+        )
+
+    def test_can_be_disabled(self):
+        """Test that ADMISSION_CONTROL=0 leaves the middleware out."""
+        with mock.patch.dict(os.environ, {"ADMISSION_CONTROL": "0"}):
+            app = create_app()
+        self.assertNotIn(AdmissionMiddleware, [m.cls for m in app.user_middleware])
+
+
+if __name__ == "__main__":
+    unittest.main()
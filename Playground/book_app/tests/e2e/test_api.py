@@ -1,8 +1,11 @@
 import unittest
+from unittest import mock
+
 from fastapi.testclient import TestClient
 
 from app import create_app
-from app.db import reset_books
+from app.db import load_books, reset_books, search_books_ranked
+from app.models import Book
 
 
 class TestBooksAPI(unittest.TestCase):
@@ -244,6 +247,324 @@ class TestBooksAPI(unittest.TestCase):
         response = self.client.post("/api/books", json=payload)
         self.assertEqual(response.status_code, 201)
 
+    def test_search_ranks_best_match_first(self):
+        """Test GET /api/books/search returns scored hits, best first."""
+        response = self.client.get("/api/books/search?q=atomic habits&limit=3")
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertLessEqual(len(data), 3)
+        self.assertEqual(data[0]["title"], "Atomic Habits")
+        scores = [hit["score"] for hit in data]
+        self.assertEqual(scores, sorted(scores, reverse=True))
+
+    def test_search_sees_writes(self):
+        """Test that created, updated and deleted books are reflected in search."""
+        self.client.get("/api/books/search?q=zebra")
+        created = self.client.post(
+            "/api/books",
+            json={
+                "title": "Zebra Strategy",
+                "author": "Ann Author",
+                "category": "Test",
+            },
+        ).json()
+        hits = self.client.get("/api/books/search?q=zebra").json()
+        self.assertEqual([hit["id"] for hit in hits], [created["id"]])
+
+        self.client.put(f"/api/books/{created['id']}", json={"title": "Lion Strategy"})
+        self.assertEqual(self.client.get("/api/books/search?q=zebra").json(), [])
+        self.client.delete(f"/api/books/{created['id']}")
+        self.assertEqual(self.client.get("/api/books/search?q=lion").json(), [])
+
+    def test_search_validation(self):
+        """Test that the search query is required and the limit bounded."""
+        self.assertEqual(self.client.get("/api/books/search").status_code, 422)
+        response = self.client.get("/api/books/search?q=habits&limit=1000")
+        self.assertEqual(response.status_code, 422)
+
+    def test_fields_projects_list(self):
+        """Test GET /api/books?fields= returns only the requested fields."""
+        full = self.client.get("/api/books").json()
+        response = self.client.get("/api/books?fields=title,id&category=Self-Help")
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(len(data), 10)
+        self.assertEqual(list(data[0]), ["id", "title"])
+        self.assertEqual(data[0], {"id": full[0]["id"], "title": full[0]["title"]})
+
+    def test_fields_projects_single_book(self):
+        """Test detail and title lookups honour fields and keep the ETag."""
+        full = self.client.get("/api/books/1/details")
+        response = self.client.get("/api/books/1/details?fields=updated_at,version")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers["ETag"], full.headers["ETag"])
+        self.assertEqual(
+            response.json(),
+            {
+                "updated_at": full.json()["updated_at"],
+                "version": full.json()["version"],
+            },
+        )
+        response = self.client.get("/api/books/Atomic Habits?fields=author")
+        self.assertEqual(response.json(), {"author": full.json()["author"]})
+
+    def test_fields_projects_search_hits(self):
+        """Test search hits can be projected, score included."""
+        response = self.client.get("/api/books/search?q=atomic habits&fields=id,score")
+        self.assertEqual(response.status_code, 200)
+        hit = response.json()[0]
+        self.assertEqual(list(hit), ["id", "score"])
+        self.assertEqual(hit["id"], 1)
+
+    def test_fields_validation(self):
+        """Test that unknown or malformed field lists are rejected."""
+        for fields in ("isbn", "id,,title", "id,score", "ID"):
+            response = self.client.get(f"/api/books?fields={fields}")
+            self.assertEqual(response.status_code, 422, fields)
+
+    def test_suggest_titles_and_authors(self):
+        """Test GET /api/books/suggest matches prefixes in any case."""
+        response = self.client.get("/api/books/suggest?prefix=ATOM")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.json(), [{"text": "Atomic Habits", "kind": "title", "books": 2}]
+        )
+        hits = self.client.get("/api/books/suggest?prefix=t&limit=3").json()
+        self.assertEqual(len(hits), 3)
+        self.assertEqual(self.client.get("/api/books/suggest").status_code, 422)
+
+    def test_suggest_sees_writes(self):
+        """Test that created and deleted books are reflected in suggestions."""
+        self.client.get("/api/books/suggest?prefix=zebra")
+        created = self.client.post(
+            "/api/books",
+            json={
+                "title": "Zebra Crossing",
+                "author": "Ann Author",
+                "category": "Test",
+            },
+        ).json()
+        hits = self.client.get("/api/books/suggest?prefix=zeb").json()
+        self.assertEqual([hit["text"] for hit in hits], ["Zebra Crossing"])
+        self.client.delete(f"/api/books/{created['id']}")
+        self.assertEqual(self.client.get("/api/books/suggest?prefix=zeb").json(), [])
+
+    def test_delta_sync(self):
+        """Test GET /api/books/changes returns a full copy, then only changes."""
+        full = self.client.get("/api/books/changes").json()
+        self.assertTrue(full["reset"])
+        self.assertEqual(len(full["books"]), 50)
+
+        self.client.put("/api/books/1", json={"title": "Atomic Habits Revised"})
+        self.client.delete("/api/books/2")
+        delta = self.client.get(f"/api/books/changes?since={full['version']}").json()
+        self.assertFalse(delta["reset"])
+        self.assertEqual([book["id"] for book in delta["books"]], [1])
+        self.assertEqual(delta["deleted"], [2])
+        self.assertEqual(delta["version"], full["version"] + 2)
+        self.assertEqual(
+            self.client.get("/api/books/changes?since=-1").status_code, 422
+        )
+
+    def test_conditional_update(self):
+        """Test that PUT with If-Match succeeds once and then fails with 412."""
+        etag = self.client.get("/api/books/1/details").headers["etag"]
+        self.assertEqual(etag, '"1"')
+        response = self.client.put(
+            "/api/books/1",
+            json={"title": "Atomic Habits 2"},
+            headers={"If-Match": etag},
+        )
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(response.headers["etag"], '"2"')
+
+        stale = self.client.put(
+            "/api/books/1", json={"author": "Someone"}, headers={"If-Match": etag}
+        )
+        self.assertEqual(stale.status_code, 412)
+        self.assertEqual(stale.headers["etag"], '"2"')
+        book = self.client.get("/api/books/1/details").json()
+        self.assertEqual(
+            (book["title"], book["author"], book["version"]),
+            ("Atomic Habits 2", "James Clear", 2),
+        )
+
+    def test_conditional_delete(self):
+        """Test that DELETE with a stale If-Match is refused with 412."""
+        self.client.put("/api/books/1", json={"title": "Atomic Habits 2"})
+        stale = self.client.delete("/api/books/1", headers={"If-Match": '"1"'})
+        self.assertEqual(stale.status_code, 412)
+        current = self.client.delete("/api/books/1", headers={"If-Match": '"2"'})
+        self.assertEqual(current.status_code, 204)
+        gone = self.client.delete("/api/books/1", headers={"If-Match": '"2"'})
+        self.assertEqual(gone.status_code, 404)
+
+    def test_get_all_books_sorted(self):
+        """Test GET /api/books?sort= with paging and projection."""
+        response = self.client.get("/api/books?sort=-updated_at,title&limit=5")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()), 5)
+        self.client.put("/api/books/7", json={"title": "Freshly Updated"})
+        newest = self.client.get("/api/books?sort=-updated_at&limit=1&fields=id")
+        self.assertEqual(newest.json(), [{"id": 7}])
+        titles = [
+            book["title"]
+            for book in self.client.get("/api/books?sort=title&offset=1").json()
+        ]
+        self.assertEqual(len(titles), 49)
+        self.assertEqual(titles, sorted(titles, key=str.casefold))
+
+    def test_get_all_books_sort_validation(self):
+        """Test that unknown sort fields and bad paging are rejected."""
+        for query in (
+            "sort=isbn",
+            "sort=--title",
+            "sort=title,",
+            "limit=0",
+            "offset=-1",
+        ):
+            response = self.client.get(f"/api/books?{query}")
+            self.assertEqual(response.status_code, 422, query)
+
+    def test_books_page_sorted(self):
+        """Test that the books page sorts, and ignores unknown sort orders."""
+        response = self.client.get("/books?sort=title&category=Business")
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('<option value="title" selected>', response.text)
+        self.assertEqual(self.client.get("/books?sort=bogus").status_code, 200)
+
+    def test_stats(self):
+        """Test GET /api/books/stats counts and their update after writes."""
+        response = self.client.get("/api/books/stats")
+        self.assertEqual(response.status_code, 200)
+        stats = response.json()
+        self.assertEqual(stats["total"], 50)
+        self.assertEqual(stats["categories"]["Self-Help"], 10)
+        self.assertEqual(sum(stats["authors"].values()), 50)
+        self.client.delete("/api/books/1")
+        stats = self.client.get("/api/books/stats").json()
+        self.assertEqual(stats["total"], 49)
+        self.assertEqual(stats["categories"]["Self-Help"], 9)
+        self.assertIsNotNone(stats["last_updated_at"])
+
+    def test_duplicates(self):
+        """Test GET /api/books/duplicates finds the duplicated seed book."""
+        response = self.client.get("/api/books/duplicates")
+        self.assertEqual(response.status_code, 200)
+        [cluster] = response.json()
+        self.assertEqual([book["id"] for book in cluster["books"]], [1, 10])
+        self.assertEqual((cluster["exact"], cluster["similarity"]), (True, 1.0))
+
+    def test_create_with_duplicate_check(self):
+        """Test that check_duplicates refuses look-alikes and allows new books."""
+        payload = {
+            "title": "atomic  habits!",
+            "author": "James Clear",
+            "category": "Self-Help",
+        }
+        refused = self.client.post("/api/books?check_duplicates=true", json=payload)
+        self.assertEqual(refused.status_code, 409)
+        self.assertIn("1, 10", refused.json()["detail"])
+        created = self.client.post("/api/books", json=payload)
+        self.assertEqual(created.status_code, 201)
+        payload["title"] = "Entirely New Title"
+        fresh = self.client.post("/api/books?check_duplicates=true", json=payload)
+        self.assertEqual(fresh.status_code, 201)
+
+    def test_books_page_partial_word_search(self):
+        """Test that the books page still finds partial words."""
+        response = self.client.get("/books?search=habi")
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("Atomic Habits", response.text)
+
+    def test_books_page_fragment(self):
+        """Test that X-Fragment renders only the results of the books page."""
+        page = self.client.get("/books?category=Business")
+        fragment = self.client.get(
+            "/books?category=Business", headers={"X-Fragment": "results"}
+        )
+        self.assertEqual(fragment.status_code, 200)
+        self.assertEqual(fragment.headers["vary"], "X-Fragment")
+        self.assertEqual(page.headers["vary"], "X-Fragment")
+        self.assertTrue(fragment.text.startswith('<div id="bookResults"'))
+        self.assertNotIn("<html", fragment.text)
+        self.assertIn(fragment.text, page.text)
+        self.assertLess(len(fragment.content) * 3, len(page.content))
+
+    def test_books_page_paging(self):
+        """Test that the books page is paged and links to neighbouring pages."""
+        with mock.patch("app.routes.ui.BOOKS_PAGE_SIZE", 20):
+            first = self.client.get("/books?sort=title")
+            last = self.client.get(
+                "/books?sort=title&page=3", headers={"X-Fragment": "1"}
+            )
+            beyond = self.client.get("/books?page=9", headers={"X-Fragment": "1"})
+        self.assertEqual(first.text.count('class="book-card"'), 20)
+        self.assertIn('href="/books?sort=title&amp;page=2"', first.text)
+        self.assertIn("Page 1 of 3", first.text)
+        self.assertEqual(last.text.count('class="book-card"'), 10)
+        self.assertIn('href="/books?sort=title&amp;page=2"', last.text)
+        self.assertNotIn("Next", last.text)
+        self.assertIn('data-total="50"', last.text)
+        self.assertIn("No books found", beyond.text)
+
+    def test_books_page_search_in_category(self):
+        """Test that a search with a category pages over every matching book."""
+        load_books(
+            [
+                Book(
+                    id=i,
+                    title=f"Habits {i}",
+                    author="Author",
+                    category=("History", "Business", "Science")[i % 3],
+                )
+                for i in range(1, 151)
+            ]
+        )
+        with mock.patch("app.routes.ui.BOOKS_PAGE_SIZE", 20):
+            first = self.client.get("/books?search=habits&category=history")
+            last = self.client.get(
+                "/books?search=habits&category=history&page=3",
+                headers={"X-Fragment": "1"},
+            )
+            everything = self.client.get(
+                "/books?search=habits&page=8", headers={"X-Fragment": "1"}
+            )
+        self.assertIn('data-total="50"', first.text)
+        self.assertEqual(first.text.count('class="book-card"'), 20)
+        self.assertEqual(last.text.count('class="book-card"'), 10)
+        self.assertNotIn("Business", last.text)
+        self.assertIn('data-total="150"', everything.text)
+        self.assertEqual(everything.text.count('class="book-card"'), 10)
+
+    def test_books_page_search_ranks_only_up_to_the_page(self):
+        """Test that a search page ranks offset + page size hits, not all of them."""
+        load_books(
+            [
+                Book(id=i, title=f"Habits {i}", author="Author", category="History")
+                for i in range(1, 151)
+            ]
+        )
+        with (
+            mock.patch("app.routes.ui.BOOKS_PAGE_SIZE", 20),
+            mock.patch(
+                "app.routes.ui.search_books_ranked", wraps=search_books_ranked
+            ) as ranked,
+        ):
+            response = self.client.get(
+                "/books?search=habits&page=2", headers={"X-Fragment": "1"}
+            )
+        ranked.assert_called_once_with("habits", 40, None)
+        self.assertIn('data-total="150"', response.text)
+        self.assertEqual(response.text.count('class="book-card"'), 20)
+
+    def test_admin_rows_fragment(self):
+        """Test that X-Fragment renders only the admin table rows."""
+        response = self.client.get("/admin", headers={"X-Fragment": "rows"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.text.count("<tr "), 50)
+        self.assertNotIn("<table", response.text)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,95 @@
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from fastapi.testclient import TestClient
+
+from app import create_app
+from app.capture import decode_body, read_capture
+from app.db import reset_books
+
+
+class TestTrafficCapture(unittest.TestCase):
+    """E2E tests for the traffic capture middleware."""
+
+    def setUp(self):
+        """Create an app that captures to a temporary file."""
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp.name) / "traffic.jsonl"
+        with mock.patch.dict(os.environ, {"CAPTURE_FILE": str(self.path)}):
+            self.app = create_app()
+        self.client = TestClient(self.app)
+        reset_books()
+
+    def tearDown(self):
+        """Close the recorder, remove the capture and reset database."""
+        self.app.state.recorder.close()
+        self.tmp.cleanup()
+        reset_books()
+
+    def _records(self) -> list:
+        self.app.state.recorder.close()
+        return list(read_capture(self.path))
+
+    def test_capture_disabled_by_default(self):
+        """Test that no recorder exists without CAPTURE_FILE."""
+        with mock.patch.dict(os.environ, {"CAPTURE_FILE": ""}):
+            self.assertIsNone(create_app().state.recorder)
+
+    def test_records_route_query_and_status(self):
+        """Test that reads are recorded with route template, query and status."""
+        self.client.get("/api/books?category=Business")
+        self.client.get("/api/books/999/details")
+
+        first, second = self._records()
+        self.assertEqual(first["m"], "GET")
+        self.assertEqual(first["r"], "/api/books")
+        self.assertEqual(first["q"], "category=Business")
+        self.assertEqual(first["s"], 200)
+        self.assertEqual(second["p"], "/api/books/999/details")
+        self.assertEqual(second["r"], "/api/books/{book_id:int}/details")
+        self.assertEqual(second["s"], 404)
+        self.assertLessEqual(first["t"], second["t"])
+
+    def test_records_request_body(self):
+        """Test that write bodies are captured and can be decoded."""
+        self.client.post(
+            "/api/books",
+            json={"title": "Captured Book", "author": "Author", "category": "Test"},
+        )
+        (record,) = self._records()
+        self.assertEqual(record["s"], 201)
+        self.assertEqual(record["ct"], "application/json")
+        self.assertIn(b"Captured Book", decode_body(record))
+
+    def test_records_headers_that_change_the_response(self):
+        """Test that X-Fragment and If-Match are kept for replay."""
+        self.client.get("/books", headers={"X-Fragment": "1"})
+        self.client.delete("/api/books/1", headers={"If-Match": '"1"'})
+        self.client.get("/api/books")
+        fragment, delete, plain = self._records()
+        self.assertEqual(fragment["h"], {"x-fragment": "1"})
+        self.assertEqual(delete["h"], {"if-match": '"1"'})
+        self.assertNotIn("h", plain)
+
+    def test_appending_continues_offsets(self):
+        """Test that a recorder appending to a capture keeps ``t`` increasing."""
+        self.app.state.recorder.close()
+        self.path.write_text('{"t":100.0,"m":"GET","p":"/api/books"}\n')
+        with mock.patch.dict(os.environ, {"CAPTURE_FILE": str(self.path)}):
+            self.app = create_app()
+        TestClient(self.app).get("/api/books")
+        earlier, appended = self._records()
+        self.assertEqual(earlier["t"], 100.0)
+        self.assertGreaterEqual(appended["t"], 100.0)
+
+    def test_sensitive_headers_not_recorded(self):
+        """Test that only the headers needed for replay are stored."""
+        self.client.get("/api/books", headers={"X-Profile-Token": "secret"})
+        self.assertNotIn("secret", self.path.read_text() + str(self._records()))
+
+
+if __name__ == "__main__":
+    unittest.main()
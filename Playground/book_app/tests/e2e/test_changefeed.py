@@ -0,0 +1,60 @@
+import asyncio
+import unittest
+from unittest import mock
+
+import httpx
+from fastapi.testclient import TestClient
+
+from app import create_app
+from app.changefeed import feed
+from app.db import reset_books
+
+
+class TestChangeFeedEndpoint(unittest.TestCase):
+    """End-to-end tests for the server-sent book change feed."""
+
+    def setUp(self):
+        """Reset the database before each test."""
+        reset_books()
+
+    def test_stream_receives_writes(self):
+        """Test that API writes reach an open /api/books/events stream."""
+
+        async def scenario():
+            transport = httpx.ASGITransport(app=create_app())
+            async with httpx.AsyncClient(
+                transport=transport, base_url="http://test"
+            ) as client:
+                stream = asyncio.create_task(
+                    client.get(f"/api/books/events?since={feed.version}")
+                )
+                await asyncio.sleep(0.05)
+                created = await client.post(
+                    "/api/books",
+                    json={"title": "Feed Test", "author": "Ann", "category": "Test"},
+                )
+                await client.delete(f"/api/books/{created.json()['id']}")
+                await asyncio.sleep(0.05)
+                feed.disconnect_all()
+                return await stream
+
+        response = asyncio.run(scenario())
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(
+            response.headers["content-type"].startswith("text/event-stream")
+        )
+        self.assertIn("event: create", response.text)
+        self.assertIn('"title":"Feed Test"', response.text)
+        self.assertIn("event: delete", response.text)
+        self.assertEqual(feed.subscribers, set())
+
+    def test_full_feed_is_refused(self):
+        """Test that subscribers over the limit get 503 with Retry-After."""
+        with mock.patch.object(feed, "max_subscribers", 0):
+            response = TestClient(create_app()).get("/api/books/events")
+        self.assertEqual(response.status_code, 503)
+        self.assertIn("retry-after", response.headers)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,85 @@
+import unittest
+from fastapi.testclient import TestClient
+
+from app import create_app
+from app.db import reset_books
+from app.db.instrumentation import db_stats
+from app.metrics import REGISTRY
+
+
+class TestMetricsEndpoint(unittest.TestCase):
+    """E2E tests for request metrics and the /metrics endpoint."""
+
+    def setUp(self):
+        """Initialize test client and reset database and metrics."""
+        self.app = create_app()
+        self.client = TestClient(self.app)
+        reset_books()
+        REGISTRY.reset()
+
+    def tearDown(self):
+        """Reset database after each test."""
+        reset_books()
+
+    def test_metrics_content_type(self):
+        """Test GET /metrics returns Prometheus text format."""
+        response = self.client.get("/metrics")
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.headers["content-type"].startswith("text/plain"))
+
+    def test_requests_labelled_by_route_template(self):
+        """Test that requests are recorded under the route template, not raw path."""
+        self.client.get("/api/books/1/details")
+        self.client.get("/api/books/2/details")
+        self.client.get("/api/books/999/details")
+
+        text = self.client.get("/metrics").text
+        template = "/api/books/{book_id:int}/details"
+        self.assertIn(
+            f'http_requests_total{{method="GET",route="{template}",status="200"}} 2',
+            text,
+        )
+        self.assertIn(
+            f'http_requests_total{{method="GET",route="{template}",status="404"}} 1',
+            text,
+        )
+        self.assertNotIn("/api/books/1/details", text)
+
+    def test_unmatched_paths_share_one_series(self):
+        """Test that unknown paths do not create a series per path."""
+        self.client.get("/no/such/path")
+        self.client.get("/another/missing/path")
+        text = self.client.get("/metrics").text
+        self.assertIn('route="<unmatched>",status="404"} 2', text)
+
+    def test_latency_histogram_and_in_flight(self):
+        """Test that latency buckets and the in-flight gauge are exposed."""
+        self.client.get("/api/books")
+        text = self.client.get("/metrics").text
+        self.assertIn('http_request_duration_seconds_bucket{method="GET"', text)
+        self.assertIn("http_requests_in_flight 1", text)
+
+    def test_db_stats_exposed_when_enabled(self):
+        """Test that store statistics appear on /debug/db and /metrics."""
+        db_stats.reset()
+        db_stats.enable()
+        try:
+            self.client.get("/api/books?category=Business")
+            debug = self.client.get("/debug/db").json()
+            text = self.client.get("/metrics").text
+        finally:
+            db_stats.disable()
+            db_stats.reset()
+
+        self.assertTrue(debug["enabled"])
+        self.assertEqual(debug["operations"]["get_all_books"]["rows_returned"], 10)
+        self.assertIn('db_rows_scanned_total{operation="get_all_books"} 50', text)
+
+    def test_db_stats_hidden_when_disabled(self):
+        """Test that store metrics are not rendered while disabled."""
+        text = self.client.get("/metrics").text
+        self.assertNotIn("db_operation_duration_seconds", text)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,105 @@
+import os
+import pstats
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from fastapi.testclient import TestClient
+
+from app import create_app
+from app.db import reset_books
+
+TOKEN = "test-admin-token"
+
+
+class TestProfilingDisabled(unittest.TestCase):
+    """E2E tests for the app when profiling is not configured."""
+
+    def test_profiling_routes_absent(self):
+        """Test that profiling routes do not exist without PROFILING_TOKEN."""
+        with mock.patch.dict(os.environ, {"PROFILING_TOKEN": ""}):
+            app = create_app()
+        client = TestClient(app)
+        self.assertIsNone(app.state.profiler)
+        self.assertEqual(client.get("/debug/profile").status_code, 404)
+        response = client.get("/api/books", headers={"X-Profile-Token": TOKEN})
+        self.assertNotIn("x-profile-id", response.headers)
+
+
+class TestProfiling(unittest.TestCase):
+    """E2E tests for on-demand request profiling."""
+
+    def setUp(self):
+        """Create an app with profiling enabled and a temporary output folder."""
+        self.tmp = tempfile.TemporaryDirectory()
+        env = {"PROFILING_TOKEN": TOKEN, "PROFILING_DIR": self.tmp.name}
+        with mock.patch.dict(os.environ, env):
+            self.app = create_app()
+        self.client = TestClient(self.app)
+        self.headers = {"X-Profile-Token": TOKEN}
+        reset_books()
+
+    def tearDown(self):
+        """Remove saved profiles and reset database."""
+        self.tmp.cleanup()
+        reset_books()
+
+    def test_routes_require_token(self):
+        """Test that profiling routes reject missing or wrong tokens."""
+        self.assertEqual(self.client.get("/debug/profile").status_code, 403)
+        response = self.client.get(
+            "/debug/profiles", headers={"X-Profile-Token": "wrong"}
+        )
+        self.assertEqual(response.status_code, 403)
+
+    def test_header_triggers_profile(self):
+        """Test that the admin header profiles a single request."""
+        response = self.client.get("/api/books/1/details", headers=self.headers)
+        self.assertEqual(response.status_code, 200)
+        name = response.headers["x-profile-id"]
+        self.assertIn("GET_api_books_book_id_int_details", name)
+
+        plain = self.client.get("/api/books/1/details")
+        self.assertNotIn("x-profile-id", plain.headers)
+
+        stats = pstats.Stats(str(Path(self.tmp.name) / name))
+        self.assertGreater(stats.total_calls, 0)  # type: ignore[attr-defined]
+
+    def test_arm_next_requests(self):
+        """Test that arming profiles exactly the next N requests."""
+        response = self.client.post("/debug/profile?requests=2", headers=self.headers)
+        self.assertEqual(response.json()["remaining_requests"], 2)
+
+        profiled = [
+            "x-profile-id" in self.client.get("/api/books").headers for _ in range(3)
+        ]
+        self.assertEqual(profiled, [True, True, False])
+
+    def test_arm_requires_requests_or_seconds(self):
+        """Test that arming without a budget is rejected."""
+        response = self.client.post("/debug/profile", headers=self.headers)
+        self.assertEqual(response.status_code, 400)
+
+    def test_list_and_download(self):
+        """Test that saved profiles can be listed and downloaded."""
+        name = self.client.get("/api/books", headers=self.headers).headers[
+            "x-profile-id"
+        ]
+        listing = self.client.get("/debug/profiles", headers=self.headers).json()
+        self.assertEqual([entry["name"] for entry in listing], [name])
+
+        download = self.client.get(f"/debug/profiles/{name}", headers=self.headers)
+        self.assertEqual(download.status_code, 200)
+        self.assertGreater(len(download.content), 0)
+
+    def test_download_rejects_unknown_names(self):
+        """Test that only saved profile files can be downloaded."""
+        response = self.client.get(
+            "/debug/profiles/..%2Fapp.pstats", headers=self.headers
+        )
+        self.assertEqual(response.status_code, 404)
+
+
+if __name__ == "__main__":
+    unittest.main()
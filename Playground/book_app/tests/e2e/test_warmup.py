@@ -0,0 +1,131 @@
+import asyncio
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from fastapi.testclient import TestClient
+
+from app import create_api_app, create_app
+from app.db import load_books, load_snapshot, reset_books, save_snapshot
+from app.db.snapshot import Snapshot
+from app.models import Book
+from app.metrics import REGISTRY
+from app.warmup import register_warmup_step, warm_up, warmup_request
+
+
+class TestWarmup(unittest.TestCase):
+    """End-to-end tests for the startup warm-up and readiness probe."""
+
+    def setUp(self):
+        """Reset the database and metrics before each test."""
+        reset_books()
+        REGISTRY.reset()
+
+    def test_not_ready_before_warmup(self):
+        """Test that /ready answers 503 until warm-up has run."""
+        client = TestClient(create_app())
+        response = client.get("/ready")
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.json(), {"status": "warming up"})
+
+    def test_blocking_warmup_is_ready_on_startup(self):
+        """Test that blocking warm-up finishes before the first request."""
+        with mock.patch.dict(os.environ, {"WARMUP_MODE": "blocking"}):
+            with TestClient(create_app()) as client:
+                response = client.get("/ready")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {"status": "ready"})
+
+    def test_warmup_off_is_ready_immediately(self):
+        """Test that disabling warm-up marks the app ready at startup."""
+        with mock.patch.dict(os.environ, {"WARMUP_MODE": "off"}):
+            with TestClient(create_app()) as client:
+                self.assertEqual(client.get("/ready").status_code, 200)
+
+    def test_invalid_mode_fails_startup(self):
+        """Test that an unknown warm-up mode is rejected at startup."""
+        with mock.patch.dict(os.environ, {"WARMUP_MODE": "sometimes"}):
+            with self.assertRaises(ValueError):
+                with TestClient(create_app()):
+                    pass
+
+    def test_warmup_runs_every_step(self):
+        """Test that warm-up runs each step and skips the UI for API-only apps."""
+        app = create_api_app()
+        timings = asyncio.run(warm_up(app))
+        self.assertEqual(
+            [name for name, _ in timings],
+            [
+                "store",
+                "search_index",
+                "prefix_index",
+                "sort_indexes",
+                "templates",
+                "openapi",
+                "requests",
+            ],
+        )
+        self.assertTrue(app.state.ready)
+        self.assertIsNotNone(app.openapi_schema)
+
+    def test_snapshot_warmup_decodes_few_books(self):
+        """Test that warm-up with a snapshot neither scans nor indexes the catalog."""
+        load_books(
+            [
+                Book(id=i, title=f"Book {i}", author="A", category="Business")
+                for i in range(1, 1001)
+            ]
+        )
+        with tempfile.TemporaryDirectory() as directory:
+            path = str(Path(directory) / "books.snap")
+            save_snapshot(path)
+            load_snapshot(path)
+            with mock.patch.object(
+                Snapshot, "book", autospec=True, side_effect=Snapshot.book
+            ) as decode:
+                asyncio.run(warm_up(create_app()))
+            reset_books()
+        self.assertLess(decode.call_count, 100)
+
+    def test_failing_step_does_not_block_readiness(self):
+        """Test that a failing step is logged and warm-up still completes."""
+
+        async def broken(app):
+            raise RuntimeError("boom")
+
+        with mock.patch.dict("app.warmup._steps"):
+            register_warmup_step("broken", broken)
+            app = create_api_app()
+            with self.assertLogs("app.warmup", level="ERROR"):
+                asyncio.run(warm_up(app))
+        self.assertTrue(app.state.ready)
+
+    def test_warmup_requests_are_not_recorded(self):
+        """Test that warm-up requests reach routes but not metrics or captures."""
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        capture = Path(directory.name) / "capture.jsonl"
+        with mock.patch.dict(os.environ, {"CAPTURE_FILE": str(capture)}):
+            app = create_app()
+        self.assertEqual(asyncio.run(warmup_request(app, "/books?search=habits")), 200)
+        self.assertEqual(
+            asyncio.run(warmup_request(app, "/api/books/Atomic Habits")), 200
+        )
+        self.assertEqual(asyncio.run(warmup_request(app, "/api/books/Unknown")), 404)
+        self.assertNotIn('route="/books"', REGISTRY.render())
+        app.state.recorder.close()
+        self.assertEqual(capture.read_text(), "")
+
+    def test_failing_warmup_request_is_a_500(self):
+        """Test that a route raising during warm-up is logged, not propagated."""
+        app = create_api_app()
+        with mock.patch("app.routes.db_get_stats", side_effect=RuntimeError("boom")):
+            with self.assertLogs("app.warmup", level="ERROR"):
+                status = asyncio.run(warmup_request(app, "/api/books/stats"))
+        self.assertEqual(status, 500)
+
+
+if __name__ == "__main__":
+    unittest.main()
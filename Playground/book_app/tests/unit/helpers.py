@@ -0,0 +1,35 @@
+"""Builders and fakes shared by the unit tests."""
+
+from datetime import datetime
+from typing import Optional
+
+from app.models import Book
+
+START = datetime(2024, 1, 1)
+
+
+def make_book(
+    book_id: int,
+    title: Optional[str] = None,
+    author: str = "Author",
+    category: str = "Test",
+    updated_at: datetime = START,
+) -> Book:
+    """Build a book, titled ``Book <id>`` unless ``title`` is given."""
+    return Book(
+        id=book_id,
+        title=f"Book {book_id}" if title is None else title,
+        author=author,
+        category=category,
+        updated_at=updated_at,
+    )
+
+
+class FakeClock:
+    """Manually advanced clock for TTL and retention tests."""
+
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
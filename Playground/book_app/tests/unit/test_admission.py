@@ -0,0 +1,156 @@
+import asyncio
+import unittest
+
+from app.admission import (
+    DEFAULT_LIMITS,
+    AdmissionGate,
+    AdmissionMiddleware,
+    classify,
+    parse_limits,
+)
+from app.metrics import MetricsRegistry
+
+
+def _scope(method: str, path: str, query: bytes = b"") -> dict:
+    return {"type": "http", "method": method, "path": path, "query_string": query}
+
+
+class TestClassify(unittest.TestCase):
+    """Unit tests for mapping requests to route classes."""
+
+    def test_route_classes(self):
+        """Test that reads, searches, writes and pages get their own class."""
+        self.assertEqual(classify(_scope("GET", "/api/books")), "read")
+        self.assertEqual(classify(_scope("GET", "/api/books/1/details")), "read")
+        self.assertEqual(classify(_scope("GET", "/books", b"search=habits")), "search")
+        self.assertEqual(classify(_scope("POST", "/api/books")), "write")
+        self.assertEqual(classify(_scope("DELETE", "/api/books/1")), "write")
+        self.assertEqual(classify(_scope("GET", "/books/1")), "ui")
+        self.assertEqual(classify(_scope("GET", "/books", b"a=1&search=")), "search")
+        for query in (b"research=x", b"fulltext_search=x", b"q=search"):
+            self.assertEqual(classify(_scope("GET", "/books", query)), "ui")
+
+    def test_ops_routes_are_exempt(self):
+        """Test that probes, metrics, docs and the change feed are never limited."""
+        for path in (
+            "/ready",
+            "/metrics",
+            "/debug/db",
+            "/docs",
+            "/openapi.json",
+            "/api/books/events",
+        ):
+            self.assertIsNone(classify(_scope("GET", path)))
+
+
+class TestParseLimits(unittest.TestCase):
+    """Unit tests for the ADMISSION_LIMITS format."""
+
+    def test_overrides_defaults(self):
+        """Test that listed classes are replaced and the rest keep defaults."""
+        limits = parse_limits("search=4:8, write=2")
+        self.assertEqual(limits["search"], (4, 8))
+        self.assertEqual(limits["write"], (2, DEFAULT_LIMITS["write"][1]))
+        self.assertEqual(limits["read"], DEFAULT_LIMITS["read"])
+
+    def test_unknown_class(self):
+        """Test that an unknown route class is rejected."""
+        with self.assertRaises(ValueError):
+            parse_limits("bulk=1:1")
+
+
+class TestAdmissionGate(unittest.TestCase):
+    """Unit tests for the per-class concurrency gate."""
+
+    def test_queue_then_refuse(self):
+        """Test that requests queue up to the bound and are refused beyond it."""
+
+        async def scenario():
+            gate = AdmissionGate(limit=1, queue_size=1)
+            self.assertIsNone(await gate.acquire())
+            queued = asyncio.create_task(gate.acquire())
+            await asyncio.sleep(0)
+            self.assertEqual(gate.waiting, 1)
+            self.assertEqual(await gate.acquire(), "queue_full")
+            gate.release()
+            self.assertIsNone(await queued)
+            self.assertEqual((gate.active, gate.waiting), (1, 0))
+            gate.release()
+            self.assertEqual(gate.active, 0)
+
+        asyncio.run(scenario())
+
+    def test_timeout_leaves_queue(self):
+        """Test that a waiter that times out gives up its place in the queue."""
+
+        async def scenario():
+            gate = AdmissionGate(limit=1, queue_size=5)
+            await gate.acquire()
+            self.assertEqual(await gate.acquire(timeout=0.01), "timeout")
+            self.assertEqual(gate.waiting, 0)
+            gate.release()
+            self.assertEqual(gate.active, 0)
+
+        asyncio.run(scenario())
+
+    def test_cancelled_waiter_does_not_leak_slot(self):
+        """Test that cancelling a waiter keeps the slot count consistent."""
+
+        async def scenario():
+            gate = AdmissionGate(limit=1, queue_size=5)
+            await gate.acquire()
+            waiter = asyncio.create_task(gate.acquire())
+            await asyncio.sleep(0)
+            waiter.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await waiter
+            gate.release()
+            self.assertEqual((gate.active, gate.waiting), (0, 0))
+
+        asyncio.run(scenario())
+
+
+class TestAdmissionMiddleware(unittest.TestCase):
+    """Unit tests for shedding requests with 503 and Retry-After."""
+
+    def test_sheds_when_saturated(self):
+        """Test that a saturated class answers 503 and counts the shed request."""
+        release = asyncio.Event()
+
+        async def app(scope, receive, send):
+            await release.wait()
+            await send({"type": "http.response.start", "status": 200, "headers": []})
+            await send({"type": "http.response.body", "body": b""})
+
+        async def call(middleware, scope):
+            sent = []
+
+            async def send(message):
+                sent.append(message)
+
+            await middleware(scope, None, send)
+            return sent
+
+        async def scenario():
+            registry = MetricsRegistry()
+            middleware = AdmissionMiddleware(
+                app, limits={"write": (1, 0)}, retry_after=7, registry=registry
+            )
+            first = asyncio.create_task(call(middleware, _scope("POST", "/api/books")))
+            await asyncio.sleep(0)
+            shed = await call(middleware, _scope("POST", "/api/books"))
+            release.set()
+            self.assertEqual((await first)[0]["status"], 200)
+            return shed, registry.render()
+
+        shed, metrics = asyncio.run(scenario())
+        self.assertEqual(shed[0]["status"], 503)
+        self.assertIn((b"retry-after", b"7"), shed[0]["headers"])
+        self.assertIn(
+            'http_requests_shed_total{class="write",reason="queue_full"} 1', metrics
+        )
+        self.assertIn('admission_in_flight{class="write"} 0', metrics)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,160 @@
+import asyncio
+import signal
+import unittest
+
+from app.changefeed import ChangeFeed, FeedFull, disconnect_on_exit_signals
+from app.metrics import MetricsRegistry
+
+from .helpers import make_book
+
+
+def _events(frames):
+    return [frame.decode().split("\n")[1].removeprefix("event: ") for frame in frames]
+
+
+class TestChangeFeed(unittest.TestCase):
+    """Unit tests for fanning store changes out to subscribers."""
+
+    def setUp(self):
+        """Create a feed with small limits and its own metrics registry."""
+        self.registry = MetricsRegistry()
+        self.feed = ChangeFeed(
+            history_size=3, buffer_size=2, max_subscribers=2, registry=self.registry
+        )
+
+    def _publish(self, count: int) -> None:
+        for book_id in range(1, count + 1):
+            self.feed.publish("create", make_book(book_id))
+
+    def test_event_format(self):
+        """Test that events carry the feed version as id and the book as data."""
+        self.feed.publish("update", make_book(7, "Deep Work"))
+        self.feed.publish("delete", make_book(7))
+        first, second = (frame.decode() for _, frame in self.feed.history)
+        self.assertTrue(first.startswith("id: 1\nevent: update\ndata: {"))
+        self.assertIn('"title":"Deep Work"', first)
+        self.assertEqual(second, 'id: 2\nevent: delete\ndata: {"version":2,"id":7}\n\n')
+
+    def test_resume_replays_missed_events(self):
+        """Test that a client resuming within the history gets what it missed."""
+
+        async def scenario():
+            self._publish(3)
+            subscriber, backlog = self.feed.subscribe(since=1)
+            self.assertEqual(len(backlog), 2)
+            _, current = self.feed.subscribe(since=3)
+            self.assertEqual(current, [])
+            return backlog
+
+        backlog = asyncio.run(scenario())
+        self.assertTrue(backlog[0].startswith(b"id: 2\n"))
+
+    def test_resume_too_old_or_unknown_gets_reset(self):
+        """Test that versions outside the history get a single reset event."""
+
+        async def scenario():
+            self._publish(5)
+            _, old = self.feed.subscribe(since=1)
+            _, future = self.feed.subscribe(since=99)
+            return old, future
+
+        old, future = asyncio.run(scenario())
+        self.assertEqual(_events(old), ["reset"])
+        self.assertEqual(_events(future), ["reset"])
+
+    def test_fan_out_and_subscriber_limit(self):
+        """Test that every subscriber gets each event and the limit holds."""
+
+        async def scenario():
+            first, _ = self.feed.subscribe()
+            second, _ = self.feed.subscribe()
+            with self.assertRaises(FeedFull):
+                self.feed.subscribe()
+            self._publish(1)
+            return await first.next_frames(1), await second.next_frames(1)
+
+        first, second = asyncio.run(scenario())
+        self.assertEqual(_events(first), ["create"])
+        self.assertEqual(first, second)
+
+    def test_slow_subscriber_is_dropped(self):
+        """Test that overflowing the buffer closes the subscriber and counts it."""
+
+        async def scenario():
+            subscriber, _ = self.feed.subscribe()
+            self._publish(3)
+            await asyncio.sleep(0)
+            self.assertIsNone(await subscriber.next_frames(1))
+            self.feed.unsubscribe(subscriber)
+
+        asyncio.run(scenario())
+        self.assertEqual(self.feed.subscribers, set())
+        self.assertIn("change_feed_dropped_total 1", self.registry.render())
+
+    def test_stream_sends_heartbeats_and_ends_on_disconnect(self):
+        """Test that idle streams send keep-alives and end when disconnected."""
+        self.feed.heartbeat = 0.01
+
+        async def scenario():
+            subscriber, backlog = self.feed.subscribe()
+            chunks = []
+            async for chunk in self.feed.stream(subscriber, backlog):
+                chunks.append(chunk)
+                if len(chunks) == 2:
+                    self.feed.disconnect_all()
+            return chunks
+
+        chunks = asyncio.run(scenario())
+        self.assertEqual(chunks, [b"retry: 1000\n\n", b": keep-alive\n\n"])
+        self.assertEqual(self.feed.subscribers, set())
+
+
+class _GuardLock:
+    """A lock that fails instead of deadlocking when entered while held."""
+
+    def __init__(self) -> None:
+        self.held = False
+
+    def __enter__(self) -> None:
+        if self.held:
+            raise AssertionError("lock taken while held")
+        self.held = True
+
+    def __exit__(self, *exc_info) -> None:
+        self.held = False
+
+
+class TestExitSignals(unittest.TestCase):
+    """Unit tests for ending the streams on SIGTERM and SIGINT."""
+
+    def test_handler_never_takes_the_feed_lock(self):
+        """Test that a signal arriving while the lock is held defers the disconnect."""
+        feed = ChangeFeed(history_size=3, buffer_size=2, registry=MetricsRegistry())
+        feed._lock = _GuardLock()
+        seen = []
+
+        async def scenario():
+            subscriber, _ = feed.subscribe()
+            restore = disconnect_on_exit_signals(feed)
+            try:
+                with feed._lock:
+                    signal.raise_signal(signal.SIGTERM)
+                    self.assertFalse(subscriber.closed)
+                for _ in range(10):
+                    if subscriber.closed:
+                        break
+                    await asyncio.sleep(0)
+            finally:
+                restore()
+            return subscriber.closed
+
+        previous = signal.signal(signal.SIGTERM, lambda signum, _: seen.append(signum))
+        try:
+            self.assertTrue(asyncio.run(scenario()))
+        finally:
+            signal.signal(signal.SIGTERM, previous)
+        self.assertEqual(seen, [signal.SIGTERM])
+
+
+if __name__ == "__main__":
+    unittest.main()
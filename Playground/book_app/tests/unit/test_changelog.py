@@ -0,0 +1,71 @@
+import unittest
+
+from app.db.changelog import ChangeLog
+
+from .helpers import FakeClock, make_book
+
+
+def _ids(delta):
+    books, deleted = delta
+    return [book.id for book in books], deleted
+
+
+class TestChangeLog(unittest.TestCase):
+    """Unit tests for the compacted per-book change log."""
+
+    def setUp(self):
+        """Log a few changes."""
+        self.clock = FakeClock()
+        self.log = ChangeLog(clock=self.clock)
+        self.log.record(1, 1, make_book(1))
+        self.log.record(2, 2, make_book(2))
+        self.log.record(3, 1, None)
+
+    def test_since_returns_latest_change_per_book(self):
+        """Test that only changes after the version are returned, once per id."""
+        self.assertEqual(_ids(self.log.since(0)), ([2], [1]))
+        self.assertEqual(_ids(self.log.since(2)), ([], [1]))
+        self.assertEqual(self.log.since(3), ([], []))
+        self.assertEqual((len(self.log), self.log.tombstones), (2, 1))
+
+    def test_recreated_book_replaces_tombstone(self):
+        """Test that a write after a delete turns the tombstone back into a book."""
+        self.log.record(4, 1, make_book(1))
+        self.assertEqual(_ids(self.log.since(0)), ([2, 1], []))
+        self.assertEqual(self.log.tombstones, 0)
+
+    def test_compact_drops_old_tombstones_and_raises_floor(self):
+        """Test that compaction forgets expired deletions and their history."""
+        self.clock.now = 5
+        self.log.record(4, 3, None)
+        self.clock.now = 10
+        self.assertEqual(self.log.compact(retention=7), 1)
+        self.assertEqual(self.log.floor, 3)
+        self.assertIsNone(self.log.since(2))
+        self.assertEqual(self.log.since(3), ([], [3]))
+
+    def test_clear_sets_floor(self):
+        """Test that clearing the log requires older clients to resync."""
+        self.log.clear(10)
+        self.assertIsNone(self.log.since(9))
+        self.assertEqual(self.log.since(10), ([], []))
+
+    def test_versions_must_increase(self):
+        """Test that a change older than the last one logged is refused."""
+        with self.assertRaises(ValueError):
+            self.log.record(3, 2, make_book(2))
+        self.log.clear(10)
+        with self.assertRaises(ValueError):
+            self.log.record(9, 2, make_book(2))
+        self.log.record(11, 2, make_book(2))
+        self.assertEqual(_ids(self.log.since(10)), ([2], []))
+
+    def test_metrics(self):
+        """Test that the log size is exported with the given prefix."""
+        values = {m.name: m.values[()] for m in self.log.metrics("test_log")}
+        self.assertEqual(values["test_log_entries"], 2)
+        self.assertEqual(values["test_log_tombstones"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
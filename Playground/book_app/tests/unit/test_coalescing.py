@@ -0,0 +1,171 @@
+import asyncio
+import unittest
+from types import SimpleNamespace
+
+from app.coalescing import CoalescingMiddleware, coalescing_key
+from app.db import create_book, reset_books
+from app.metrics import MetricsRegistry
+from app.metrics.middleware import UNMATCHED_ROUTE, MetricsMiddleware
+from app.models import Book
+
+
+def _scope(path: str, method: str = "GET", query: bytes = b"") -> dict:
+    return {
+        "type": "http",
+        "method": method,
+        "path": path,
+        "query_string": query,
+        "headers": [(b"accept", b"application/json"), (b"user-agent", b"test")],
+    }
+
+
+class TestCoalescingKey(unittest.TestCase):
+    """Unit tests for deciding which requests can share a response."""
+
+    def setUp(self):
+        """Reset the database before each test."""
+        reset_books()
+
+    def test_only_read_endpoints(self):
+        """Test that only GETs on the book pages and API are coalesced."""
+        self.assertIsNotNone(coalescing_key(_scope("/api/books")))
+        self.assertIsNotNone(coalescing_key(_scope("/")))
+        self.assertIsNotNone(coalescing_key(_scope("/books", query=b"search=x")))
+        self.assertIsNone(coalescing_key(_scope("/api/books", method="POST")))
+        self.assertIsNone(coalescing_key(_scope("/metrics")))
+        self.assertIsNone(coalescing_key(_scope("/api/books/events")))
+
+    def test_key_covers_query_headers_and_version(self):
+        """Test that the query, varying headers and store version split keys."""
+        key = coalescing_key(_scope("/api/books"))
+        self.assertNotEqual(key, coalescing_key(_scope("/api/books", query=b"a=1")))
+        other = _scope("/api/books")
+        other["headers"] = [(b"accept", b"text/html")]
+        self.assertNotEqual(key, coalescing_key(other))
+        create_book(Book(id=200, title="T", author="A", category="C"))
+        self.assertNotEqual(key, coalescing_key(_scope("/api/books")))
+
+    def test_fragment_requests_have_their_own_key(self):
+        """Test that page fragments never share a response with the full page."""
+        fragment = _scope("/books", query=b"category=Business")
+        fragment["headers"].append((b"x-fragment", b"results"))
+        self.assertNotEqual(
+            coalescing_key(_scope("/books", query=b"category=Business")),
+            coalescing_key(fragment),
+        )
+
+    def test_ignores_unrelated_headers(self):
+        """Test that headers outside VARY_HEADERS do not split keys."""
+        other = _scope("/api/books")
+        other["headers"] = [(b"accept", b"application/json"), (b"user-agent", b"x")]
+        self.assertEqual(coalescing_key(_scope("/api/books")), coalescing_key(other))
+
+
+class TestCoalescingMiddleware(unittest.TestCase):
+    """Unit tests for sharing one computation among identical requests."""
+
+    def setUp(self):
+        """Reset the database before each test."""
+        reset_books()
+
+    def _run(self, app, scopes):
+        async def call(middleware, scope):
+            sent = []
+
+            async def send(message):
+                sent.append(message)
+
+            await middleware(scope, None, send)
+            return sent
+
+        async def scenario():
+            registry = MetricsRegistry()
+            middleware = CoalescingMiddleware(app, registry=registry)
+            results = await asyncio.gather(*(call(middleware, s) for s in scopes))
+            return results, registry.render(), middleware
+
+        return asyncio.run(scenario())
+
+    def test_identical_requests_share_one_call(self):
+        """Test that concurrent identical requests run the app once."""
+        calls = []
+
+        async def app(scope, receive, send):
+            calls.append(scope["path"])
+            await asyncio.sleep(0.01)
+            await send({"type": "http.response.start", "status": 200, "headers": []})
+            await send({"type": "http.response.body", "body": b"books"})
+
+        results, metrics, middleware = self._run(
+            app, [_scope("/api/books") for _ in range(5)] + [_scope("/books")]
+        )
+        self.assertEqual(calls, ["/api/books", "/books"])
+        self.assertTrue(all(r[1]["body"] == b"books" for r in results))
+        self.assertIn("http_requests_coalesced_total 4", metrics)
+        self.assertEqual(middleware.flights, {})
+
+    def test_followers_are_labelled_with_the_route(self):
+        """Test that metrics label coalesced requests with the leader's route."""
+        route = SimpleNamespace(path="/api/books")
+
+        async def app(scope, receive, send):
+            scope["route"] = route
+            await asyncio.sleep(0.01)
+            await send({"type": "http.response.start", "status": 200, "headers": []})
+            await send({"type": "http.response.body", "body": b"books"})
+
+        async def scenario():
+            registry = MetricsRegistry()
+            metrics = MetricsMiddleware(
+                CoalescingMiddleware(app, registry=registry), registry=registry
+            )
+
+            async def send(message):
+                pass
+
+            scopes = [_scope("/api/books") for _ in range(5)]
+            await asyncio.gather(*(metrics(scope, None, send) for scope in scopes))
+            return registry.render(), scopes
+
+        metrics, scopes = asyncio.run(scenario())
+        self.assertTrue(all(scope["route"] is route for scope in scopes))
+        self.assertIn("http_requests_coalesced_total 4", metrics)
+        self.assertIn(
+            'http_requests_total{method="GET",route="/api/books",status="200"} 5',
+            metrics,
+        )
+        self.assertNotIn(UNMATCHED_ROUTE, metrics)
+
+    def test_followers_run_alone_when_leader_fails(self):
+        """Test that a failing leader makes waiting requests run themselves."""
+        calls = []
+
+        async def app(scope, receive, send):
+            calls.append(scope["path"])
+            await asyncio.sleep(0.01)
+            if len(calls) == 1:
+                raise RuntimeError("boom")
+            await send({"type": "http.response.start", "status": 200, "headers": []})
+            await send({"type": "http.response.body", "body": b"ok"})
+
+        async def scenario():
+            middleware = CoalescingMiddleware(app, registry=MetricsRegistry())
+            sent = []
+
+            async def send(message):
+                sent.append(message)
+
+            leader = asyncio.create_task(middleware(_scope("/"), None, send))
+            await asyncio.sleep(0)
+            await middleware(_scope("/"), None, send)
+            with self.assertRaises(RuntimeError):
+                await leader
+            return sent
+
+        sent = asyncio.run(scenario())
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(sent[-1]["body"], b"ok")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,4 +1,9 @@
+import sys
+import threading
 import unittest
+from unittest import mock
+
+import app.db as db
 from app.models import Book
 from app.db import (
     get_all_books,
@@ -8,8 +13,19 @@ from app.db import (
     update_book,
     delete_book,
     reset_books,
+    register_listener,
+    get_store_version,
+    get_changes_since,
+    compare_and_swap_book,
+    get_categories,
+    get_stats,
+    count_books,
+    find_duplicates,
+    find_duplicate_clusters,
+    index_built,
     BOOKS,
 )
+from app.db.sort_index import parse_sort, sort_books
 
 
 class TestDatabaseFunctions(unittest.TestCase):
@@ -137,6 +153,221 @@ class TestDatabaseFunctions(unittest.TestCase):
         reset_books()
         self.assertEqual(len(BOOKS), 50)
 
+    def test_writes_bump_store_version(self):
+        """Test that every successful write advances the store version."""
+        version = get_store_version()
+        book = create_book(Book(id=200, title="T", author="A", category="C"))
+        update_book(200, book)
+        delete_book(200)
+        self.assertEqual(get_store_version(), version + 3)
+        delete_book(200)
+        update_book(200, book)
+        self.assertEqual(get_store_version(), version + 3)
+
+    def test_listeners_see_each_change(self):
+        """Test that change listeners receive the operation and book."""
+        changes = []
+        with mock.patch.dict("app.db._listeners"):
+            register_listener("test", lambda op, book: changes.append((op, book)))
+            book = create_book(Book(id=200, title="T", author="A", category="C"))
+            delete_book(200)
+            reset_books()
+        self.assertEqual(changes, [("create", book), ("delete", book), ("reset", None)])
+
+    def test_update_bumps_version(self):
+        """Test that replacing a book stores it with the next version."""
+        book = get_book_by_id(1).model_copy(update={"title": "New"})  # type: ignore
+        update_book(1, book)
+        self.assertEqual(get_book_by_id(1).version, 2)  # type: ignore[union-attr]
+
+    def test_compare_and_swap(self):
+        """Test that a swap only succeeds against the expected version."""
+        current = get_book_by_id(1)
+        first = current.model_copy(update={"title": "First"})  # type: ignore
+        second = current.model_copy(update={"title": "Second"})  # type: ignore
+        self.assertTrue(compare_and_swap_book(1, 1, first))
+        self.assertFalse(compare_and_swap_book(1, 1, second))
+        self.assertFalse(compare_and_swap_book(999, 1, second))
+        stored = get_book_by_id(1)
+        self.assertEqual((stored.title, stored.version), ("First", 2))  # type: ignore
+
+    def test_compare_and_swap_loses_no_updates(self):
+        """Test that concurrent read-modify-write loops never lose an increment."""
+        update_book(1, Book(id=1, title="0", author="A", category="C"))
+
+        def increment(times: int) -> None:
+            for _ in range(times):
+                while True:
+                    book = get_book_by_id(1)
+                    new = book.model_copy(  # type: ignore[union-attr]
+                        update={"title": str(int(book.title) + 1)}  # type: ignore
+                    )
+                    if compare_and_swap_book(1, book.version, new):  # type: ignore
+                        break
+
+        threads = [threading.Thread(target=increment, args=(200,)) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(get_book_by_id(1).title, "800")  # type: ignore[union-attr]
+
+    def test_delete_with_expected_version(self):
+        """Test that a conditional delete keeps a book at another version."""
+        self.assertFalse(delete_book(1, expected_version=5))
+        self.assertIsNotNone(get_book_by_id(1))
+        self.assertTrue(delete_book(1, expected_version=1))
+
+    def test_changes_since(self):
+        """Test that delta sync returns only later changes, with tombstones."""
+        version = get_store_version()
+        book = create_book(Book(id=200, title="T", author="A", category="C"))
+        delete_book(3)
+        changes = get_changes_since(version)
+        self.assertFalse(changes.reset)
+        self.assertEqual(changes.version, version + 2)
+        self.assertEqual((changes.books, changes.deleted), ([book], [3]))
+        self.assertEqual(get_changes_since(changes.version).books, [])
+
+    def test_concurrent_writes_log_every_version(self):
+        """Test that writers on different books and threads log every change."""
+        version = get_store_version()
+
+        def write(first):
+            for book_id in range(first, 51, 5):
+                book = get_book_by_id(book_id)
+                update_book(book_id, book.model_copy(update={"title": "Changed"}))
+                create_book(Book(id=100 + book_id, title="N", author="A", category="C"))
+
+        threads = [threading.Thread(target=write, args=(i,)) for i in range(1, 6)]
+        interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+        try:
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        finally:
+            sys.setswitchinterval(interval)
+        changes = get_changes_since(version)
+        self.assertEqual(changes.version, version + 100)
+        self.assertEqual(len(changes.books), 100)
+
+    def test_delete_rechecks_position_under_the_locks(self):
+        """Test that a delete finds its book again if another delete moved it."""
+        find = db._find
+        calls = []
+
+        def find_then_delete_first(book_id):
+            found = find(book_id)
+            calls.append(book_id)
+            if len(calls) == 1:
+                # Runs between the unlocked scan and taking the stripe locks.
+                delete_book(1)
+            return found
+
+        with mock.patch.object(db, "_find", find_then_delete_first):
+            self.assertTrue(delete_book(20))
+        self.assertEqual(calls, [20, 1, 20])
+        self.assertIsNone(get_book_by_id(20))
+        self.assertIsNone(get_book_by_id(1))
+        self.assertIsNotNone(get_book_by_id(21))
+
+    def test_changes_since_needs_full_copy(self):
+        """Test that 0, unknown and pre-reset versions get the whole catalog."""
+        before_reset = get_store_version() - 1
+        for since in (0, before_reset, get_store_version() + 1):
+            changes = get_changes_since(since)
+            self.assertTrue(changes.reset)
+            self.assertEqual(len(changes.books), 50)
+
+    def test_get_all_books_sorted_and_paged(self):
+        """Test sorting and paging, from an index and by sorting per call."""
+        for sort in ("title", "-updated_at", "author,-id", "-category,title"):
+            expected = sort_books(BOOKS, parse_sort(sort))
+            self.assertEqual(get_all_books(sort=sort), expected, sort)
+            self.assertEqual(
+                get_all_books(sort=sort, offset=5, limit=10), expected[5:15], sort
+            )
+        business = get_all_books("business", "title", 2, 3)
+        self.assertEqual(
+            [book.title for book in business],
+            sorted(b.title for b in get_all_books("business"))[2:5],
+        )
+        self.assertEqual(get_all_books(offset=48, limit=10), BOOKS[48:])
+
+    def test_get_all_books_filtered_page(self):
+        """Test a filtered page in insertion order, and counting its books."""
+        business = get_all_books("business")
+        self.assertEqual(get_all_books("Business", None, 3, 4), business[3:7])
+        self.assertEqual(get_all_books("Business", None, 8, 5), business[8:])
+        self.assertEqual(count_books("BUSINESS"), len(business))
+        self.assertEqual(count_books(), 50)
+        self.assertEqual(count_books("nonexistent"), 0)
+
+    def test_sort_indexes_follow_writes(self):
+        """Test that indexed orders reflect creates, updates and deletes."""
+        get_all_books(sort="title")
+        create_book(Book(id=200, title="000 first", author="A", category="C"))
+        update_book(1, Book(id=1, title="zzz last", author="A", category="C"))
+        delete_book(2)
+        titles = [book.title for book in get_all_books(sort="title")]
+        self.assertEqual(titles[0], "000 first")
+        self.assertEqual(titles[-1], "zzz last")
+        self.assertNotIn("The Mountain Is You", titles)
+        self.assertEqual(len(titles), 50)
+        self.assertEqual(get_all_books(sort="-updated_at", limit=1)[0].id, 1)
+
+    def test_stats_follow_writes(self):
+        """Test that the counters match a recount after every kind of write."""
+
+        def recount():
+            return {
+                category: sum(1 for book in BOOKS if book.category == category)
+                for category in {book.category for book in BOOKS}
+            }
+
+        create_book(Book(id=200, title="T", author="New Author", category="Poetry"))
+        update_book(1, Book(id=1, title="T", author="James Clear", category="Poetry"))
+        compare_and_swap_book(
+            2, 1, Book(id=2, title="T", author="Mark Manson", category="Poetry")
+        )
+        delete_book(3)
+        stats = get_stats()
+        self.assertEqual(stats.total, len(BOOKS))
+        self.assertEqual(stats.categories, recount())
+        self.assertEqual(stats.authors["New Author"], 1)
+        self.assertEqual(stats.version, get_store_version())
+        self.assertIn("Poetry", get_categories())
+        self.assertGreaterEqual(stats.last_updated_at, BOOKS[-1].updated_at)
+        reset_books()
+        self.assertNotIn("Poetry", get_stats().categories)
+
+    def test_duplicate_clusters_follow_writes(self):
+        """Test the duplicate scan on the seed data and after writes."""
+        [cluster] = find_duplicate_clusters()
+        self.assertEqual([book.id for book in cluster.books], [1, 10])
+        self.assertTrue(cluster.exact)
+        create_book(Book(id=200, title="deep work", author="CAL NEWPORT", category="C"))
+        delete_book(10)
+        clusters = find_duplicate_clusters()
+        self.assertEqual(
+            [[book.id for book in cluster.books] for cluster in clusters],
+            [[9, 200]],
+        )
+        self.assertEqual(
+            [book.id for book, _ in find_duplicates("Deep Work", "Cal Newport")],
+            [9, 200],
+        )
+
+    def test_index_built_until_reset(self):
+        """Test that an index counts as built after first use, not after a reset."""
+        self.assertFalse(index_built("duplicate"))
+        find_duplicates("Deep Work", "Cal Newport")
+        self.assertTrue(index_built("duplicate"))
+        reset_books()
+        self.assertFalse(index_built("duplicate"))
+
 
 if __name__ == "__main__":
     unittest.main()
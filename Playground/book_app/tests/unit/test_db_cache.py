@@ -0,0 +1,110 @@
+import unittest
+from typing import List
+from unittest import mock
+
+from app import db
+from app.db.cache import LRUCache
+from app.models import Book
+
+from .helpers import FakeClock
+
+
+class TestLRUCache(unittest.TestCase):
+    """Unit tests for the bounded LRU/TTL cache."""
+
+    def test_hit_and_miss_counters(self):
+        """Test that lookups are counted as hits or misses."""
+        cache: LRUCache[int] = LRUCache(capacity=2)
+        self.assertIsNone(cache.get("a"))
+        cache.put("a", 1)
+        self.assertEqual(cache.get("a"), 1)
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    def test_evicts_least_recently_used(self):
+        """Test that the capacity is kept by dropping the oldest-used entry."""
+        cache: LRUCache[int] = LRUCache(capacity=2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        cache.get("a")
+        cache.put("c", 3)
+        self.assertEqual(len(cache), 2)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a"), 1)
+        self.assertEqual(cache.evictions, 1)
+
+    def test_entries_expire_after_ttl(self):
+        """Test that entries older than the TTL are misses and removed."""
+        clock = FakeClock()
+        cache: LRUCache[int] = LRUCache(capacity=2, ttl=10, clock=clock)
+        cache.put("a", 1)
+        clock.now = 10
+        self.assertEqual(cache.get("a"), 1)
+        clock.now = 10.5
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual((len(cache), cache.expirations), (0, 1))
+
+    def test_bounded_by_total_weight(self):
+        """Test that max_weight evicts by total weight and skips heavy values."""
+        cache: LRUCache[List[int]] = LRUCache(capacity=10, max_weight=5, weigh=len)
+        cache.put("a", [1, 2])
+        cache.put("b", [1, 2])
+        cache.put("a", [1])
+        self.assertEqual(cache.weight, 3)
+        cache.put("c", [1, 2, 3])
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual((cache.weight, cache.evictions), (4, 1))
+        cache.put("d", [1] * 6)
+        self.assertIsNone(cache.get("d"))
+        self.assertEqual((len(cache), cache.weight), (2, 4))
+
+    def test_zero_capacity_disables(self):
+        """Test that a capacity of 0 never stores anything."""
+        cache: LRUCache[int] = LRUCache(capacity=0)
+        cache.put("a", 1)
+        self.assertIsNone(cache.get("a"))
+
+    def test_metrics(self):
+        """Test that the counters are exported with the given prefix."""
+        cache: LRUCache[int] = LRUCache(capacity=1)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        values = {m.name: m.values[()] for m in cache.metrics("test_cache")}
+        self.assertEqual(values["test_cache_evictions_total"], 1)
+        self.assertEqual(values["test_cache_entries"], 1)
+
+
+class TestSearchCache(unittest.TestCase):
+    """Unit tests for memoized search_books results."""
+
+    def setUp(self):
+        """Reset the database and the search cache before each test."""
+        db.reset_books()
+        db.search_cache.clear()
+
+    def test_repeated_search_is_cached(self):
+        """Test that repeating a query, in any case, hits the cache."""
+        first = db.search_books("habits")
+        second = db.search_books("HABITS")
+        self.assertEqual(first, second)
+        self.assertIsNot(first, second)
+        self.assertEqual((db.search_cache.hits, db.search_cache.misses), (1, 1))
+
+    def test_write_invalidates(self):
+        """Test that a write makes the next search see the new book."""
+        matches = len(db.search_books("habits"))
+        db.create_book(
+            Book(id=200, title="Tiny Habits", author="BJ Fogg", category="Self-Help")
+        )
+        self.assertEqual(len(db.search_books("habits")), matches + 1)
+        self.assertEqual(db.search_cache.hits, 0)
+
+    def test_broad_search_is_not_cached(self):
+        """Test that results above the row bound are recomputed each time."""
+        with mock.patch.object(db.search_cache, "max_weight", 5):
+            db.search_books("e")
+            db.search_books("e")
+            self.assertEqual((len(db.search_cache), db.search_cache.hits), (0, 0))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,72 @@
+import threading
+import unittest
+
+import anyio
+import anyio.to_thread
+
+from app.db import executor
+
+
+class TestRunInStore(unittest.TestCase):
+    """Unit tests for dispatching store calls from async code."""
+
+    def tearDown(self):
+        """Restore inline dispatch."""
+        executor.offload = False
+
+    def _calling_thread(self) -> threading.Thread:
+        async def call() -> threading.Thread:
+            return await executor.run_in_store(threading.current_thread)
+
+        return anyio.run(call)
+
+    def test_inline_by_default(self):
+        """Test that store calls run on the event loop thread by default."""
+        self.assertIs(self._calling_thread(), threading.current_thread())
+
+    def test_offload_uses_worker_thread(self):
+        """Test that offloading runs store calls in the thread pool."""
+        executor.offload = True
+        self.assertIsNot(self._calling_thread(), threading.current_thread())
+
+    def test_heavy_calls_use_worker_thread(self):
+        """Test that heavy calls go to the thread pool even without offloading."""
+
+        async def call() -> threading.Thread:
+            return await executor.run_in_store(threading.current_thread, heavy=True)
+
+        self.assertIsNot(anyio.run(call), threading.current_thread())
+
+    def test_arguments_are_passed(self):
+        """Test that positional arguments reach the store function."""
+
+        async def call() -> int:
+            return await executor.run_in_store(pow, 2, 10)
+
+        self.assertEqual(anyio.run(call), 1024)
+
+
+class TestConfigureThreadPool(unittest.TestCase):
+    """Unit tests for thread pool sizing."""
+
+    def test_resize(self):
+        """Test that an explicit size changes the limiter capacity."""
+
+        async def resize() -> tuple:
+            size = executor.configure_thread_pool(7)
+            limiter = anyio.to_thread.current_default_thread_limiter()
+            return size, limiter.total_tokens
+
+        self.assertEqual(anyio.run(resize), (7, 7))
+
+    def test_unset_keeps_default(self):
+        """Test that no size and no env var keeps anyio's default."""
+
+        async def keep() -> int:
+            return executor.configure_thread_pool(0)
+
+        self.assertEqual(anyio.run(keep), 40)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,104 @@
+import asyncio
+import os
+import unittest
+from unittest import mock
+
+from app.db import (
+    STORE_SHARDS_ENV,
+    delete_book,
+    get_all_books,
+    get_book_by_id,
+    get_book_by_title,
+    increment_book_id,
+    reset_books,
+    search_books,
+    search_cache,
+    update_book,
+)
+from app.db.instrumentation import db_stats
+
+
+class TestDbInstrumentation(unittest.TestCase):
+    """Unit tests for the opt-in store instrumentation."""
+
+    def setUp(self):
+        """Reset database and enable instrumentation with empty stats."""
+        reset_books()
+        db_stats.reset()
+        db_stats.enable()
+
+    def tearDown(self):
+        """Disable instrumentation and reset state."""
+        db_stats.disable()
+        db_stats.reset()
+        reset_books()
+
+    def _operation(self, name: str) -> dict:
+        return db_stats.summary()["operations"][name]
+
+    def test_disabled_records_nothing(self):
+        """Test that calls are not recorded while instrumentation is off."""
+        db_stats.disable()
+        get_all_books()
+        self.assertEqual(db_stats.summary()["operations"], {})
+
+    def test_full_scan_rows(self):
+        """Test that filters report every book as scanned."""
+        get_all_books("Business")
+        stats = self._operation("get_all_books")
+        self.assertEqual(stats["calls"], 1)
+        self.assertEqual(stats["rows_scanned"], 50)
+        self.assertEqual(stats["rows_returned"], 10)
+
+    def test_search_rows(self):
+        """Test that search reports scanned and returned rows."""
+        search_books("habits")
+        stats = self._operation("search_books")
+        self.assertEqual(stats["rows_scanned"], 50)
+        self.assertEqual(stats["rows_returned"], 3)
+
+    def test_lookup_stops_at_match(self):
+        """Test that lookups report the position of the match."""
+        get_book_by_id(5)
+        get_book_by_title("nonexistent")
+        self.assertEqual(self._operation("get_book_by_id")["rows_scanned"], 5)
+        self.assertEqual(self._operation("get_book_by_title")["rows_scanned"], 50)
+        self.assertEqual(self._operation("get_book_by_title")["rows_returned"], 0)
+
+    def test_update_reports_position(self):
+        """Test that update_book reports the position of the replaced book."""
+        book = get_book_by_id(3)
+        update_book(3, book)  # type: ignore[arg-type]
+        self.assertEqual(self._operation("update_book")["rows_scanned"], 3)
+
+    def test_delete_reports_position(self):
+        """Test that delete_book reports the books examined to find its book."""
+        delete_book(4)
+        delete_book(999)
+        self.assertEqual(self._operation("delete_book")["rows_scanned"], 4 + 49)
+
+    def test_cached_search_scans_nothing(self):
+        """Test that a search served from the cache reports no rows scanned."""
+        search_cache.clear()
+        self.assertEqual(search_books("habits"), search_books("habits"))
+        stats = self._operation("search_books")
+        self.assertEqual((stats["rows_scanned"], stats["rows_returned"]), (50, 6))
+
+    def test_sharded_lookups_scan_one_book(self):
+        """Test that id lookups in a sharded store report one book each."""
+        with mock.patch.dict(os.environ, {STORE_SHARDS_ENV: "2"}):
+            reset_books()
+            get_book_by_id(40)
+            delete_book(40)
+        reset_books()
+        self.assertEqual(self._operation("get_book_by_id")["rows_scanned"], 1)
+        self.assertEqual(self._operation("delete_book")["rows_scanned"], 1)
+
+    def test_lock_wait_recorded(self):
+        """Test that id allocation records lock acquisitions."""
+        asyncio.run(increment_book_id())
+        self.assertEqual(db_stats.summary()["id_lock"]["acquisitions"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,109 @@
+import unittest
+
+from app.db.duplicates import (
+    DuplicateIndex,
+    fingerprint,
+    jaccard,
+    normalize,
+    similarity,
+)
+
+from .helpers import make_book
+
+
+class TestNormalization(unittest.TestCase):
+    """Unit tests for keys and signatures."""
+
+    def test_normalize(self):
+        """Test that case, accents, punctuation and spacing are folded."""
+        self.assertEqual(normalize("  Atomic   HABITS!"), "atomic habits")
+        self.assertEqual(normalize("Café—Crème_Brûlée"), "cafe creme brulee")
+        self.assertEqual(normalize("..."), "")
+
+    def test_fingerprint(self):
+        """Test that keys match normalized equals and signatures estimate overlap."""
+        key, same = fingerprint("Atomic Habits", "James Clear")
+        variant_key, variant = fingerprint("atomic-habits", "JAMES CLEAR")
+        self.assertEqual((variant_key, similarity(same, variant)), (key, 1))
+        close_key, close = fingerprint("Atomic Habits: An Easy Wa", "James Clear")
+        key, same = fingerprint("Atomic Habits: An Easy Way!", "James Clear")
+        self.assertNotEqual(close_key, key)
+        self.assertGreater(similarity(same, close), 0.75)
+        other = fingerprint("Deep Work", "Cal Newport")[1]
+        self.assertLess(similarity(same, other), 0.25)
+
+    def test_jaccard(self):
+        """Test the exact similarity used to confirm candidates."""
+        first = make_book(1, "Atomic Habits", "James Clear")
+        self.assertEqual(
+            jaccard(first, make_book(2, "ATOMIC habits!", "James Clear")), 1.0
+        )
+        self.assertLess(
+            jaccard(first, make_book(3, "Atomic Habits: An Easy Way", "James Clear")),
+            0.75,
+        )
+
+    def test_short_texts(self):
+        """Test that texts shorter than a trigram still get a signature."""
+        self.assertEqual(
+            len(fingerprint("", "")[1]), len(fingerprint("Atomic", "X")[1])
+        )
+
+
+class TestDuplicateIndex(unittest.TestCase):
+    """Unit tests for the MinHash/LSH duplicate index."""
+
+    def setUp(self):
+        """Index a catalog with a pair of exact and a pair of near duplicates."""
+        self.index = DuplicateIndex()
+        self.index.rebuild(
+            [
+                make_book(1, "Atomic Habits", "James Clear"),
+                make_book(2, "Deep Work", "Cal Newport"),
+                make_book(3, "atomic habits.", "James Clear"),
+                make_book(4, "Atomic Habits: An Easy Way", "James Clear"),
+                make_book(6, "Atomic Habits: An Easy Wa", "James Clear"),
+                make_book(5, "Atomic Habits", "Someone Else Entirely"),
+            ]
+        )
+
+    def test_clusters(self):
+        """Test that exact and near variants cluster and other books do not."""
+        clusters = [
+            ([book.id for book in books], exact, score)
+            for books, exact, score in self.index.clusters()[0]
+        ]
+        self.assertEqual(len(clusters), 2)
+        self.assertEqual(clusters[0], ([1, 3], True, 1.0))
+        ids, exact, score = clusters[1]
+        self.assertEqual((ids, exact), ([4, 6], False))
+        self.assertGreaterEqual(score, 0.75)
+        self.assertLess(score, 1.0)
+
+    def test_matches(self):
+        """Test checking a new book against the index."""
+        hits, compared = self.index.matches("ATOMIC   habits", "James Clear")
+        self.assertLess(compared, len(self.index))
+        self.assertEqual([book.id for book, _ in hits[:2]], [1, 3])
+        self.assertEqual(hits[0][1], 1.0)
+        self.assertEqual(self.index.matches("Dune", "Frank Herbert")[0], [])
+
+    def test_writes_update_buckets(self):
+        """Test that re-adding a changed book moves it between clusters."""
+        self.index.add(make_book(3, "Deep  Work!", "Cal Newport"))
+        self.index.remove(4)
+        clusters = {
+            tuple(book.id for book in books) for books, _, _ in self.index.clusters()[0]
+        }
+        self.assertEqual(clusters, {(2, 3)})
+        self.index.remove(99)
+        self.assertEqual(len(self.index), 5)
+
+    def test_band_configuration(self):
+        """Test that bands times rows cannot exceed the signature length."""
+        with self.assertRaises(ValueError):
+            DuplicateIndex(bands=8, rows=4)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,101 @@
+import json
+import logging
+import unittest
+
+from app.logger import JSONFormatter, LogSampler, SampledLogger
+
+
+class _ListHandler(logging.Handler):
+    """Handler that keeps emitted records in memory."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.records: list[logging.LogRecord] = []
+
+    def emit(self, record: logging.LogRecord) -> None:
+        self.records.append(record)
+
+
+class TestJSONFormatter(unittest.TestCase):
+    """Unit tests for the JSON log formatter."""
+
+    def _record(self, msg: str, *args) -> logging.LogRecord:
+        return logging.LogRecord("app.test", logging.INFO, __file__, 1, msg, args, None)
+
+    def test_format_interpolates_lazy_args(self):
+        """Test that %-style arguments are interpolated when formatting."""
+        line = JSONFormatter().format(self._record("Retrieved %d book(s)", 3))
+        data = json.loads(line)
+        self.assertEqual(data["message"], "Retrieved 3 book(s)")
+        self.assertEqual(data["level"], "INFO")
+        self.assertEqual(data["logger"], "app.test")
+
+    def test_timestamp_uses_record_created(self):
+        """Test that the timestamp is derived from the record, in UTC."""
+        record = self._record("hello")
+        record.created = 0.0
+        record.msecs = 123.0
+        data = json.loads(JSONFormatter().format(record))
+        self.assertEqual(data["timestamp"], "1970-01-01T00:00:00.123Z")
+
+    def test_structured_fields_are_merged(self):
+        """Test that extra fields are added to the JSON output."""
+        record = self._record("hello")
+        record.fields = {"book_id": 7}
+        data = json.loads(JSONFormatter().format(record))
+        self.assertEqual(data["book_id"], 7)
+
+
+class TestLogSampler(unittest.TestCase):
+    """Unit tests for read-path log sampling."""
+
+    def test_passthrough_by_default(self):
+        """Test that the default sampler lets every call through."""
+        sampler = LogSampler()
+        self.assertTrue(all(sampler.allow() for _ in range(100)))
+
+    def test_sample_rate_is_deterministic(self):
+        """Test that a 10% rate lets exactly one call in ten through."""
+        sampler = LogSampler(sample_rate=0.1)
+        allowed = sum(sampler.allow() for _ in range(100))
+        self.assertEqual(allowed, 10)
+
+    def test_max_per_second(self):
+        """Test that the per-second cap limits calls in one window."""
+        sampler = LogSampler(max_per_second=5)
+        allowed = sum(sampler.allow() for _ in range(50))
+        self.assertLessEqual(allowed, 10)
+        self.assertGreaterEqual(allowed, 5)
+
+
+class TestSampledLogger(unittest.TestCase):
+    """Unit tests for the sampled logger adapter."""
+
+    def setUp(self):
+        self.base = logging.getLogger("app.tests.sampled")
+        self.base.propagate = False
+        self.handler = _ListHandler()
+        self.base.addHandler(self.handler)
+        self.base.setLevel(logging.INFO)
+
+    def tearDown(self):
+        self.base.removeHandler(self.handler)
+
+    def test_sampled_out_calls_create_no_records(self):
+        """Test that sampled-out calls never reach the handler."""
+        adapter = SampledLogger(self.base, LogSampler(sample_rate=0.5))
+        for i in range(10):
+            adapter.info("read %d", i)
+        self.assertEqual(len(self.handler.records), 5)
+
+    def test_disabled_level_skips_sampler(self):
+        """Test that disabled levels do not consume sampling credit."""
+        sampler = LogSampler(sample_rate=0.5)
+        adapter = SampledLogger(self.base, sampler)
+        adapter.debug("ignored")
+        self.assertEqual(sampler._count, 0)
+        self.assertEqual(self.handler.records, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
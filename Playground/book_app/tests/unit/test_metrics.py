@@ -0,0 +1,75 @@
+import unittest
+
+from app.metrics import Counter, Histogram, MetricsRegistry
+
+
+class TestHistogram(unittest.TestCase):
+    """Unit tests for the fixed-bucket histogram."""
+
+    def test_observe_places_value_in_bucket(self):
+        """Test that values land in the first bucket whose bound is >= value."""
+        histogram = Histogram("latency", "help", ("route",), buckets=(0.1, 1.0))
+        histogram.observe(0.05, "/a")
+        histogram.observe(0.1, "/a")
+        histogram.observe(5.0, "/a")
+        self.assertEqual(histogram.values[("/a",)], [2, 0, 1, 5.15])
+        self.assertEqual(histogram.snapshot("/a")["count"], 3)
+
+    def test_samples_are_cumulative(self):
+        """Test that rendered buckets are cumulative and end with +Inf."""
+        histogram = Histogram("latency", "help", buckets=(0.1, 1.0))
+        histogram.observe(0.05)
+        histogram.observe(0.5)
+        lines = list(histogram.samples())
+        self.assertIn('latency_bucket{le="0.1"} 1', lines)
+        self.assertIn('latency_bucket{le="1.0"} 2', lines)
+        self.assertIn('latency_bucket{le="+Inf"} 2', lines)
+        self.assertIn("latency_count 2", lines)
+
+    def test_quantile_upper_bound(self):
+        """Test that quantiles are estimated from bucket bounds."""
+        histogram = Histogram("latency", "help", buckets=(0.1, 1.0))
+        for _ in range(9):
+            histogram.observe(0.05)
+        histogram.observe(0.5)
+        self.assertEqual(histogram.quantile(0.5), 0.1)
+        self.assertEqual(histogram.quantile(0.99), 1.0)
+
+
+class TestMetricsRegistry(unittest.TestCase):
+    """Unit tests for Prometheus text rendering."""
+
+    def test_render_includes_help_and_type(self):
+        """Test that each metric renders HELP, TYPE and samples."""
+        registry = MetricsRegistry()
+        counter = registry.counter("hits_total", "Hits.", ("route",))
+        counter.inc("/api/books")
+        text = registry.render()
+        self.assertIn("# HELP hits_total Hits.", text)
+        self.assertIn("# TYPE hits_total counter", text)
+        self.assertIn('hits_total{route="/api/books"} 1', text)
+
+    def test_register_returns_existing_metric(self):
+        """Test that registering the same name twice returns the first metric."""
+        registry = MetricsRegistry()
+        first = registry.counter("hits_total", "Hits.")
+        second = registry.counter("hits_total", "Hits.")
+        self.assertIs(first, second)
+
+    def test_collectors_run_at_render(self):
+        """Test that collectors contribute metrics when rendering."""
+        registry = MetricsRegistry()
+        collected = Counter("collected_total", "Collected.")
+        collected.inc(amount=3)
+        registry.register_collector("collected", lambda: [collected])
+        self.assertIn("collected_total 3", registry.render())
+
+    def test_label_values_are_escaped(self):
+        """Test that quotes in label values are escaped."""
+        registry = MetricsRegistry()
+        registry.counter("hits_total", "Hits.", ("q",)).inc('say "hi"')
+        self.assertIn('hits_total{q="say \\"hi\\""} 1', registry.render())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,77 @@
+import unittest
+
+from app.db.prefix_index import PrefixIndex
+
+from .helpers import make_book
+
+
+class TestPrefixIndex(unittest.TestCase):
+    """Unit tests for the title/author prefix index."""
+
+    def setUp(self):
+        """Build a small index."""
+        self.index = PrefixIndex()
+        self.index.rebuild(
+            [
+                make_book(1, "Deep Work", "Cal Newport"),
+                make_book(2, "Digital Minimalism", "Cal Newport"),
+                make_book(3, "Daring Greatly", "Brené Brown"),
+                make_book(4, "Dare to Lead", "Brené Brown"),
+            ]
+        )
+
+    def test_case_insensitive_prefix(self):
+        """Test that any-case prefixes match titles and authors."""
+        self.assertEqual(
+            self.index.suggest("DAR", 10),
+            [("Dare to Lead", "title", 1), ("Daring Greatly", "title", 1)],
+        )
+        self.assertEqual(self.index.suggest("cal", 10), [("Cal Newport", "author", 2)])
+        self.assertEqual(self.index.suggest("x", 10), [])
+
+    def test_limit(self):
+        """Test that no more than ``limit`` suggestions are returned."""
+        self.assertEqual(len(self.index.suggest("d", 2)), 2)
+        self.assertEqual(len(self.index.suggest("d", 10)), 4)
+
+    def test_most_books_first(self):
+        """Test that matches with more books come first, then alphabetically."""
+        self.index.add(make_book(5, "Digital Minimalism", "Cal Newport"))
+        self.index.add(make_book(6, "Digital Minimalism", "Cal Newport"))
+        self.assertEqual(
+            self.index.suggest("d", 2),
+            [("Digital Minimalism", "title", 3), ("Dare to Lead", "title", 1)],
+        )
+        self.assertEqual(self.index.suggest("c", 1), [("Cal Newport", "author", 4)])
+        self.index.remove(5)
+        self.index.remove(6)
+        self.assertEqual(
+            [text for text, _, _ in self.index.suggest("d", 10)],
+            ["Dare to Lead", "Daring Greatly", "Deep Work", "Digital Minimalism"],
+        )
+
+    def test_rebuild_ranks_shared_entries(self):
+        """Test that a rebuilt index ranks titles and authors of several books."""
+        self.index.rebuild(
+            [make_book(1, "Alpha", "Zed"), make_book(2, "Beta", "Amy")]
+            + [make_book(i, "Gamma", "Amy") for i in range(3, 6)]
+        )
+        self.assertEqual(
+            self.index.suggest("a", 10),
+            [("Amy", "author", 4), ("Alpha", "title", 1)],
+        )
+
+    def test_add_and_remove_keep_counts(self):
+        """Test that writes update shared entries and drop unused ones."""
+        self.index.add(make_book(2, "Slow Productivity", "Cal Newport"))
+        self.assertEqual(self.index.suggest("di", 10), [])
+        self.assertEqual(self.index.suggest("slow", 10)[0][0], "Slow Productivity")
+        self.index.remove(1)
+        self.assertEqual(self.index.suggest("cal", 10), [("Cal Newport", "author", 1)])
+        self.index.remove(2)
+        self.assertEqual(self.index.suggest("cal", 10), [])
+        self.assertEqual(len(self.index), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
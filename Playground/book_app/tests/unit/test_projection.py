@@ -0,0 +1,76 @@
+import json
+import unittest
+
+from app.models import Book, ScoredBook
+from app.routes.projection import (
+    Projection,
+    get_projection,
+    projected,
+    projected_rows,
+)
+
+
+class TestProjection(unittest.TestCase):
+    """Unit tests for sparse field projection."""
+
+    def setUp(self):
+        """Create a couple of books to serialize."""
+        self.books = [
+            Book(id=i, title=f"Book {i}", author="Author", category="Test")
+            for i in (1, 2)
+        ]
+
+    def test_many_keeps_only_requested_fields(self):
+        """Test that a list is serialized with just the projected fields."""
+        body = Projection(Book, frozenset({"title", "id"})).many(self.books)
+        self.assertEqual(
+            json.loads(body),
+            [{"id": 1, "title": "Book 1"}, {"id": 2, "title": "Book 2"}],
+        )
+
+    def test_matches_full_serialization(self):
+        """Test that projecting every field matches the model's own JSON."""
+        projection = Projection(Book, frozenset(Book.model_fields))
+        self.assertEqual(
+            json.loads(projection.one(self.books[0])),
+            json.loads(self.books[0].model_dump_json()),
+        )
+
+    def test_subclass_fields(self):
+        """Test projecting a field only the subclass has."""
+        hit = ScoredBook(**self.books[0].model_dump(), score=1.5)
+        body = Projection(ScoredBook, frozenset({"score"})).one(hit)
+        self.assertEqual(json.loads(body), {"score": 1.5})
+
+    def test_rows_skip_the_model(self):
+        """Test projecting field dicts, extra keys ignored, as a response."""
+        rows = [{**book.__dict__, "score": 0.5} for book in self.books]
+        response = projected_rows(ScoredBook, frozenset({"id", "score"}), rows)
+        self.assertEqual(
+            json.loads(response.body),
+            [{"id": 1, "score": 0.5}, {"id": 2, "score": 0.5}],
+        )
+        self.assertEqual(response.media_type, "application/json")
+
+    def test_projection_is_cached(self):
+        """Test that each field set builds its serializers once."""
+        fields = frozenset({"id"})
+        self.assertIs(get_projection(Book, fields), get_projection(Book, fields))
+        self.assertIsNot(
+            get_projection(Book, fields), get_projection(ScoredBook, fields)
+        )
+
+    def test_projected_response(self):
+        """Test the JSON response wrapper for single books and lists."""
+        response = projected(
+            Book, frozenset({"id"}), self.books[0], headers={"ETag": '"1"'}
+        )
+        self.assertEqual(response.body, b'{"id":1}')
+        self.assertEqual(response.media_type, "application/json")
+        self.assertEqual(response.headers["ETag"], '"1"')
+        response = projected(Book, frozenset({"id"}), self.books)
+        self.assertEqual(response.body, b'[{"id":1},{"id":2}]')
+
+
+if __name__ == "__main__":
+    unittest.main()
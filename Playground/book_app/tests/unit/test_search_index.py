@@ -0,0 +1,79 @@
+import unittest
+
+from app.db.search_index import SearchIndex, tokenize
+
+from .helpers import make_book
+
+
+class TestSearchIndex(unittest.TestCase):
+    """Unit tests for the BM25 inverted index."""
+
+    def setUp(self):
+        """Build a small index."""
+        self.index = SearchIndex()
+        self.index.rebuild(
+            [
+                make_book(1, "Deep Work", "Cal Newport"),
+                make_book(2, "Deep Deep Sea Stories Collected"),
+                make_book(3, "Work Rules", "Laszlo Bock"),
+                make_book(4, "Start With Why", "Simon Sinek"),
+            ]
+        )
+
+    def _ids(self, query: str, limit: int = 10):
+        return [book.id for book, _ in self.index.search(query, limit)[0]]
+
+    def test_tokenize(self):
+        """Test that tokens are case-folded words without punctuation."""
+        self.assertEqual(tokenize("Can't Hurt ME!"), ["can", "t", "hurt", "me"])
+
+    def test_ranks_by_relevance(self):
+        """Test that frequent words in short documents score higher."""
+        self.assertEqual(self._ids("deep"), [2, 1])
+        self.assertEqual(self._ids("work"), [1, 3])
+        self.assertEqual(self._ids("simon"), [4])
+
+    def test_every_word_must_match(self):
+        """Test that hits contain all query words, in any case or order."""
+        self.assertEqual(self._ids("WORK deep"), [1])
+        self.assertEqual(self._ids("deep missing"), [])
+        self.assertEqual(self._ids("!!"), [])
+
+    def test_limit_keeps_top_hits(self):
+        """Test that only the best ``limit`` hits are returned."""
+        self.assertEqual(self._ids("deep", limit=1), [2])
+        self.assertEqual(self._ids("why simon"), [4])
+        self.assertEqual(self.index.search("why simon", 10)[1], 1)
+
+    def test_unlimited_and_filtered(self):
+        """Test that ``limit=None`` ranks every hit and ``where`` filters them."""
+        self.assertEqual(self._ids("deep", limit=None), [2, 1])
+        hits, _ = self.index.search("deep", None, lambda book: "Work" in book.title)
+        self.assertEqual([book.id for book, _ in hits], [1])
+
+    def test_count(self):
+        """Test that count agrees with an unlimited search, filtered or not."""
+        self.assertEqual(self.index.count("deep"), (2, 2))
+        self.assertEqual(self.index.count("work deep"), (1, 2))
+        self.assertEqual(self.index.count("deep", lambda book: book.id == 2), (1, 2))
+        self.assertEqual(self.index.count("missing"), (0, 0))
+
+    def test_ties_go_to_lower_id(self):
+        """Test that equal scores are ordered by book id."""
+        index = SearchIndex()
+        index.rebuild([make_book(7, "Same Title"), make_book(3, "Same Title")])
+        self.assertEqual([b.id for b, _ in index.search("same", 2)[0]], [3, 7])
+
+    def test_add_replaces_and_remove_drops(self):
+        """Test that re-adding a book re-indexes it and removal forgets it."""
+        self.index.add(make_book(4, "Leaders Eat Last", "Simon Sinek"))
+        self.assertEqual(self._ids("why"), [])
+        self.assertEqual(self._ids("leaders"), [4])
+        self.index.remove(4)
+        self.assertEqual(self._ids("simon"), [])
+        self.assertNotIn("simon", self.index.postings)
+        self.assertEqual(len(self.index), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
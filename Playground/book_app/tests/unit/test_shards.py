@@ -0,0 +1,261 @@
+import os
+import sys
+import tempfile
+import threading
+import unittest
+from datetime import datetime
+from pathlib import Path
+from unittest import mock
+
+import app.db as db
+from app.db import (
+    STORE_SHARDS_ENV,
+    compare_and_swap_book,
+    count_books,
+    create_book,
+    delete_book,
+    get_all_books,
+    get_book_by_id,
+    load_books,
+    load_snapshot,
+    reset_books,
+    save_snapshot,
+    search_books,
+    search_cache,
+    update_book,
+)
+from app.db.shards import ShardedBooks
+from app.db.sort_index import parse_sort, sort_books
+from app.models import Book
+
+
+def _books(count: int) -> list:
+    return [
+        Book(
+            id=1000 - i * 7,
+            title=f"Title {i % 13}",
+            author=f"Author {i % 5}",
+            category=("Fiction", "History", "Poetry")[i % 3],
+            updated_at=datetime(2024, 1, 1 + i % 28),
+        )
+        for i in range(count)
+    ]
+
+
+class TestShardedBooks(unittest.TestCase):
+    """Unit tests for the sharded book collection."""
+
+    def setUp(self):
+        """Spread 60 books over four shards."""
+        self.books = _books(60)
+        self.sharded = ShardedBooks(4, [parse_sort("title")])
+        self.sharded.extend(self.books)
+
+    def tearDown(self):
+        """Stop the shard threads."""
+        self.sharded.close()
+
+    def test_iterates_in_insertion_order(self):
+        """Test that iteration merges the shards back into insertion order."""
+        self.assertEqual(len(self.sharded), 60)
+        self.assertEqual(list(self.sharded), self.books)
+        self.assertEqual(list(self.sharded.iter_locked()), self.books)
+        self.assertTrue(all(shard.books for shard in self.sharded.shards))
+
+    def test_rejects_no_shards(self):
+        """Test that at least one shard is required."""
+        with self.assertRaises(ValueError):
+            ShardedBooks(0)
+
+    def test_find_replace_and_delete(self):
+        """Test that writes address books by id and keep their place."""
+        book_id = self.books[10].id
+        self.assertEqual(self.sharded.find(book_id), (book_id, self.books[10]))
+        self.assertIsNone(self.sharded.find(1))
+        moved = Book(id=book_id, title="Moved", author="A", category="Poetry")
+        with self.sharded.lock_for(book_id):
+            self.sharded[book_id] = moved
+        with self.sharded.lock_for(self.books[0].id):
+            del self.sharded[self.books[0].id]
+        with self.assertRaises(KeyError):
+            del self.sharded[1]
+        expected = self.books[1:10] + [moved] + self.books[11:]
+        self.assertEqual(list(self.sharded), expected)
+        poetry = [book for book in expected if book.category == "Poetry"]
+        self.assertEqual(self.sharded.page("poetry")[0], poetry)
+
+    def test_pages_match_the_unsharded_results(self):
+        """Test category, offset and limit, unsorted and sorted."""
+        self.sharded.append(Book(id=5, title="Added", author="A", category="Fiction"))
+        books = self.books + [self.sharded.find(5)[1]]
+        for category in (None, "FICTION", "Missing"):
+            matching = [
+                book
+                for book in books
+                if category is None or book.category.casefold() == category.casefold()
+            ]
+            for sort in (None, "title", "-updated_at,author"):
+                spec = None if sort is None else parse_sort(sort)
+                ordered = matching if spec is None else sort_books(matching, spec)
+                for offset, limit in ((0, None), (3, 7), (15, 50)):
+                    self.assertEqual(
+                        self.sharded.page(category, spec, offset, limit)[0],
+                        ordered[offset : None if limit is None else offset + limit],
+                        (category, sort, offset, limit),
+                    )
+
+    def test_page_scans_at_most_a_page_per_shard(self):
+        """Test that an unsorted page reads no more than offset + limit per shard."""
+        self.assertLessEqual(self.sharded.page(offset=2, limit=3)[1], 4 * 5)
+
+    def test_search(self):
+        """Test that substring matches come back in insertion order."""
+        expected = [book for book in self.books if "title 1" in book.title.lower()]
+        self.assertEqual(self.sharded.search("title 1"), expected)
+
+    def test_clear(self):
+        """Test that clear empties every shard and its indexes."""
+        self.sharded.page(spec=parse_sort("title"))
+        self.sharded.clear()
+        self.assertEqual((len(self.sharded), list(self.sharded)), (0, []))
+        self.assertEqual(self.sharded.page(spec=parse_sort("title")), ([], 0))
+
+    def test_concurrent_writers(self):
+        """Test that writers to different books never lose an update."""
+        ids = [book.id for book in self.books]
+
+        def write(part):
+            for book_id in part:
+                for version in range(20):
+                    with self.sharded.lock_for(book_id):
+                        book = self.sharded.find(book_id)[1]
+                        self.sharded[book_id] = book.model_copy(
+                            update={"version": book.version + 1}
+                        )
+
+        threads = [threading.Thread(target=write, args=(ids[i::4],)) for i in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual({book.version for book in self.sharded}, {21})
+        self.assertEqual([book.id for book in self.sharded], ids)
+
+
+class TestShardedStore(unittest.TestCase):
+    """Unit tests for the store with STORE_SHARDS set."""
+
+    def setUp(self):
+        """Reset the store into four shards, and back to the list afterwards."""
+        self.addCleanup(reset_books)
+        patcher = mock.patch.dict(os.environ, {STORE_SHARDS_ENV: "4"})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        reset_books()
+        search_cache.clear()
+
+    def test_reads_match_the_list(self):
+        """Test that the sharded store answers reads like the list store."""
+        sharded = (
+            get_all_books(),
+            get_all_books("business", "title", 2, 3),
+            get_all_books(sort="-updated_at", limit=7),
+            get_all_books("Leadership", limit=4),
+            search_books("the"),
+            get_book_by_id(42),
+        )
+        self.assertIsInstance(db.BOOKS, ShardedBooks)
+        with mock.patch.dict(os.environ, {STORE_SHARDS_ENV: "0"}):
+            reset_books()
+            search_cache.clear()
+            self.assertIs(db.BOOKS, db._book_list)
+            unsharded = (
+                get_all_books(),
+                get_all_books("business", "title", 2, 3),
+                get_all_books(sort="-updated_at", limit=7),
+                get_all_books("Leadership", limit=4),
+                search_books("the"),
+                get_book_by_id(42),
+            )
+        self.assertEqual(
+            [
+                book.model_dump(exclude={"updated_at"})
+                for part in sharded[:-1]
+                for book in part
+            ],
+            [
+                book.model_dump(exclude={"updated_at"})
+                for part in unsharded[:-1]
+                for book in part
+            ],
+        )
+        self.assertEqual(sharded[-1].title, unsharded[-1].title)
+
+    def test_writes(self):
+        """Test creates, updates, swaps and deletes on the sharded store."""
+        created = create_book(Book(id=101, title="New Book", author="A", category="C"))
+        self.assertTrue(
+            update_book(2, Book(id=2, title="Changed", author="B", category="C"))
+        )
+        book = get_book_by_id(3)
+        swapped = Book(id=3, title="Swapped", author="C", category="C")
+        self.assertTrue(compare_and_swap_book(3, book.version, swapped))
+        self.assertFalse(compare_and_swap_book(3, book.version, swapped))
+        self.assertTrue(delete_book(1))
+        self.assertFalse(delete_book(1))
+        self.assertIs(get_book_by_id(101), created)
+        self.assertEqual(get_book_by_id(2).version, 2)
+        self.assertIsNone(get_book_by_id(1))
+        self.assertEqual(count_books(), 50)
+        self.assertEqual(count_books("c"), 3)
+        self.assertEqual([book.id for book in get_all_books("C")], [2, 3, 101])
+        self.assertEqual([book.id for book in get_all_books()][:3], [2, 3, 4])
+
+    def test_concurrent_writes_log_every_version(self):
+        """Test that writers on different shards never share a store version."""
+        version = db.store_version
+        previous = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+        try:
+
+            def write(start):
+                for book_id in range(start, 50, 4):
+                    update_book(
+                        book_id, Book(id=book_id, title="W", author="A", category="C")
+                    )
+
+            threads = [threading.Thread(target=write, args=(i,)) for i in range(1, 5)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        finally:
+            sys.setswitchinterval(previous)
+        self.assertEqual(db.store_version, version + 49)
+        changed, deleted = db.change_log.since(version)
+        self.assertEqual((len(changed), deleted), (49, []))
+
+    def test_load_books(self):
+        """Test that loaded books are sharded and keep their order."""
+        books = _books(30)
+        load_books(books)
+        self.assertIsInstance(db.BOOKS, ShardedBooks)
+        self.assertEqual(get_all_books(), books)
+        self.assertEqual(
+            get_all_books(sort="title"), sort_books(books, parse_sort("title"))
+        )
+
+    def test_snapshot_round_trip(self):
+        """Test that a sharded store saves a snapshot in insertion order."""
+        delete_book(5)
+        expected = [book.model_dump() for book in get_all_books()]
+        with tempfile.TemporaryDirectory() as directory:
+            path = str(Path(directory) / "books.snap")
+            save_snapshot(path)
+            load_snapshot(path)
+            self.assertEqual([book.model_dump() for book in get_all_books()], expected)
+            reset_books()
+
+
+if __name__ == "__main__":
+    unittest.main()
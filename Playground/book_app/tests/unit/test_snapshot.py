@@ -0,0 +1,300 @@
+import os
+import tempfile
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from unittest import mock
+
+import app.db as db
+from app.db import (
+    BOOK_SNAPSHOT_ENV,
+    compare_and_swap_book,
+    create_book,
+    delete_book,
+    get_all_books,
+    get_book_by_id,
+    get_stats,
+    load_snapshot,
+    reset_books,
+    save_snapshot,
+    search_books_ranked,
+    update_book,
+)
+from app.db.snapshot import Snapshot, SnapshotBooks, write_snapshot
+from app.models import Book
+
+
+def _books(count: int) -> list:
+    return [
+        Book(
+            id=(count - i) * 10,
+            title=f"Título {i}",
+            author=f"Author {i % 3}",
+            category=("Fiction", "History")[i % 2],
+            updated_at=datetime(2024, 1, 1 + i % 28, 12, 30, 15, 250),
+            version=1 + i % 4,
+        )
+        for i in range(count)
+    ]
+
+
+class SnapshotTestCase(unittest.TestCase):
+    """Base class giving each test a temporary directory for snapshot files."""
+
+    def setUp(self):
+        """Create a temporary directory."""
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = Path(self.directory.name) / "books.snap"
+
+    def tearDown(self):
+        """Remove the temporary directory."""
+        self.directory.cleanup()
+
+
+class TestSnapshot(SnapshotTestCase):
+    """Unit tests for writing and reading snapshot files."""
+
+    def test_round_trip(self):
+        """Test that every field of every book survives, in order."""
+        books = _books(25)
+        size = write_snapshot(self.path, books)
+        self.assertEqual(size, self.path.stat().st_size)
+        snapshot = Snapshot(self.path)
+        self.assertEqual(len(snapshot), 25)
+        self.assertEqual(snapshot.max_id, 250)
+        self.assertEqual(
+            [snapshot.book(i).model_dump() for i in range(25)],
+            [book.model_dump() for book in books],
+        )
+        snapshot.close()
+
+    def test_id_index(self):
+        """Test that ids are found by position and missing ids are not."""
+        write_snapshot(self.path, _books(25))
+        snapshot = Snapshot(self.path)
+        self.assertEqual(snapshot.position_of(250), 0)
+        self.assertEqual(snapshot.position_of(10), 24)
+        for missing in (0, 15, 260, -1):
+            self.assertIsNone(snapshot.position_of(missing))
+        snapshot.close()
+
+    def test_counts(self):
+        """Test the precomputed per-category and per-author counts."""
+        books = _books(25)
+        write_snapshot(self.path, books)
+        snapshot = Snapshot(self.path)
+        categories, authors, last_updated_at = snapshot.counts()
+        self.assertEqual(categories, {"Fiction": 13, "History": 12})
+        self.assertEqual(authors, {"Author 0": 9, "Author 1": 8, "Author 2": 8})
+        self.assertEqual(last_updated_at, max(book.updated_at for book in books))
+        snapshot.close()
+
+    def test_empty_snapshot(self):
+        """Test a snapshot without books."""
+        write_snapshot(self.path, [])
+        snapshot = Snapshot(self.path)
+        self.assertEqual((len(snapshot), snapshot.max_id), (0, 0))
+        self.assertEqual(snapshot.counts(), ({}, {}, None))
+        self.assertIsNone(snapshot.position_of(1))
+        snapshot.close()
+
+    def test_rejects_other_files(self):
+        """Test that files that are not snapshots raise ValueError."""
+        self.path.write_bytes(b"not a snapshot" * 10)
+        with self.assertRaises(ValueError):
+            Snapshot(self.path)
+
+    def test_shared_strings_are_bounded(self):
+        """Test that repeated strings are decoded once and at most N are kept."""
+        write_snapshot(self.path, _books(25))
+        snapshot = Snapshot(self.path, strings_cache_size=2)
+        first, second = snapshot.book(0), snapshot.book(3)
+        self.assertIs(first.author, second.author)
+        self.assertEqual(
+            [snapshot.book(i).author for i in range(3)],
+            [f"Author {i}" for i in range(3)],
+        )
+        self.assertEqual(len(snapshot._decoded), 2)
+        snapshot.close()
+
+    def test_rewrite_keeps_open_snapshot(self):
+        """Test that writing over an open snapshot leaves its readers alone."""
+        write_snapshot(self.path, _books(5))
+        snapshot = Snapshot(self.path)
+        write_snapshot(self.path, _books(2))
+        self.assertEqual(snapshot.book(4).title, "Título 4")
+        self.assertEqual(len(Snapshot(self.path)), 2)
+        self.assertFalse(os.path.exists(f"{self.path}.tmp"))
+        snapshot.close()
+
+
+class TestSnapshotBooks(SnapshotTestCase):
+    """Unit tests for the list view over a snapshot and its overlay."""
+
+    def setUp(self):
+        """Map ten books."""
+        super().setUp()
+        self.books = _books(10)
+        write_snapshot(self.path, self.books)
+        self.view = SnapshotBooks(Snapshot(self.path))
+
+    def tearDown(self):
+        """Unmap the snapshot."""
+        self.view.snapshot.close()
+        super().tearDown()
+
+    def test_reads_like_a_list(self):
+        """Test length, indexing, slicing and iteration."""
+        self.assertEqual(len(self.view), 10)
+        self.assertEqual(self.view[0].id, 100)
+        self.assertEqual(self.view[-1].id, 10)
+        self.assertEqual([book.id for book in self.view[2:5]], [80, 70, 60])
+        self.assertEqual([book.id for book in self.view], [b.id for b in self.books])
+        with self.assertRaises(IndexError):
+            self.view[10]
+
+    def test_caches_read_books(self):
+        """Test that books read by index are cached and scans cache nothing."""
+        first = self.view[3]
+        self.assertEqual(self.view.metrics("s")[1].values[()], 1)
+        self.assertIs(self.view[3], first)
+        self.assertEqual(list(self.view)[3], first)
+        self.assertEqual(self.view.metrics("s")[1].values[()], 1)
+
+    def test_cache_is_bounded(self):
+        """Test that at most ``cache_size`` decoded books are kept."""
+        view = SnapshotBooks(self.view.snapshot, cache_size=4)
+        self.assertEqual([view[i].id for i in range(10)], [b.id for b in self.books])
+        self.assertEqual(len(view.cache), 4)
+
+    def test_concurrent_appends(self):
+        """Test that books appended from several threads are all found by id."""
+        ids = range(1000, 1400)
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            list(
+                pool.map(
+                    lambda book_id: self.view.append(
+                        Book(id=book_id, title="T", author="A", category="C")
+                    ),
+                    ids,
+                )
+            )
+        self.assertEqual(len(self.view), 410)
+        for book_id in ids:
+            index, book = self.view.find(book_id)
+            self.assertEqual((self.view[index].id, book.id), (book_id, book_id))
+
+    def test_overlay_writes(self):
+        """Test that replaced, deleted and appended books read back in order."""
+        replacement = Book(id=80, title="Replaced", author="A", category="C")
+        self.view[2] = replacement
+        del self.view[0]
+        del self.view[3]
+        self.view.append(Book(id=5, title="Added", author="A", category="C"))
+        expected = [90, 80, 70, 50, 40, 30, 20, 10, 5]
+        self.assertEqual([book.id for book in self.view], expected)
+        self.assertEqual([self.view[i].id for i in range(9)], expected)
+        self.assertIs(self.view[1], replacement)
+        self.assertEqual(self.view.overlay_size, 4)
+        with self.assertRaises(TypeError):
+            self.view.insert(0, replacement)
+
+    def test_find(self):
+        """Test that find returns the list index through deletes and appends."""
+        del self.view[1]
+        self.view.append(Book(id=5, title="Added", author="A", category="C"))
+        for book_id in (100, 70, 10, 5):
+            index, book = self.view.find(book_id)
+            self.assertIs(self.view[index], book)
+            self.assertEqual(book.id, book_id)
+        self.assertIsNone(self.view.find(90))
+        self.assertIsNone(self.view.find(1))
+
+    def test_find_through_the_overlay(self):
+        """Test find after replacements that change ids and appended deletes."""
+        self.view[0] = Book(id=7, title="Renumbered", author="A", category="C")
+        for book_id in (6, 4):
+            self.view.append(Book(id=book_id, title="Added", author="A", category="C"))
+        del self.view[10]
+        self.assertEqual(self.view.find(7), (0, self.view[0]))
+        self.assertIsNone(self.view.find(100))
+        self.assertIsNone(self.view.find(6))
+        self.assertEqual(self.view.find(4), (10, self.view[10]))
+
+
+class TestStoreSnapshot(SnapshotTestCase):
+    """Unit tests for serving the store from a snapshot."""
+
+    def setUp(self):
+        """Snapshot the seed catalog and load it."""
+        super().setUp()
+        reset_books()
+        save_snapshot(str(self.path))
+        load_snapshot(str(self.path))
+
+    def tearDown(self):
+        """Return to the default in-memory catalog."""
+        reset_books()
+        super().tearDown()
+
+    def test_loads_without_decoding_books(self):
+        """Test that loading decodes no book and lookups decode only theirs."""
+        self.assertIsInstance(db.BOOKS, SnapshotBooks)
+        self.assertEqual(get_stats().total, 50)
+        self.assertEqual(get_stats().categories["Business"], 10)
+        self.assertEqual(get_book_by_id(42).title, "Blue Ocean Strategy")
+        self.assertEqual(db.BOOKS.metrics("s")[1].values[()], 1)
+
+    def test_writes_go_to_the_overlay(self):
+        """Test creates, updates, swaps and deletes on top of the snapshot."""
+        created = create_book(Book(id=101, title="New Book", author="A", category="C"))
+        self.assertTrue(
+            update_book(2, Book(id=2, title="Changed", author="B", category="C"))
+        )
+        book = get_book_by_id(3)
+        swapped = Book(id=3, title="Swapped", author="C", category="C")
+        self.assertTrue(compare_and_swap_book(3, book.version, swapped))
+        self.assertFalse(compare_and_swap_book(3, book.version, swapped))
+        self.assertTrue(delete_book(1))
+        self.assertFalse(delete_book(1))
+        self.assertIs(get_book_by_id(101), created)
+        self.assertEqual(get_book_by_id(2).version, 2)
+        self.assertEqual(get_book_by_id(3).title, "Swapped")
+        self.assertIsNone(get_book_by_id(1))
+        self.assertEqual(get_stats().total, 50)
+        self.assertEqual(db.BOOKS.overlay_size, 4)
+        [(hit, _)] = search_books_ranked("swapped")
+        self.assertEqual(hit.id, 3)
+        titles = [book.title for book in get_all_books(sort="title")]
+        self.assertEqual(titles, sorted(titles, key=str.casefold))
+
+    def test_save_and_reload(self):
+        """Test that saving folds the overlay into a new snapshot."""
+        delete_book(5)
+        update_book(6, Book(id=6, title="Changed", author="B", category="C"))
+        expected = [book.model_dump() for book in get_all_books()]
+        save_snapshot(str(self.path))
+        load_snapshot(str(self.path))
+        self.assertEqual([book.model_dump() for book in get_all_books()], expected)
+        self.assertEqual(db.BOOKS.overlay_size, 0)
+
+    def test_reset_returns_to_the_list(self):
+        """Test that reset_books serves the default catalog from the list again."""
+        reset_books()
+        self.assertIs(db.BOOKS, db._book_list)
+        self.assertEqual(len(db.BOOKS), 50)
+
+    def test_snapshot_from_environment(self):
+        """Test that BOOK_SNAPSHOT is loaded when the store is first used."""
+        reset_books()
+        with (
+            mock.patch.dict(os.environ, {BOOK_SNAPSHOT_ENV: str(self.path)}),
+            mock.patch.object(db, "_seeded", False),
+        ):
+            self.assertEqual(len(get_all_books()), 50)
+            self.assertIsInstance(db.BOOKS, SnapshotBooks)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,100 @@
+import unittest
+from datetime import datetime, timedelta
+
+from app.db.sort_index import SortIndex, parse_sort, sort_books, sort_key
+
+from .helpers import START, make_book
+
+
+def _after(minutes: int) -> datetime:
+    return START + timedelta(minutes=minutes)
+
+
+class TestSortSpec(unittest.TestCase):
+    """Unit tests for parsing and applying sort orders."""
+
+    def test_parse_sort(self):
+        """Test that fields parse in order with their direction."""
+        self.assertEqual(
+            parse_sort("-updated_at,title"), (("updated_at", True), ("title", False))
+        )
+        for text in ("isbn", "-", "title,", "+title"):
+            with self.assertRaises(ValueError):
+                parse_sort(text)
+
+    def test_sort_books_matches_sort_key(self):
+        """Test that the multi-pass sort agrees with the index key order."""
+        books = [
+            make_book(i, title, author, updated_at=_after(minutes))
+            for i, (title, author, minutes) in enumerate(
+                [
+                    ("b", "X", 1),
+                    ("A", "y", 2),
+                    ("a", "x", 2),
+                    ("C", "Y", 1),
+                    ("b", "x", 3),
+                ],
+                start=1,
+            )
+        ]
+        for text in ("title", "-title", "author,-updated_at", "-updated_at,title"):
+            spec = parse_sort(text)
+            self.assertEqual(
+                sort_books(books, spec), sorted(books, key=sort_key(spec)), text
+            )
+
+    def test_strings_case_insensitive_ties_by_id(self):
+        """Test that case is ignored and equal keys keep id order."""
+        books = [make_book(3, "b"), make_book(2, "B"), make_book(1, "a")]
+        ordered = sort_books(books, parse_sort("-title"))
+        self.assertEqual([book.id for book in ordered], [2, 3, 1])
+
+
+class TestSortIndex(unittest.TestCase):
+    """Unit tests for the maintained sort index."""
+
+    def setUp(self):
+        """Index a few books by most recent update, then title."""
+        self.index = SortIndex(parse_sort("-updated_at,title"))
+        self.index.rebuild(
+            [
+                make_book(1, "Old", updated_at=_after(0)),
+                make_book(2, "New B", updated_at=_after(5)),
+                make_book(3, "New A", updated_at=_after(5)),
+            ]
+        )
+
+    def ids(self, **kwargs):
+        """Return the ids of a page of the index."""
+        return [book.id for book in self.index.page(**kwargs)[0]]
+
+    def test_page(self):
+        """Test pages are slices of the sort order."""
+        self.assertEqual(self.ids(), [3, 2, 1])
+        self.assertEqual(self.ids(offset=1, limit=1), [2])
+        self.assertEqual(self.ids(offset=5), [])
+        self.assertEqual(self.index.page(offset=5), ([], 0))
+
+    def test_writes_keep_order(self):
+        """Test that add replaces a book's entry and remove drops it."""
+        self.index.add(make_book(1, "Old", updated_at=_after(10)))
+        self.index.add(make_book(4, "Another", updated_at=_after(5)))
+        self.assertEqual(self.ids(), [1, 4, 3, 2])
+        self.index.remove(3)
+        self.index.remove(99)
+        self.assertEqual(self.ids(), [1, 4, 2])
+        self.assertEqual(len(self.index), 3)
+
+    def test_filtered_page_stops_early(self):
+        """Test that a filtered page only walks until it is full."""
+        page, scanned = self.index.page(
+            limit=1, where=lambda book: book.title.startswith("New")
+        )
+        self.assertEqual(([book.id for book in page], scanned), ([3], 1))
+        self.assertEqual(
+            self.ids(offset=1, where=lambda book: book.title.startswith("New")), [2]
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
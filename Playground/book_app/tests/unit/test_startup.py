@@ -0,0 +1,49 @@
+import json
+import subprocess
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+from fastapi.testclient import TestClient
+
+from app import create_api_app
+
+ROOT = Path(__file__).resolve().parents[2]
+
+
+class TestColdStart(unittest.TestCase):
+    """Unit tests for work deferred out of application import."""
+
+    def _import_in_fresh_process(self, cwd: str) -> dict:
+        probe = (
+            "import json, sys; sys.path.insert(0, sys.argv[1]); import app, app.db; "
+            "print(json.dumps({'jinja2': 'jinja2' in sys.modules, "
+            "'books': len(app.db.BOOKS)}))"
+        )
+        output = subprocess.run(
+            [sys.executable, "-c", probe, str(ROOT)],
+            cwd=cwd,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+        return json.loads(output.strip().splitlines()[-1])
+
+    def test_import_defers_templates_logs_and_seed_data(self):
+        """Test that importing the app creates no logs folder, Jinja2 or books."""
+        with tempfile.TemporaryDirectory() as cwd:
+            result = self._import_in_fresh_process(cwd)
+            self.assertFalse((Path(cwd) / "logs").exists())
+        self.assertFalse(result["jinja2"])
+        self.assertEqual(result["books"], 0)
+
+    def test_api_app_has_no_pages(self):
+        """Test that the API-only app serves the API but not the HTML pages."""
+        with TestClient(create_api_app()) as client:
+            self.assertEqual(client.get("/api/books").status_code, 200)
+            self.assertEqual(client.get("/").status_code, 404)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,70 @@
+import unittest
+from datetime import datetime
+
+from app.db.stats import CatalogCounters
+from app.models import Book
+
+
+def make_book(book_id, category="Fiction", author="Ann", day=1):
+    """Build a book updated on ``day`` of January 2024."""
+    return Book(
+        id=book_id,
+        title=f"Book {book_id}",
+        author=author,
+        category=category,
+        updated_at=datetime(2024, 1, day),
+    )
+
+
+class TestCatalogCounters(unittest.TestCase):
+    """Unit tests for the incrementally maintained catalog counters."""
+
+    def setUp(self):
+        """Count three books."""
+        self.counters = CatalogCounters()
+        self.counters.rebuild(
+            [
+                make_book(1, day=3),
+                make_book(2, author="Bo", day=1),
+                make_book(3, category="History", day=2),
+            ]
+        )
+
+    def test_rebuild(self):
+        """Test counts and the latest change after a rebuild."""
+        total, categories, authors, last = self.counters.snapshot()
+        self.assertEqual(total, 3)
+        self.assertEqual(categories, {"Fiction": 2, "History": 1})
+        self.assertEqual(authors, {"Ann": 2, "Bo": 1})
+        self.assertEqual(last, datetime(2024, 1, 3))
+
+    def test_writes_adjust_counts(self):
+        """Test that add, replace and remove keep counts exact."""
+        self.counters.add(make_book(4, category="Science", day=4))
+        self.counters.replace(make_book(2, author="Bo"), make_book(2, day=5))
+        self.counters.remove(make_book(3, category="History"), at=datetime(2024, 1, 6))
+        total, categories, authors, last = self.counters.snapshot()
+        self.assertEqual(total, 3)
+        self.assertEqual(categories, {"Fiction": 2, "Science": 1})
+        self.assertEqual(authors, {"Ann": 3})
+        self.assertEqual(last, datetime(2024, 1, 6))
+
+    def test_snapshot_is_a_copy(self):
+        """Test that callers cannot change the counters through a snapshot."""
+        self.counters.snapshot()[1]["Fiction"] = 99
+        self.assertEqual(self.counters.category_counts()["Fiction"], 2)
+
+    def test_metrics(self):
+        """Test the exported gauges: total and per category, not per author."""
+        lines = [
+            line
+            for metric in self.counters.metrics("catalog")
+            for line in metric.samples()
+        ]
+        self.assertIn("catalog_books 3", lines)
+        self.assertIn('catalog_category_books{category="History"} 1', lines)
+        self.assertFalse(any("Ann" in line for line in lines))
+
+
+if __name__ == "__main__":
+    unittest.main()